@@ -0,0 +1,122 @@
+"""Обращения к базе при сохранении ответа на вопрос.
+
+Запуск из корня проекта с переменными окружения из infra/.env:
+
+    python -m benchmarks.answer_round_trips [QUESTIONS]
+
+Пользователь отвечает на все вопросы викторины двумя способами.
+"До" — прежний путь представления: вопрос, вариант и пользователь
+телеграма читаются отдельно, результат викторины создается или
+обновляется через объект, затем создается ответ. "После" —
+CRUDUserAnswer.record_answer одним запросом. Обращениями считаются
+запросы, BEGIN и COMMIT сессии flask.
+
+"""
+
+import asyncio
+import sys
+import time
+
+from sqlalchemy import event
+
+from benchmarks.fixtures import QuizFixture, quiz_fixture
+
+from src import db
+from src.crud.question import question_crud
+from src.crud.quiz_result import quiz_result_crud
+from src.crud.telegram_user import telegram_user_crud
+from src.crud.user_answer import user_answer_crud
+from src.crud.variant import variant_crud
+
+round_trips = {'count': 0}
+
+
+def count_round_trip(*args: object) -> None:
+    """Учесть обращение к базе."""
+    round_trips['count'] += 1
+
+
+async def save_answer_before(
+    fixture: QuizFixture,
+    user: tuple[int, int],
+    question_id: int,
+    answer_id: int,
+) -> None:
+    """Сохранение ответа, как до record_answer."""
+    user_id, telegram_id = user
+    await question_crud.get(question_id)
+    chosen_answer = await variant_crud.get(answer_id)
+    tg_user_id = (await telegram_user_crud.get_by_telegram_id(telegram_id)).id
+    quiz_result = await quiz_result_crud.get_by_user_and_quiz(
+        user_id=user_id,
+        quiz_id=fixture.quiz_id,
+    )
+    if quiz_result is None:
+        quiz_result = await quiz_result_crud.create(
+            {
+                'user_id': user_id,
+                'tg_user_id': tg_user_id,
+                'quiz_id': fixture.quiz_id,
+                'total_questions': 0,
+                'correct_answers_count': 0,
+                'is_complete': False,
+            },
+        )
+    quiz_result.total_questions += 1
+    if chosen_answer.is_right_choice:
+        quiz_result.correct_answers_count += 1
+    await quiz_result_crud.update_with_obj(quiz_result)
+    await user_answer_crud.create(
+        {
+            'user_id': user_id,
+            'tg_user_id': tg_user_id,
+            'quiz_id': fixture.quiz_id,
+            'question_id': question_id,
+            'answer_id': answer_id,
+            'is_right': chosen_answer.is_right_choice,
+        },
+    )
+
+
+async def save_answer_after(
+    fixture: QuizFixture,
+    user: tuple[int, int],
+    question_id: int,
+    answer_id: int,
+) -> None:
+    """Сохранение ответа одним запросом."""
+    await user_answer_crud.record_answer(
+        user_id=user[0],
+        telegram_id=user[1],
+        quiz_id=fixture.quiz_id,
+        question_id=question_id,
+        answer_id=answer_id,
+        is_right=True,
+    )
+
+
+async def main(questions: int) -> None:
+    """Ответить на все вопросы обоими способами."""
+    with quiz_fixture(questions=questions, users=2) as fixture:
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count_round_trip)
+        for name in ('begin', 'commit', 'rollback'):
+            event.listen(engine, name, count_round_trip)
+        for name, save_answer, user in (
+            ('before', save_answer_before, fixture.users[0]),
+            ('after', save_answer_after, fixture.users[1]),
+        ):
+            round_trips['count'] = 0
+            started_at = time.perf_counter()
+            for question_id, answer_id in fixture.questions:
+                await save_answer(fixture, user, question_id, answer_id)
+            elapsed = time.perf_counter() - started_at
+            print(
+                f'{name:6} {round_trips["count"] / questions:.1f} '
+                f'round trips/answer, '
+                f'{elapsed / questions * 1000:.2f} ms/answer',
+            )
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
@@ -0,0 +1,185 @@
+"""Одновременные /start и ответы на вопросы через круд классы.
+
+Запуск из корня проекта с переменными окружения из infra/.env:
+
+    python -m benchmarks.crud_paths [CALLS]
+
+/start обрабатывает бот на цикле uvicorn: регистрации выполняются
+одновременно на одном цикле, через пул движка сервера и через движок
+без пула, который получает любой другой цикл. Ответы принимают async
+представления flask: каждый запрос выполняется в потоке WsgiToAsgi
+на новом цикле событий. Они сравниваются через асинхронный круд
+(движок без пула на каждый цикл) и через пул синхронной сессии flask.
+Для каждого пути выводятся время, запросы в секунду, p50 и p95,
+число новых соединений с базой, а для цикла бота — наибольшая
+задержка цикла.
+
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from benchmarks.fixtures import QuizFixture, new_telegram_ids, quiz_fixture
+
+from src import app, db
+from src.crud.base import AsyncCRUDBase
+from src.crud.user import async_user_crud
+from src.crud.user_answer import CRUDUserAnswer, user_answer_crud
+from src.database import dispose_async_engine, init_async_engine
+from src.models.user_answer import UserAnswer
+from src.update_lanes import percentile
+
+# Потоки, в которых WsgiToAsgi выполняет запросы flask
+THREADS = 16
+# Одновременные обновления на цикле бота. Без пула каждое держит
+# свое соединение, и больше max_connections postgres не выдержит
+CONCURRENCY = 50
+connections = {'count': 0}
+
+
+class AsyncCRUDUserAnswer(AsyncCRUDBase, CRUDUserAnswer):
+
+    """Прежний путь ответов: асинхронный круд в представлении flask."""
+
+
+@event.listens_for(Pool, 'connect')
+def count_connection(*args: object) -> None:
+    """Учесть новое соединение с базой любого движка."""
+    connections['count'] += 1
+
+
+def report(
+    name: str,
+    latencies: list[float],
+    elapsed: float,
+    stall: Optional[float] = None,
+) -> None:
+    """Вывести строку с результатами пути."""
+    latencies.sort()
+    line = (
+        f'{name:18} n={len(latencies)} wall={elapsed * 1000:6.0f}ms '
+        f'rps={len(latencies) / elapsed:5.0f} '
+        f'p50={percentile(latencies, 50) * 1000:6.1f}ms '
+        f'p95={percentile(latencies, 95) * 1000:6.1f}ms '
+        f'connections={connections["count"]}'
+    )
+    if stall is not None:
+        line += f' loop_stall_max={stall * 1000:.1f}ms'
+    print(line)
+    connections['count'] = 0
+
+
+async def watch_loop(stalls: list[float], stop: asyncio.Event) -> None:
+    """Задержки цикла событий сверх миллисекунды."""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        stalls.append(now - last - 0.001)
+        last = now
+
+
+async def register(tg_id: int) -> None:
+    """Регистрация пользователя, как в обработчике /start."""
+    await async_user_crud.register(
+        {'name': 'Bench', 'username': f'bench{tg_id}', 'telegram_id': tg_id},
+        {'telegram_id': tg_id, 'first_name': 'Bench'},
+    )
+
+
+async def start_phase(name: str, tg_ids: list[int], pooled: bool) -> None:
+    """Одновременные регистрации на одном цикле, как в боте."""
+    if pooled:
+        init_async_engine()
+        # Прогрев пула и компиляции запросов
+        await register(tg_ids[0])
+        connections['count'] = 0
+    latencies, stalls, stop = [], [], asyncio.Event()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def timed_register(tg_id: int) -> None:
+        async with semaphore:
+            started_at = time.perf_counter()
+            await register(tg_id)
+            latencies.append(time.perf_counter() - started_at)
+
+    watcher = asyncio.create_task(watch_loop(stalls, stop))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(timed_register(tg_id) for tg_id in tg_ids))
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    await watcher
+    report(name, latencies, elapsed, max(stalls, default=0))
+    await dispose_async_engine()
+
+
+def answer_phase(
+    name: str,
+    record_answer: Callable[..., Awaitable[bool]],
+    fixture: QuizFixture,
+    users: list[tuple[int, int]],
+    question: tuple[int, int],
+) -> None:
+    """Одновременные ответы, каждый в потоке на своем цикле."""
+    question_id, answer_id = question
+    latencies = []
+
+    def submit(user: tuple[int, int]) -> None:
+        started_at = time.perf_counter()
+        with app.app_context():
+            asyncio.run(
+                record_answer(
+                    user_id=user[0],
+                    telegram_id=user[1],
+                    quiz_id=fixture.quiz_id,
+                    question_id=question_id,
+                    answer_id=answer_id,
+                    is_right=True,
+                ),
+            )
+        latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as executor:
+        list(executor.map(submit, users))
+    report(name, latencies, time.perf_counter() - started_at)
+
+
+def main(calls: int) -> None:
+    """Замерить пути /start и ответов."""
+    with quiz_fixture(questions=2) as fixture:
+        unpooled_ids = new_telegram_ids(calls)
+        pooled_ids = new_telegram_ids(calls)
+        fixture.telegram_ids += unpooled_ids + pooled_ids
+        asyncio.run(start_phase('/start no pool', unpooled_ids, pooled=False))
+        asyncio.run(start_phase('/start server pool', pooled_ids, pooled=True))
+        users = db.session.execute(
+            db.text(
+                'SELECT id, telegram_id FROM users '
+                'WHERE telegram_id = ANY(:telegram_ids)',
+            ),
+            {'telegram_ids': pooled_ids},
+        ).all()
+        db.session.commit()
+        connections['count'] = 0
+        for name, crud, question in (
+            ('answer async crud', AsyncCRUDUserAnswer(UserAnswer), 0),
+            ('answer flask pool', user_answer_crud, 1),
+        ):
+            answer_phase(
+                name,
+                crud.record_answer,
+                fixture,
+                users,
+                fixture.questions[question],
+            )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,155 @@
+"""Время открытия глубоких страниц списка пользователей Telegram.
+
+Запуск из корня проекта с переменными окружения из infra/.env:
+
+    python -m benchmarks.deep_pages [USERS]
+
+Список пользователей со статистикой ответов, как в админке, по ID,
+по числу и по проценту правильных ответов. "paginate" — прежний путь
+через Query.paginate: OFFSET и точный COUNT(*) на каждой странице.
+"offset" — keyset_paginate по номеру страницы, "cursor" — по курсору
+after со ссылки с предыдущей страницы. Для каждой страницы выводится
+медиана времени, строки всех трех способов совпадают.
+
+"""
+
+import statistics
+import sys
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import text
+
+from benchmarks.fixtures import new_telegram_ids
+
+from src import app, cache, db
+from src.constants import ITEMS_PER_PAGE
+from src.crud.statistic import telegram_user_statistic_crud
+from src.models.telegram_user import TelegramUser
+from src.pagination import keyset_paginate
+
+REPEATS = 15
+SORTS = (None, 'correct_answers', 'correct_percentage')
+
+
+def add_users(first_telegram_id: int, count: int) -> None:
+    """Создать пользователей Telegram со статистикой ответов."""
+    db.session.execute(
+        text(
+            'INSERT INTO telegram_users (telegram_id, first_name, '
+            'is_premium, added_to_attachment_menu, created_on) '
+            "SELECT :first + g, 'Bench', false, false, now() "
+            'FROM generate_series(0, :count - 1) g',
+        ),
+        {'first': first_telegram_id, 'count': count},
+    )
+    # Нулевые строки статистики созданы триггером вместе с пользователями
+    db.session.execute(
+        text(
+            'UPDATE telegram_user_statistics s '
+            'SET total_answers = u.id * 7919 % 50, '
+            'correct_answers = u.id * 7919 % 50 / 2 '
+            'FROM telegram_users u WHERE s.tg_user_id = u.id '
+            'AND u.telegram_id BETWEEN :first AND :first + :count - 1',
+        ),
+        {'first': first_telegram_id, 'count': count},
+    )
+    db.session.execute(text('ANALYZE telegram_users'))
+    db.session.execute(text('ANALYZE telegram_user_statistics'))
+    db.session.commit()
+
+
+def remove_users(first_telegram_id: int, count: int) -> None:
+    """Удалить пользователей замера, статистика удаляется каскадом."""
+    db.session.execute(
+        text(
+            'DELETE FROM telegram_users '
+            'WHERE telegram_id BETWEEN :first AND :first + :count - 1',
+        ),
+        {'first': first_telegram_id, 'count': count},
+    )
+    db.session.commit()
+
+
+def list_page(
+    sort: Optional[str],
+    page: int,
+    after: Optional[str] = None,
+) -> tuple[list[int], Optional[str]]:
+    """ID пользователей страницы и курсор следующей страницы."""
+    crud = telegram_user_statistic_crud
+    url = f'/?after={after}' if after else '/'
+    with app.test_request_context(url):
+        pagination = keyset_paginate(
+            crud.with_counts(TelegramUser.query, TelegramUser.id),
+            crud.sort_keys(sort, TelegramUser.id),
+            page=page,
+            per_page=ITEMS_PER_PAGE,
+            descending=sort is not None,
+        )
+        # Число страниц нужно шаблону пагинации
+        assert pagination.pages >= page
+        return (
+            [user.id for user, *_ in pagination.items],
+            pagination.url_args(page + 1).get('after'),
+        )
+
+
+def paginate_page(sort: Optional[str], page: int) -> list[int]:
+    """ID пользователей страницы списка через Query.paginate."""
+    crud = telegram_user_statistic_crud
+    keys = crud.sort_keys(sort, TelegramUser.id)
+    with app.app_context():
+        pagination = (
+            crud.with_counts(TelegramUser.query, TelegramUser.id)
+            .order_by(*(key.desc() if sort else key for key in keys))
+            .paginate(page=page, per_page=ITEMS_PER_PAGE, error_out=False)
+        )
+        return [user.id for user, *_ in pagination.items]
+
+
+def median_ms(function: Callable[[], object]) -> float:
+    """Медиана времени вызова в миллисекундах."""
+    timings = []
+    for _ in range(REPEATS):
+        started_at = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def measure(sort: Optional[str], page: int) -> None:
+    """Сравнить способы открыть страницу списка."""
+    _, after = list_page(sort, page - 1)
+    rows = paginate_page(sort, page)
+    assert list_page(sort, page)[0] == rows
+    assert list_page(sort, page, after)[0] == rows
+    timings = {
+        'paginate': median_ms(lambda: paginate_page(sort, page)),
+        'offset': median_ms(lambda: list_page(sort, page)),
+        'cursor': median_ms(lambda: list_page(sort, page, after)),
+    }
+    print(
+        f'sort={sort or "id":18} page={page:<6}',
+        *(f'{name} {ms:6.1f} ms' for name, ms in timings.items()),
+    )
+
+
+def main(users: int) -> None:
+    """Открыть первые, средние и последние страницы списка."""
+    first_telegram_id = new_telegram_ids(1)[0]
+    with app.app_context():
+        add_users(first_telegram_id, users)
+    cache.clear()
+    try:
+        last_page = users // ITEMS_PER_PAGE - 10
+        for sort in SORTS:
+            for page in (2, last_page // 10, last_page):
+                measure(sort, page)
+    finally:
+        with app.app_context():
+            remove_users(first_telegram_id, users)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,126 @@
+"""Тестовые данные для замеров и тестов, работающих с базой.
+
+Данные создаются в базе из переменных окружения и удаляются после
+замера, поэтому замеры и тесты можно запускать на базе разработки.
+
+"""
+
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from src import app, db
+from src.models.category import Category
+from src.models.question import Question
+from src.models.quiz import Quiz
+from src.models.telegram_user import TelegramUser
+from src.models.user import User
+from src.models.variant import Variant
+
+
+@dataclass
+class QuizFixture:
+
+    """Викторина и пользователи замера."""
+
+    quiz_id: int
+    category_id: int
+    # Пары (question_id, id верного варианта) в порядке вопросов
+    questions: list[tuple[int, int]]
+    # Пары (user_id, telegram_id)
+    users: list[tuple[int, int]] = field(default_factory=list)
+    # Пользователи с этими telegram_id удаляются после замера
+    telegram_ids: list[int] = field(default_factory=list)
+
+
+def new_telegram_ids(count: int) -> list[int]:
+    """Telegram id, которые не пересекаются с реальными."""
+    first = random.randint(10**12, 2 * 10**12)
+    return list(range(first, first + count))
+
+
+def add_users(fixture: QuizFixture, count: int) -> None:
+    """Создать пользователей сайта и телеграма."""
+    users = [
+        User(name='Bench', username=f'bench{tg_id}', telegram_id=tg_id)
+        for tg_id in new_telegram_ids(count)
+    ]
+    db.session.add_all(users)
+    db.session.add_all(
+        TelegramUser(telegram_id=user.telegram_id, first_name='Bench')
+        for user in users
+    )
+    db.session.commit()
+    fixture.users += [(user.id, user.telegram_id) for user in users]
+    fixture.telegram_ids += [user.telegram_id for user in users]
+
+
+def remove(fixture: QuizFixture) -> None:
+    """Удалить данные замера, статистика удаляется каскадом."""
+    params = {
+        'quiz_id': fixture.quiz_id,
+        'category_id': fixture.category_id,
+        'question_ids': [question_id for question_id, _ in fixture.questions],
+        'telegram_ids': fixture.telegram_ids,
+    }
+    for statement in (
+        'DELETE FROM user_answers WHERE quiz_id = :quiz_id',
+        'DELETE FROM quiz_results WHERE quiz_id = :quiz_id',
+        'DELETE FROM quiz_questions WHERE quiz_id = :quiz_id',
+        'DELETE FROM variants WHERE question_id = ANY(:question_ids)',
+        'DELETE FROM questions WHERE id = ANY(:question_ids)',
+        'DELETE FROM quizzes WHERE id = :quiz_id',
+        'DELETE FROM categories WHERE id = :category_id',
+        'DELETE FROM users WHERE telegram_id = ANY(:telegram_ids)',
+        'DELETE FROM telegram_users WHERE telegram_id = ANY(:telegram_ids)',
+    ):
+        db.session.execute(text(statement), params)
+    db.session.commit()
+
+
+@contextmanager
+def quiz_fixture(questions: int, users: int = 0) -> Iterator[QuizFixture]:
+    """Викторина с вопросами из двух вариантов и пользователи.
+
+    Пользователи, которых замер создаст сам, удаляются, если их
+    telegram_id добавлены в fixture.telegram_ids.
+
+    """
+    with app.app_context():
+        # Имена рубрик уникальны
+        name = f'Bench {uuid4().hex[:8]}'
+        category = Category(name=name)
+        db.session.add(category)
+        db.session.flush()
+        quiz_questions = [
+            Question(
+                title=f'{name} {number}',
+                category_id=category.id,
+                variants=[
+                    Variant(title='right', is_right_choice=True),
+                    Variant(title='wrong', is_right_choice=False),
+                ],
+            )
+            for number in range(questions)
+        ]
+        quiz = Quiz(title=name, questions=quiz_questions)
+        db.session.add(quiz)
+        db.session.commit()
+        fixture = QuizFixture(
+            quiz_id=quiz.id,
+            category_id=category.id,
+            questions=[
+                (question.id, question.variants[0].id)
+                for question in quiz_questions
+            ],
+        )
+        add_users(fixture, users)
+        try:
+            yield fixture
+        finally:
+            db.session.rollback()
+            remove(fixture)
@@ -0,0 +1,110 @@
+"""Пропускная способность и задержки полос обработки обновлений.
+
+Запуск из корня проекта с переменными окружения из infra/.env:
+
+    python -m benchmarks.update_lanes
+
+Обработчик имитирует обращение к базе паузой HANDLER_DELAY. Обычные
+пользователи присылают по несколько обновлений, один пользователь
+спамит /start. Для 1, 8 и 64 полос выводятся пропускная способность,
+p50 и p99 задержки обычных пользователей и число отброшенных
+обновлений спамера. Порядок обновлений каждого пользователя
+проверяется.
+
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+from aiogram.types import Update
+
+from src import app
+from src.update_lanes import LaneScheduler, percentile
+
+LANES = (1, 8, 64)
+USERS = 200
+UPDATES = 2000
+SPAMMER_ID = 0
+SPAMMER_SHARE = 0.2
+HANDLER_DELAY = 0.002
+USER_LIMIT = 50
+
+
+def make_update(user_id: int, update_id: int) -> Update:
+    """Сообщение /start от пользователя."""
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'Bench'}
+    return Update.model_validate(
+        {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': 0,
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': user,
+                'text': '/start',
+            },
+        },
+    )
+
+
+async def run(lanes: int, updates: list[Update]) -> dict:
+    """Прогнать обновления через планировщик с заданным числом полос."""
+    last_seen: dict[int, int] = {}
+    submitted_at: dict[int, float] = {}
+    latencies: list[float] = []
+
+    async def handler(update: Update) -> None:
+        user_id = update.message.from_user.id
+        if last_seen.get(user_id, -1) > update.update_id:
+            raise AssertionError(f'Нарушен порядок пользователя {user_id}')
+        last_seen[user_id] = update.update_id
+        await asyncio.sleep(HANDLER_DELAY)
+        if user_id != SPAMMER_ID:
+            latencies.append(
+                time.monotonic() - submitted_at[update.update_id],
+            )
+
+    scheduler = LaneScheduler(handler, lanes, user_limit=USER_LIMIT)
+    await scheduler.start()
+    started_at = time.monotonic()
+    for update in updates:
+        submitted_at[update.update_id] = time.monotonic()
+        scheduler.submit(update)
+        # Обновления приходят потоком, а не одной пачкой
+        await asyncio.sleep(0)
+    await scheduler.drain(60)
+    elapsed = time.monotonic() - started_at
+    stats = scheduler.stats()
+    latencies.sort()
+    return {
+        'lanes': lanes,
+        'throughput': round(stats['processed'] / elapsed),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'dropped': stats['dropped'],
+        'failed': stats['failed'],
+    }
+
+
+def main() -> None:
+    """Запустить замеры для каждого числа полос."""
+    # Отброшенные обновления спамера — ожидаемый результат замера
+    app.logger.setLevel(logging.ERROR)
+    random.seed(1)
+    updates = [
+        make_update(
+            SPAMMER_ID
+            if random.random() < SPAMMER_SHARE
+            else random.randint(1, USERS),
+            update_id,
+        )
+        for update_id in range(UPDATES)
+    ]
+    for lanes in LANES:
+        print(asyncio.run(run(lanes, updates)))
+
+
+if __name__ == '__main__':
+    main()
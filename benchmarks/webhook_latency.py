@@ -0,0 +1,142 @@
+"""Задержка вебхука: нативный маршрут ASGI против flask.
+
+Запуск из корня проекта с переменными окружения из infra/.env:
+
+    python -m benchmarks.webhook_latency [REQUESTS]
+
+Приложение src.asgi запускается в uvicorn, запросы идут по одному
+keep-alive соединению. "До" — прежний путь вебхука: то же
+обновление обрабатывает async представление flask за WsgiToAsgi,
+на новом цикле событий. "После" — нативный маршрут на цикле uvicorn.
+Обработчики бота выполняются, а запросы к Bot API подменены
+заглушкой.
+
+"""
+
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from http import HTTPStatus
+
+import aiohttp
+import uvicorn
+from aiogram import Bot
+from aiogram.types import Update
+from flask import Response, request
+
+from src import app, bot
+from src.asgi import application
+from src.settings import settings
+from src.update_dedup import update_dedup
+
+FLASK_WEBHOOK_PATH = '/benchmark/flask-webhook'
+WARMUP = 50
+
+
+async def fake_call(self: Bot, method: object, **kwargs: object) -> None:
+    """Заглушка Bot API."""
+
+
+async def fake_register_webhook() -> None:
+    """Регистрация вебхука в замере не нужна."""
+
+
+@app.post(FLASK_WEBHOOK_PATH)
+async def flask_webhook() -> Response:
+    """Вебхук в виде async представления flask, как до router."""
+    update = Update.model_validate_json(
+        request.get_data(),
+        context={'bot': bot.bot},
+    )
+    if not await update_dedup.is_duplicate(update.update_id):
+        await bot.feed_update(update)
+    return Response(status=HTTPStatus.OK)
+
+
+def make_update(update_id: int) -> dict:
+    """Сообщение без команды: проходит через диспетчер и фильтры."""
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': 7, 'type': 'private'},
+            'from': {'id': 7, 'is_bot': False, 'first_name': 'Bench'},
+            'text': 'hello',
+        },
+    }
+
+
+def summary(name: str, latencies: list[float], errors: int) -> str:
+    """Строка с перцентилями задержки в миллисекундах."""
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    mean = statistics.mean(latencies) * 1000
+    return (
+        f'{name:7} n={len(latencies)} p50={p50:.2f}ms p99={p99:.2f}ms '
+        f'mean={mean:.2f}ms errors={errors}'
+    )
+
+
+async def measure(
+    session: aiohttp.ClientSession,
+    url: str,
+    requests: int,
+    first_update_id: int,
+) -> tuple[list[float], int]:
+    """Последовательные запросы вебхука с новыми update_id."""
+    latencies, errors = [], 0
+    for index in range(WARMUP + requests):
+        started_at = time.perf_counter()
+        async with session.post(
+            url,
+            json=make_update(first_update_id + index),
+        ) as response:
+            await response.read()
+            errors += response.status != HTTPStatus.OK
+        if index >= WARMUP:
+            latencies.append(time.perf_counter() - started_at)
+    return latencies, errors
+
+
+async def main(requests: int) -> None:
+    """Запустить uvicorn и замерить оба пути."""
+    # Необработанные обновления — ожидаемый результат замера
+    logging.getLogger('aiogram.event').setLevel(logging.WARNING)
+    Bot.__call__ = fake_call
+    bot.register_webhook = fake_register_webhook
+    config = uvicorn.Config(
+        app=application,
+        host='127.0.0.1',
+        port=0,
+        log_level='error',
+        lifespan='on',
+    )
+    config.load()
+    server = uvicorn.Server(config)
+    server.lifespan = config.lifespan_class(config)
+    await server.startup()
+    port = server.servers[0].sockets[0].getsockname()[1]
+    base = f'http://127.0.0.1:{port}'
+    first_update_id = int(time.time() * 1000) % 10**9
+    async with aiohttp.ClientSession() as session:
+        for name, path in (
+            ('before', FLASK_WEBHOOK_PATH),
+            ('after', settings.WEBHOOK_PATH),
+        ):
+            latencies, errors = await measure(
+                session,
+                base + path,
+                requests,
+                first_update_id,
+            )
+            first_update_id += WARMUP + requests
+            print(summary(name, latencies, errors))
+    await server.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,158 @@
+"""Уникальный telegram_id пользователей.
+
+Прежняя регистрация проверяла пользователя и создавала его отдельными
+запросами, поэтому при одновременных /start могли появиться дубли
+с одинаковым telegram_id. Перед созданием уникального индекса дубли
+объединяются: остается пользователь с наименьшим id, результаты
+и ответы дублей переносятся на него, а совпадающие с уже имеющимися
+удаляются. Счетчики оставшихся результатов пересчитываются по
+перенесенным ответам, результат завершен, если была завершена
+любая из объединенных попыток. Счетчики статистики дублей удаляются каскадом, после
+миграции их нужно один раз пересчитать вручную командой
+flask rebuild-statistics.
+
+Revision ID: 5f3c9e2a7b14
+Revises: 1a2b3c4d5e6f
+Create Date: 2026-10-18 20:40:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5f3c9e2a7b14'
+down_revision = '1a2b3c4d5e6f'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_users_telegram_id'
+
+# Таблицы со ссылкой на пользователя и остальные столбцы их
+# уникальных ограничений
+USER_REFERENCES = {
+    'quiz_results': ('quiz_id',),
+    'user_answers': ('quiz_id', 'question_id'),
+}
+
+
+def merge_references(table: str, unique_columns: tuple[str, ...]) -> None:
+    """Перенести строки дублей на оставшегося пользователя."""
+    partition = ', '.join(f't.{column}' for column in unique_columns)
+    # Из совпадающих строк остается строка оставшегося пользователя
+    op.execute(
+        f"""
+        DELETE FROM {table} WHERE id IN (
+            SELECT id FROM (
+                SELECT
+                    t.id,
+                    row_number() OVER (
+                        PARTITION BY m.keep_id, {partition}
+                        ORDER BY t.user_id = m.keep_id DESC, t.id
+                    ) AS position
+                FROM {table} t
+                JOIN user_merge m ON m.id = t.user_id
+            ) ranked
+            WHERE position > 1
+        )
+        """,
+    )
+    op.execute(
+        f"""
+        UPDATE {table} t SET user_id = m.keep_id
+        FROM user_merge m
+        WHERE t.user_id = m.id AND m.id <> m.keep_id
+        """,
+    )
+
+
+# Завершенность совпадающих результатов переходит строке, которая
+# останется после объединения
+COMPLETE_MERGED_RESULTS = """
+    UPDATE quiz_results t SET is_complete = true
+    FROM user_merge m
+    WHERE t.user_id = m.id
+      AND t.is_complete IS NOT TRUE
+      AND EXISTS (
+          SELECT 1 FROM quiz_results other
+          JOIN user_merge other_merge ON other_merge.id = other.user_id
+          WHERE other_merge.keep_id = m.keep_id
+            AND other.quiz_id = t.quiz_id
+            AND other.is_complete
+      )
+"""
+
+# Счетчики результатов по ответам после переноса
+RECOUNT_MERGED_RESULTS = """
+    UPDATE quiz_results r
+    SET total_questions = answers.total,
+        correct_answers_count = answers.correct
+    FROM (
+        SELECT
+            user_id,
+            quiz_id,
+            count(*) AS total,
+            count(*) FILTER (WHERE is_right) AS correct
+        FROM user_answers
+        WHERE user_id IN (SELECT keep_id FROM user_merge)
+        GROUP BY user_id, quiz_id
+    ) answers
+    WHERE r.user_id = answers.user_id AND r.quiz_id = answers.quiz_id
+"""
+
+
+def has_user_column(inspector: sa.Inspector, table: str) -> bool:
+    """Есть ли в таблице ссылка на пользователя."""
+    return inspector.has_table(table) and 'user_id' in {
+        column['name'] for column in inspector.get_columns(table)
+    }
+
+
+def upgrade() -> None:
+    """Объединение дублей и уникальный индекс на users.telegram_id."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('users'):
+        # Таблицу создаст автогенерация вместе с уникальным индексом
+        return
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE user_merge ON COMMIT DROP AS
+        SELECT id, min(id) OVER (PARTITION BY telegram_id) AS keep_id
+        FROM users
+        WHERE telegram_id IN (
+            SELECT telegram_id FROM users
+            GROUP BY telegram_id
+            HAVING count(*) > 1
+        )
+        """,
+    )
+    tables = [
+        table for table in USER_REFERENCES
+        if has_user_column(inspector, table)
+    ]
+    if 'quiz_results' in tables:
+        op.execute(COMPLETE_MERGED_RESULTS)
+    for table in tables:
+        merge_references(table, USER_REFERENCES[table])
+    if len(tables) == len(USER_REFERENCES):
+        op.execute(RECOUNT_MERGED_RESULTS)
+    # Права администратора дубля переходят оставшемуся пользователю
+    op.execute(
+        """
+        UPDATE users u SET is_admin = true
+        FROM user_merge m
+        JOIN users duplicate ON duplicate.id = m.id
+        WHERE u.id = m.keep_id AND duplicate.is_admin
+        """,
+    )
+    op.execute(
+        """
+        DELETE FROM users u USING user_merge m
+        WHERE u.id = m.id AND m.id <> m.keep_id
+        """,
+    )
+    op.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+    op.create_index(INDEX_NAME, 'users', ['telegram_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Удаление уникального индекса, объединенные дубли не вернуть."""
+    op.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
@@ -0,0 +1,108 @@
+"""Строки статистики у всех объектов и индексы сортировки по счетчикам.
+
+Списки админки сортируются по счетчикам таблиц статистики. Чтобы
+страница читалась по индексу (счетчик, ID объекта), таблица
+статистики присоединяется к списку обычным join, поэтому строка
+статистики должна быть у каждого объекта: триггер создает нулевую
+строку при добавлении объекта, а у имеющихся объектов она
+добавляется здесь. Таблицы статистики, которых еще нет, создаст
+автогенерация вместе с индексами модели, после этого их нужно один
+раз заполнить командой flask rebuild-statistics.
+
+Revision ID: 7b2e4d9c1a36
+Revises: 5f3c9e2a7b14
+Create Date: 2026-10-18 23:10:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '7b2e4d9c1a36'
+down_revision = '5f3c9e2a7b14'
+branch_labels = None
+depends_on = None
+
+FUNCTION_NAME = 'create_answer_statistic'
+
+# Таблица объекта -> таблица его статистики и столбец ID объекта в ней
+STATISTIC_TABLES = {
+    'questions': ('question_statistics', 'question_id'),
+    'quizzes': ('quiz_statistics', 'quiz_id'),
+    'categories': ('category_statistics', 'category_id'),
+    'users': ('user_statistics', 'user_id'),
+    'telegram_users': ('telegram_user_statistics', 'tg_user_id'),
+}
+
+# Столбец индекса сортировки -> выражение, как в модели статистики
+SORT_COLUMNS = {
+    'total_answers': 'total_answers',
+    'correct_answers': 'correct_answers',
+    'correct_percentage': (
+        'COALESCE(round(100.0 * correct_answers::numeric / '
+        'NULLIF(total_answers, 0)::numeric, 2), 0::numeric)'
+    ),
+}
+
+
+def trigger_name(table: str) -> str:
+    """Название триггера, создающего строку статистики объекта."""
+    return f'{table}_create_statistic'
+
+
+def upgrade() -> None:
+    """Триггеры строк статистики, нулевые строки и индексы."""
+    inspector = sa.inspect(op.get_bind())
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION {FUNCTION_NAME}() RETURNS trigger AS $$
+        BEGIN
+            EXECUTE format(
+                'INSERT INTO %I (%I, total_answers, correct_answers) '
+                'VALUES ($1, 0, 0) ON CONFLICT DO NOTHING',
+                TG_ARGV[0],
+                TG_ARGV[1]
+            ) USING NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+    )
+    for table, (statistic_table, key) in STATISTIC_TABLES.items():
+        if not inspector.has_table(table):
+            # Таблицу объектов создаст автогенерация
+            continue
+        op.execute(
+            f"""
+            CREATE TRIGGER {trigger_name(table)}
+            AFTER INSERT ON {table}
+            FOR EACH ROW
+            EXECUTE FUNCTION {FUNCTION_NAME}('{statistic_table}', '{key}')
+            """,
+        )
+        if not inspector.has_table(statistic_table):
+            continue
+        op.execute(
+            f"""
+            INSERT INTO {statistic_table} (
+                {key}, total_answers, correct_answers
+            )
+            SELECT id, 0, 0 FROM {table}
+            ON CONFLICT DO NOTHING
+            """,
+        )
+        for name, expression in SORT_COLUMNS.items():
+            op.execute(
+                f'CREATE INDEX IF NOT EXISTS ix_{statistic_table}_{name} '
+                f'ON {statistic_table} ({expression}, {key})',
+            )
+
+
+def downgrade() -> None:
+    """Удаление триггеров и индексов, нулевые строки остаются."""
+    for table, (statistic_table, _) in STATISTIC_TABLES.items():
+        op.execute(
+            f'DROP TRIGGER IF EXISTS {trigger_name(table)} ON {table}',
+        )
+        for name in SORT_COLUMNS:
+            op.execute(f'DROP INDEX IF EXISTS ix_{statistic_table}_{name}')
+    op.execute(f'DROP FUNCTION IF EXISTS {FUNCTION_NAME}()')
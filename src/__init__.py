@@ -31,11 +31,13 @@ from .views import (  # noqa
 
 from .models import (  # noqa
     base,
+    broadcast,
     category,
     question,
     quiz_result,
     quiz,
     quiz_question,
+    statistic,
     telegram_user,
     user_answer,
     user,
@@ -44,6 +46,7 @@ from .models import (  # noqa
 
 from .admin import (  # noqa
     base,
+    broadcast,
     category,
     connect,
     index,
@@ -54,8 +57,8 @@ from .admin import (  # noqa
 
 from . import (  # noqa
     bot,
+    commands,
     constants,
-    api_views,
     error_handlers,
     jwt_utils,
 )
@@ -1,4 +1,6 @@
-from flask import flash
+from typing import Any
+
+from flask import flash, request
 from flask_admin import BaseView
 from flask_admin.contrib.sqla import ModelView
 from flask_jwt_extended import (
@@ -7,10 +9,16 @@ from flask_jwt_extended import (
 )
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import InstrumentedAttribute, Query
 
 from src.constants import (
+    DEFAULT_PAGE_NUMBER,
     DELETE_ERROR_MESSAGE,
+    ITEMS_PER_PAGE,
 )
+from src.crud.statistic import CRUDStatistic
+from src.pagination import KeysetPagination, keyset_paginate
+from src.view_cache import view_cache
 
 
 class BaseView(BaseView):
@@ -36,6 +44,19 @@ class CustomAdminView(ModelView):
         verify_jwt_in_request()
         return current_user.is_admin
 
+    def after_model_change(
+        self,
+        form: Any,
+        model: Any,
+        is_created: bool,
+    ) -> None:
+        """Правка в админке делает устаревшими страницы сайта."""
+        view_cache.invalidate_all()
+
+    def after_model_delete(self, model: Any) -> None:
+        """Удаление в админке делает устаревшими страницы сайта."""
+        view_cache.invalidate_all()
+
 
 class IntegrityErrorMixin:
 
@@ -49,6 +70,7 @@ class IntegrityErrorMixin:
             # Пытаемся удалить модель
             self.session.delete(model)
             self.session.commit()
+            self.after_model_delete(model)
             return True
         except IntegrityError as e:
             # Откатываем транзакцию
@@ -67,3 +89,46 @@ class NotVisibleMixin(BaseView):
     def is_visible(self) -> bool:
         """Скрывает представление из основного меню Flask-Admin."""
         return False
+
+
+class StatisticListMixin:
+
+    """Миксин списка объектов со столбцами статистики ответов."""
+
+    def paginate_with_statistic(
+        self,
+        query: Query,
+        crud: CRUDStatistic,
+        owner_id: InstrumentedAttribute,
+    ) -> KeysetPagination:
+        """Страница списка вместе со статистикой ответов.
+
+        Счетчики читаются из таблицы статистики тем же запросом,
+        что и объекты страницы. Сортировка берется из параметров
+        sort и order запроса, соседние страницы — по курсору.
+
+        Args:
+        ----
+            query (Query): Запрос списка с учетом поиска.
+            crud (CRUDStatistic): Круд таблицы статистики списка.
+            owner_id (InstrumentedAttribute): ID объекта списка.
+
+        Returns:
+        -------
+            KeysetPagination: Страница строк (объект, ответы, правильные
+            ответы, процент правильных).
+
+        """
+        sort = request.args.get('sort')
+        # Без сортировки по статистике список идет по возрастанию ID
+        descending = (
+            sort in crud.columns()
+            and request.args.get('order', 'desc') != 'asc'
+        )
+        return keyset_paginate(
+            crud.with_counts(query, owner_id),
+            crud.sort_keys(sort, owner_id),
+            page=request.args.get('page', DEFAULT_PAGE_NUMBER, type=int),
+            per_page=ITEMS_PER_PAGE,
+            descending=descending,
+        )
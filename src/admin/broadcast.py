@@ -0,0 +1,87 @@
+from typing import Any
+
+from flask import Response, flash, jsonify, redirect, request, url_for
+from flask_admin import expose
+from flask_admin.model.template import TemplateLinkRowAction
+from flask_jwt_extended import jwt_required
+from markupsafe import Markup
+
+from src.admin.base import CustomAdminView
+from src.broadcast import broadcast_runner
+from src.crud.broadcast import broadcast_crud
+from src.models.broadcast import BROADCAST_FAILED, BROADCAST_PENDING
+
+
+class BroadcastAdmin(CustomAdminView):
+
+    """Рассылки объявлений о викторинах в админ зоне."""
+
+    list_template = 'admin/broadcast_list.html'
+    can_edit = False
+
+    column_list = [
+        'text',
+        'quiz',
+        'status',
+        'progress',
+        'sent_count',
+        'failed_count',
+        'created_on',
+        'ended_on',
+    ]
+    form_columns = ['text', 'quiz']
+
+    column_labels = {
+        'text': 'Текст',
+        'quiz': 'Викторина',
+        'status': 'Статус',
+        'progress': 'Прогресс',
+        'sent_count': 'Доставлено',
+        'failed_count': 'Не доставлено',
+        'created_on': 'Дата создания',
+        'ended_on': 'Дата завершения',
+    }
+
+    column_formatters = {
+        'progress': lambda view, context, model, name: Markup(
+            f'<span data-broadcast-progress="{model.id}">'
+            f'{model.progress}</span>',
+        ),
+    }
+
+    column_extra_row_actions = [
+        TemplateLinkRowAction(
+            'broadcast_row_actions.resume_row',
+            'Продолжить рассылку',
+        ),
+    ]
+
+    def after_model_change(
+        self,
+        form: Any,
+        model: Any,
+        is_created: bool,
+    ) -> None:
+        """Запускаем рассылку после создания."""
+        if is_created and not broadcast_runner.start(model.id):
+            flash('Рассылка начнется после запуска бота', 'warning')
+
+    @expose('/resume/<int:broadcast_id>/', methods=('POST',))
+    @jwt_required()
+    def resume_view(self, broadcast_id: int) -> Response:
+        """Продолжить прерванную или ожидающую рассылку."""
+        if broadcast_runner.start(
+            broadcast_id,
+            (BROADCAST_FAILED, BROADCAST_PENDING),
+        ):
+            flash('Рассылка продолжена', 'success')
+        else:
+            flash('Бот не запущен, рассылка не продолжена', 'error')
+        return redirect(url_for('.index_view'))
+
+    @expose('/progress/')
+    @jwt_required()
+    async def progress_view(self) -> Response:
+        """Прогресс рассылок для обновления списка без перезагрузки."""
+        ids = request.args.getlist('id', type=int)
+        return jsonify(await broadcast_crud.get_progress(ids))
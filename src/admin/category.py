@@ -4,18 +4,19 @@ from flask import Response, request
 from flask_admin import BaseView, expose
 from flask_jwt_extended import jwt_required
 
-from src import app, cache
+from src import app
 from src.admin.base import (
     CustomAdminView,
     IntegrityErrorMixin,
     NotVisibleMixin,
+    StatisticListMixin,
 )
+from src.category_catalog import category_catalog
 from src.constants import (
-    DEFAULT_PAGE_NUMBER,
     ERROR_FOR_CATEGORY,
-    ITEMS_PER_PAGE,
 )
 from src.crud.category import category_crud
+from src.crud.statistic import category_statistic_crud
 from src.models.category import Category
 
 
@@ -30,22 +31,29 @@ class CategoryAdmin(IntegrityErrorMixin, CustomAdminView):
         'is_active': 'Активен',
     }
 
-    def after_model_create(self, model: Any) -> None:
-        """Удаляем кэш после создания рубрики."""
-        cache.delete('categories_view_cache')
+    def after_model_change(
+        self,
+        form: Any,
+        model: Any,
+        is_created: bool,
+    ) -> None:
+        """Выпускаем новую версию каталога рубрик."""
+        category_catalog.invalidate()
+        super().after_model_change(form, model, is_created)
         app.logger.info(
-            f'Category {model.name} has been created and cache invalidated.',
+            f'Category {model.name} has been changed and cache invalidated.',
         )
 
     def after_model_delete(self, model: Any) -> None:
-        """Удаляем кэш после удаления рубрики."""
-        cache.delete('categories_view_cache')
+        """Выпускаем новую версию каталога рубрик."""
+        category_catalog.invalidate()
+        super().after_model_delete(model)
         app.logger.info(
             f'Category {model.name} has been deleted and cache invalidated.',
         )
 
 
-class CategoryListView(BaseView):
+class CategoryListView(StatisticListMixin, BaseView):
 
     """Создание списка рубрик для статистики."""
 
@@ -53,27 +61,28 @@ class CategoryListView(BaseView):
     @jwt_required()
     def index(self) -> Response:
         """Создание списка для статистики рубрик."""
-        page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
-        per_page = ITEMS_PER_PAGE
-
         search_query = request.args.get('search', '', type=str)
         query = category_crud.get_query()
         if search_query:
             query = query.filter(Category.name.ilike(f'%{search_query}%'))
 
-        # Пагинация
-        categories = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False,
+        # Пагинация вместе со статистикой ответов
+        categories = self.paginate_with_statistic(
+            query,
+            category_statistic_crud,
+            Category.id,
         )
 
         category_data = [
             {
                 'id': category.id,
                 'name': category.name,
+                'total_answers': total_answers,
+                'correct_answers': correct_answers,
+                'correct_percentage': correct_percentage,
             }
-            for category in categories.items
+            for category, total_answers, correct_answers, correct_percentage
+            in categories.items
         ]
 
         # Передаем данные в шаблон
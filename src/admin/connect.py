@@ -3,6 +3,7 @@ from flask_admin import Admin
 from flask_babel import Babel
 
 from src import app, db
+from src.admin.broadcast import BroadcastAdmin
 from src.admin.category import (
     CategoryAdmin,
     CategoryListView,
@@ -16,6 +17,7 @@ from src.admin.question import (
 )
 from src.admin.quiz import QuizAdmin, QuizListView, QuizStatisticsView
 from src.admin.user import UserAdmin, UserListView, UserStatisticsView
+from src.models.broadcast import Broadcast
 from src.models.category import Category
 from src.models.question import Question
 from src.models.quiz import Quiz
@@ -44,6 +46,14 @@ admin.add_view(QuestionAdmin(Question, db.session, name='Вопросы'))
 admin.add_view(
     QuizAdmin(Quiz, db.session, name='Викторины', endpoint='quiz_admin'),
 )
+admin.add_view(
+    BroadcastAdmin(
+        Broadcast,
+        db.session,
+        name='Рассылки',
+        endpoint='broadcast_admin',
+    ),
+)
 
 # Добавляем представления для страниц статистик в админку
 admin.add_view(
@@ -5,25 +5,32 @@ from flask import Response, request
 from flask_admin import BaseView, expose
 from flask_jwt_extended import jwt_required
 from flask_wtf.file import FileAllowed, FileField, FileStorage, ValidationError
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
+from src import db
 from src.admin.base import (
     CustomAdminView,
     IntegrityErrorMixin,
     NotVisibleMixin,
+    StatisticListMixin,
 )
+from src.category_catalog import category_catalog
 from src.constants import (
     CAN_ONLY_BE_ONE_CORRECT_ANSWER,
-    DEFAULT_PAGE_NUMBER,
     ERROR_FOR_QUESTION,
-    ITEMS_PER_PAGE,
     ONE_ANSWER_VARIANT,
     ONE_CORRECT_ANSWER,
     UNIQUE_VARIANT,
 )
 from src.crud.question import question_crud
+from src.crud.statistic import (
+    move_question_statistic,
+    question_statistic_crud,
+)
 from src.models.question import Question
 from src.models.variant import Variant
+from src.quiz_snapshot import quiz_snapshots
 
 
 class QuestionAdmin(IntegrityErrorMixin, CustomAdminView):
@@ -126,9 +133,47 @@ class QuestionAdmin(IntegrityErrorMixin, CustomAdminView):
         if len(correct_answers) == 0:
             raise ValueError(ONE_CORRECT_ANSWER)
 
+        self.move_statistics(model, is_created)
+
         # Вызов родительского метода для сохранения изменений
         super(QuestionAdmin, self).on_model_change(form, model, is_created)
 
+    @staticmethod
+    def move_statistics(model: Question, is_created: bool) -> None:
+        """Перенести статистику вопроса, если изменилась его рубрика."""
+        if is_created:
+            return
+        # Рубрика из базы, а не из еще не сохраненной формы
+        with db.session.no_autoflush:
+            old_category_id = db.session.scalar(
+                select(Question.category_id).where(Question.id == model.id),
+            )
+        if model.category is not None and (
+            model.category.id != old_category_id
+        ):
+            move_question_statistic(
+                model.id,
+                old_category_id,
+                model.category.id,
+            )
+
+    def after_model_change(
+        self,
+        form: Any,
+        model: Any,
+        is_created: bool,
+    ) -> None:
+        """Выпускаем новые версии снимков викторин и каталога рубрик."""
+        for quiz in model.quizzes:
+            quiz_snapshots.invalidate(quiz.id)
+        category_catalog.invalidate()
+        super().after_model_change(form, model, is_created)
+
+    def after_model_delete(self, model: Any) -> None:
+        """Выпускаем новую версию каталога рубрик."""
+        category_catalog.invalidate()
+        super().after_model_delete(model)
+
     def is_duplicate_variant(self, variant: Variant) -> bool:
         """Проверка на дублирующиеся варианты по полям question_id и title.
 
@@ -153,7 +198,7 @@ class QuestionAdmin(IntegrityErrorMixin, CustomAdminView):
         return False
 
 
-class QuestionListView(BaseView):
+class QuestionListView(StatisticListMixin, BaseView):
 
     """Создание списка для статистики."""
 
@@ -161,27 +206,28 @@ class QuestionListView(BaseView):
     @jwt_required()
     def index(self) -> Response:
         """Создание списка для статистики."""
-        page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
-        per_page = ITEMS_PER_PAGE
-
         search_query = request.args.get('search', '', type=str)
         query = Question.query
         if search_query:
             query = query.filter(Question.title.ilike(f'%{search_query}%'))
 
-        # Пагинация
-        questions = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False,
+        # Пагинация вместе со статистикой ответов
+        questions = self.paginate_with_statistic(
+            query,
+            question_statistic_crud,
+            Question.id,
         )
 
         question_data = [
             {
                 'id': question.id,
                 'title': question.title,
+                'total_answers': total_answers,
+                'correct_answers': correct_answers,
+                'correct_percentage': correct_percentage,
             }
-            for question in questions.items
+            for question, total_answers, correct_answers, correct_percentage
+            in questions.items
         ]
 
         # Передаем данные в шаблон
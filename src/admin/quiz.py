@@ -1,71 +1,98 @@
 from typing import Any
 
-from flask import Response, abort, redirect, request, url_for
+from flask import (
+    Response,
+    abort,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 from flask_admin import BaseView, expose
 from flask_admin.model.template import LinkRowAction
 from flask_jwt_extended import jwt_required
 from markupsafe import Markup
-from wtforms import ValidationError
-from wtforms.ext.sqlalchemy.fields import QuerySelectMultipleField
+from sqlalchemy import select, true
+from wtforms import Field, ValidationError
 
+from src import db
 from src.admin.base import (
     CustomAdminView,
     IntegrityErrorMixin,
     NotVisibleMixin,
+    StatisticListMixin,
 )
+from src.category_catalog import category_catalog
 from src.constants import (
     AT_LEAST_ONE_QUESTION,
-    DEFAULT_PAGE_NUMBER,
     ERROR_FOR_QUIZ,
-    ITEMS_PER_PAGE,
+    INVALID_QUESTION_CHOICE,
+    QUESTION_PICKER_PAGE_SIZE,
 )
+from src.crud.question import question_crud
 from src.crud.quiz import quiz_crud
+from src.crud.statistic import quiz_statistic_crud
 from src.models.category import Category
-from src.models.question import Question
 from src.models.quiz import Quiz
+from src.quiz_snapshot import quiz_snapshots
+
+
+class QuestionPickerWidget:
 
+    """Виджет выбора вопросов викторины с поиском на сервере.
 
-class GroupedListWidget(object):
+    Форма содержит только выбранные вопросы, остальные ищутся
+    по названию и рубрике постранично через QuizAdmin.question_search.
 
-    """Кастомный виджет для отображения вопросов по рубрикам."""
+    """
 
     def __call__(self, field: Any, **kwargs: Any) -> Markup:
         """Срабатывает при вызове класса."""
-        html = []
-        categories = Category.query.filter(Category.is_active).all()
-
-        for category in categories:
-            html.append(f'<div><strong>{category.name}</strong></div>')
-            html.append('<ul style="list-style-type:none;">')
+        categories = db.session.execute(
+            select(Category.id, Category.name)
+            .where(Category.is_active == true())
+            .order_by(Category.name),
+        ).all()
+        return Markup(
+            render_template(
+                'admin/question_picker.html',
+                field=field,
+                selected=field.data or [],
+                categories=categories,
+                search_url=url_for('.question_search'),
+            ),
+        )
 
-            for question in category.questions:
-                if question.is_active:
-                    checked = "checked" if question in field.data else ""
-                    html.append(
-                        '<li>'
-                        '<label>'
-                        f'<input type="checkbox" name="{field.name}" '
-                        f'value="{question.id}" {checked}> {question.title}'
-                        '</label>'
-                        '</li>',
-                    )
 
-            html.append('</ul>')
+class QuestionPickerField(Field):
 
-        return Markup("".join(html))
+    """Поле выбора вопросов викторины по ID."""
 
+    widget = QuestionPickerWidget()
 
-class GroupedQuerySelectMultipleField(QuerySelectMultipleField):
+    def process_formdata(self, valuelist: list[str]) -> None:
+        """Загрузить выбранные вопросы одним запросом.
 
-    """Класс для создания формы выбора вопросов при создании викторины."""
+        Повторные ID отбрасываются, порядок выбора сохраняется.
 
-    def __init__(
-            self, label: Any = '', validators: Any = None, **kwargs: Any,
-    ) -> None:
-        """Пререопределяем инит класса для использования своего виджета."""
-        super().__init__(label, validators, **kwargs)
-        self.widget = GroupedListWidget()  # Используем наш кастомный виджет
-        self.query_factory = lambda: Question.query.all()
+        """
+        try:
+            ids = list(dict.fromkeys(int(value) for value in valuelist))
+        except ValueError:
+            self.data = []
+            raise ValueError(INVALID_QUESTION_CHOICE)
+        questions = {
+            question.id: question
+            for question in (question_crud.get_by_ids(ids) if ids else ())
+        }
+        self.data = [
+            questions[question_id]
+            for question_id in ids
+            if question_id in questions
+        ]
+        if len(questions) != len(ids):
+            raise ValueError(INVALID_QUESTION_CHOICE)
 
 
 class QuizAdmin(IntegrityErrorMixin, CustomAdminView):
@@ -86,9 +113,7 @@ class QuizAdmin(IntegrityErrorMixin, CustomAdminView):
     }
 
     form_extra_fields = {
-        'questions': GroupedQuerySelectMultipleField(
-            'Вопросы',
-        ),
+        'questions': QuestionPickerField('Вопросы'),
     }
 
     column_extra_row_actions = [
@@ -114,13 +139,59 @@ class QuizAdmin(IntegrityErrorMixin, CustomAdminView):
             ),
         )
 
+    @expose('/questions/')
+    @jwt_required()
+    async def question_search(self) -> Response:
+        """Страница поиска вопросов для выбора в викторину, JSON.
+
+        Параметры: q — часть названия, category_id — рубрика, after —
+        ID последнего вопроса предыдущей страницы. В ответе after для
+        следующей страницы или null.
+
+        """
+        rows = await question_crud.search(
+            title=request.args.get('q', '', type=str).strip(),
+            category_id=request.args.get('category_id', type=int),
+            after=request.args.get('after', 0, type=int),
+        )
+        questions = rows[:QUESTION_PICKER_PAGE_SIZE]
+        return jsonify(
+            items=[
+                {
+                    'id': question.id,
+                    'title': question.title,
+                    'category': question.category,
+                }
+                for question in questions
+            ],
+            after=questions[-1].id if len(rows) > len(questions) else None,
+        )
+
     def on_model_change(self, form: Any, model: Any, is_created: bool) -> None:
         """Проверка на выбор хотя бы одного вопроса для викторины."""
         if not model.questions:
             raise ValidationError(AT_LEAST_ONE_QUESTION)
 
+    def after_model_change(
+        self,
+        form: Any,
+        model: Any,
+        is_created: bool,
+    ) -> None:
+        """Нумеруем новые вопросы и выпускаем новые версии снимков."""
+        quiz_crud.renumber_questions(model.id)
+        quiz_snapshots.invalidate(model.id)
+        category_catalog.invalidate()
+        super().after_model_change(form, model, is_created)
 
-class QuizListView(BaseView):
+    def after_model_delete(self, model: Any) -> None:
+        """Снимок удаленной викторины больше не используется."""
+        quiz_snapshots.invalidate(model.id)
+        category_catalog.invalidate()
+        super().after_model_delete(model)
+
+
+class QuizListView(StatisticListMixin, BaseView):
 
     """Создание списка викторин для статистики."""
 
@@ -128,23 +199,28 @@ class QuizListView(BaseView):
     @jwt_required()
     def index(self) -> Response:
         """Создание списка для статистики викторин."""
-        page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
-        per_page = ITEMS_PER_PAGE
-
         search_query = request.args.get('search', '', type=str)
         query = Quiz.query
         if search_query:
             query = query.filter(Quiz.title.ilike(f'%{search_query}%'))
 
-        # Пагинация
-        quizzes = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Пагинация вместе со статистикой ответов
+        quizzes = self.paginate_with_statistic(
+            query,
+            quiz_statistic_crud,
+            Quiz.id,
+        )
 
         quiz_data = [
             {
                 'id': quiz.id,
                 'title': quiz.title,
+                'total_answers': total_answers,
+                'correct_answers': correct_answers,
+                'correct_percentage': correct_percentage,
             }
-            for quiz in quizzes.items
+            for quiz, total_answers, correct_answers, correct_percentage
+            in quizzes.items
         ]
 
         # Передаем данные в шаблон
@@ -3,19 +3,23 @@ from typing import Any
 from flask import Response, request
 from flask_admin import BaseView, expose
 from flask_jwt_extended import jwt_required
+from sqlalchemy import or_
 
 from src import app, cache
-from src.admin.base import CustomAdminView, NotVisibleMixin
+from src.admin.base import (
+    CustomAdminView,
+    NotVisibleMixin,
+    StatisticListMixin,
+)
 from src.constants import (
-    DEFAULT_PAGE_NUMBER,
     HTTP_NOT_FOUND,
-    ITEMS_PER_PAGE,
     USER_NOT_FOUND_MESSAGE,
 )
 from src.crud.quiz_result import quiz_result_crud
-from src.crud.user_answer import user_answer_crud
+from src.crud.statistic import telegram_user_statistic_crud
+from src.known_users import known_users
 from src.models.telegram_user import TelegramUser
-from src.models.user import User
+from src.view_cache import view_cache
 
 
 class UserAdmin(CustomAdminView):
@@ -45,6 +49,8 @@ class UserAdmin(CustomAdminView):
     def after_model_delete(self, model: Any) -> None:
         """Удаляем кэш в след за моделью."""
         cache.delete(f'user_{model.id}')
+        view_cache.invalidate_user(model.id)
+        known_users.discard(model.telegram_id)
         app.logger.info(
             f'User {model.username} has been deleted and cache invalidated.',
         )
@@ -56,6 +62,7 @@ class UserAdmin(CustomAdminView):
         is_created: bool,
     ) -> None:
         """Удаляем кэш после изменений."""
+        view_cache.invalidate_user(model.id)
         if not model.is_active:
             cache.delete(f'user_{model.id}')
             app.logger.info(
@@ -65,7 +72,7 @@ class UserAdmin(CustomAdminView):
             cache.set(f'user_{model.id}', model, timeout=60 * 60)
 
 
-class UserListView(BaseView):
+class UserListView(StatisticListMixin, BaseView):
 
     """Представление для статистики всех пользователей."""
 
@@ -73,16 +80,24 @@ class UserListView(BaseView):
     @jwt_required()
     def index(self) -> Response:
         """Создание списка для статистики пользователей."""
-        page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
-        per_page = ITEMS_PER_PAGE
-
         search_query = request.args.get('search', '', type=str)
         query = TelegramUser.query
         if search_query:
-            query = query.filter(User.name.ilike(f'%{search_query}%'))
+            pattern = f'%{search_query}%'
+            query = query.filter(
+                or_(
+                    TelegramUser.first_name.ilike(pattern),
+                    TelegramUser.last_name.ilike(pattern),
+                    TelegramUser.username.ilike(pattern),
+                ),
+            )
 
-        # Пагинация
-        users = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Пагинация вместе со статистикой ответов
+        users = self.paginate_with_statistic(
+            query,
+            telegram_user_statistic_crud,
+            TelegramUser.id,
+        )
 
         user_data = [
             {
@@ -90,8 +105,12 @@ class UserListView(BaseView):
                 'name': user.name,
                 'telegram_id': user.telegram_id,
                 'created_on': user.created_on,
+                'total_answers': total_answers,
+                'correct_answers': correct_answers,
+                'correct_percentage': correct_percentage,
             }
-            for user in users.items
+            for user, total_answers, correct_answers, correct_percentage
+            in users.items
         ]
 
         return self.render(
@@ -120,14 +139,10 @@ class UserStatisticsView(NotVisibleMixin):
             user_id=user.id,
             tg_user=True,
         )
-        user_answers = await user_answer_crud.get_results_by_user(
-            user_id=user.id,
-            tg_user=True,
-        )
-        total_questions_answered = len(user_answers)
-        total_correct_answers = sum(
-            1 for answer in user_answers if answer.is_right
-        )
+        (
+            total_questions_answered,
+            total_correct_answers,
+        ) = await telegram_user_statistic_crud.get_counts(user.id)
         correct_percentage = (
             (total_correct_answers / total_questions_answered * 100)
             if total_questions_answered > 0
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from . import app
+from .redis_client import redis_client, redis_key
+from .settings import settings
+
+# Пауза между проверками ответа, который обрабатывает другой запрос
+POLL_INTERVAL = 0.05
+# Ограничение длины ключа, присланного клиентом
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+
+class IdempotencyConflict(Exception):
+
+    """Ключ уже использован для другого ответа или еще обрабатывается."""
+
+
+class AnswerIdempotency:
+
+    """Идемпотентная отправка ответов по ключу клиента.
+
+    Страница вопроса выдает форме одноразовый ключ. Первый запрос
+    с ключом занимает его через SET NX и после сохранения ответа
+    записывает под ним данные страницы результата. Повторы (ретраи
+    Web App, двойное нажатие) получают эти данные из Redis, не
+    обращаясь к базе. Повтор с тем же ключом, но другим ответом —
+    конфликт. При недоступности Redis ответ обрабатывается как новый.
+
+    """
+
+    def __init__(self, ttl: int, wait_timeout: float) -> None:
+        """Настраиваем TTL ключей и время ожидания параллельного запроса."""
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.replayed = 0
+        self.conflicts = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def _key(user_id: int, idempotency_key: str) -> str:
+        """Ключ Redis для ответа пользователя."""
+        return redis_key('answer', user_id, idempotency_key)
+
+    async def claim(
+        self,
+        user_id: int,
+        idempotency_key: str,
+        fingerprint: str,
+    ) -> Optional[dict]:
+        """Занять ключ или получить сохраненный результат.
+
+        Returns
+        -------
+        Optional[dict]
+            None, если запрос первый и ответ нужно сохранить,
+            иначе данные страницы результата первого запроса.
+
+        Raises
+        ------
+        IdempotencyConflict
+            Ключ использован для другого ответа, или первый запрос
+            не завершился за wait_timeout секунд.
+
+        """
+        key = self._key(user_id, idempotency_key)
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while True:
+                if redis_client.set(
+                    key,
+                    json.dumps({'fingerprint': fingerprint}),
+                    nx=True,
+                    ex=self.ttl,
+                ):
+                    return None
+                value = redis_client.get(key)
+                if value is not None:
+                    entry = json.loads(value)
+                    if entry['fingerprint'] != fingerprint:
+                        self.conflicts += 1
+                        raise IdempotencyConflict(idempotency_key)
+                    if 'result' in entry:
+                        self.replayed += 1
+                        return entry['result']
+                if time.monotonic() >= deadline:
+                    self.conflicts += 1
+                    raise IdempotencyConflict(idempotency_key)
+                await asyncio.sleep(POLL_INTERVAL)
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Ответ без проверки идемпотентности: {error}')
+            return None
+
+    def complete(
+        self,
+        user_id: int,
+        idempotency_key: str,
+        fingerprint: str,
+        result: dict,
+    ) -> None:
+        """Сохранить данные страницы результата для повторов."""
+        try:
+            redis_client.set(
+                self._key(user_id, idempotency_key),
+                json.dumps({'fingerprint': fingerprint, 'result': result}),
+                ex=self.ttl,
+            )
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Не удалось сохранить результат: {error}')
+
+    def release(self, user_id: int, idempotency_key: str) -> None:
+        """Освободить ключ после ошибки, чтобы повтор был обработан."""
+        try:
+            redis_client.delete(self._key(user_id, idempotency_key))
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Не удалось освободить ключ ответа: {error}')
+
+
+answer_idempotency = AnswerIdempotency(
+    ttl=settings.ANSWER_IDEMPOTENCY_TTL,
+    wait_timeout=settings.ANSWER_IDEMPOTENCY_WAIT,
+)
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from asgiref.wsgi import WsgiToAsgi
+
+from . import app, bot, native_views  # noqa
+from .broadcast import broadcast_runner
+from .database import dispose_async_engine, init_async_engine
+from .leader import leader
+from .outbound import outbound_limiter
+from .router import ASGIApp, Receive, Scope, Send, router
+from .settings import settings
+from .update_lanes import lane_scheduler
+from .update_queue import update_queue
+
+
+class LifespanMiddleware:
+
+    """Запуск и остановка фоновых задач бота по событиям lifespan.
+
+    Каждый воркер uvicorn выполняет старт и остановку в своем цикле
+    событий. Остальные запросы передаются приложению без изменений.
+
+    """
+
+    def __init__(
+        self,
+        application: ASGIApp,
+        on_startup: Callable[[], Awaitable[None]],
+        on_shutdown: Callable[[], Awaitable[None]],
+    ) -> None:
+        """Оборачиваем ASGI приложение."""
+        self.application = application
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Обработать событие lifespan или передать запрос дальше."""
+        if scope['type'] != 'lifespan':
+            await self.application(scope, receive, send)
+            return
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.on_startup()
+                except Exception as error:
+                    app.logger.exception('Ошибка запуска бота')
+                    await send(
+                        {
+                            'type': 'lifespan.startup.failed',
+                            'message': str(error),
+                        },
+                    )
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.on_shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+@leader.on_elected
+async def register_webhook() -> None:
+    """Регистрирует вебхук только ведущий процесс."""
+    # Закомментировать, если нет ТГ токена
+    await bot.register_webhook()
+
+
+@leader.on_elected
+async def resume_broadcasts() -> None:
+    """Прерванные рассылки продолжает только ведущий процесс."""
+    with app.app_context():
+        await broadcast_runner.resume_unfinished()
+
+
+async def startup() -> None:
+    """Стартуем обработку обновлений и выбор ведущего."""
+    init_async_engine()
+    await lane_scheduler.start()
+    await update_queue.start()
+    broadcast_runner.attach(asyncio.get_running_loop())
+    outbound_limiter.attach(asyncio.get_running_loop())
+    await leader.start()
+    app.logger.info('Бот запущен')
+
+
+async def shutdown() -> None:
+    """Дорабатываем принятые обновления перед остановкой."""
+    # Прерванные рассылки продолжатся при следующем старте
+    await broadcast_runner.stop()
+    await leader.stop()
+    await update_queue.drain(settings.WEBHOOK_DRAIN_TIMEOUT)
+    await lane_scheduler.drain(settings.WEBHOOK_DRAIN_TIMEOUT)
+    await bot.bot.session.close()
+    await bot.dp.fsm.events_isolation.close()
+    await bot.dp.storage.close()
+    await dispose_async_engine()
+
+
+# Нативные маршруты обслуживаются на цикле uvicorn, остальное — flask
+router.mount(WsgiToAsgi(app))
+application = LifespanMiddleware(router, startup, shutdown)
@@ -1,31 +1,116 @@
 import emoji
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
+from aiogram.fsm.storage.memory import DisabledEventIsolation
+from aiogram.fsm.storage.redis import (
+    DefaultKeyBuilder,
+    RedisEventIsolation,
+    RedisStorage,
+)
 from aiogram.types import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
     KeyboardButton,
     Message,
     ReplyKeyboardMarkup,
+    Update,
     WebAppInfo,
 )
 
 from . import app
 from .constants import BAN_WARN_MESSAGE
-from .crud.telegram_user import telegram_user_crud
-from .crud.user import user_crud
+from .crud.user import async_user_crud
+from .known_users import known_users
+from .outbound import rate_limit_middleware
+from .redis_client import LoopBoundRedis, async_redis_client, redis_key
 from .settings import settings
 
+# Все исходящие запросы идут через общий пул соединений
+# и ограничитель темпа отправки
+session = AiohttpSession(
+    api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL),
+    limit=settings.TELEGRAM_POOL_SIZE,
+)
+session.middleware(rate_limit_middleware)
+
 bot: Bot = Bot(
     token=settings.TELEGRAM_TOKEN,
+    session=session,
     default=DefaultBotProperties(parse_mode=ParseMode.HTML),
 )
 
 
+# Состояния диалогов хранятся в Redis, поэтому пользователь может
+# попасть в любой экземпляр бэкенда. Блокировка по пользователю
+# не дает двум процессам одновременно обрабатывать его обновления.
+fsm_key_builder = DefaultKeyBuilder(
+    prefix=redis_key('fsm'),
+    with_bot_id=True,
+    with_destiny=True,
+)
+
+
+def create_dispatcher(
+    redis: LoopBoundRedis = async_redis_client,
+) -> Dispatcher:
+    """Диспетчер с состояниями в Redis.
+
+    Так же собирается диспетчер каждого экземпляра бэкенда, поэтому
+    экземпляры согласованно работают с состояниями одних и тех же
+    пользователей.
+
+    """
+    return Dispatcher(
+        storage=RedisStorage(
+            redis,
+            key_builder=fsm_key_builder,
+            state_ttl=settings.FSM_STATE_TTL or None,
+            data_ttl=settings.FSM_DATA_TTL or None,
+        ),
+        events_isolation=(
+            RedisEventIsolation(redis, key_builder=fsm_key_builder)
+            if settings.FSM_EVENT_ISOLATION
+            else DisabledEventIsolation()
+        ),
+    )
+
+
 # Диспетчер
-dp: Dispatcher = Dispatcher()
+dp: Dispatcher = create_dispatcher()
+
+
+async def feed_update(update: Update) -> None:
+    """Передать обновление в диспетчер бота."""
+    await dp.feed_update(bot, update)
+
+
+async def register_webhook() -> None:
+    """Зарегистрировать вебхук, если его настройки изменились.
+
+    Повторная регистрация с теми же настройками не нужна, а с
+    drop_pending_updates она выбросила бы накопившиеся обновления.
+
+    """
+    allowed_updates = dp.resolve_used_update_types()
+    info = await bot.get_webhook_info()
+    if (
+        info.url == settings.WEBHOOK_URL
+        and info.max_connections == settings.WEBHOOK_MAX_CONNECTIONS
+        and sorted(info.allowed_updates or []) == sorted(allowed_updates)
+    ):
+        app.logger.info('Вебхук уже зарегистрирован')
+        return
+    await bot.set_webhook(
+        url=settings.WEBHOOK_URL,
+        allowed_updates=allowed_updates,
+        max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+        drop_pending_updates=settings.WEBHOOK_DROP_PENDING,
+    )
+    app.logger.info('Вебхук зарегистрирован')
 
 
 def create_reply_keyboard() -> ReplyKeyboardMarkup:
@@ -55,47 +140,30 @@ async def cmd_start(message: Message) -> None:
 
     """
     tg_user = message.from_user
-    tg_user_id = tg_user.id
-    user = await user_crud.get_by_telegram_id(tg_user_id)
-    if user is None:
-        name = tg_user.full_name
-        username = tg_user.username
-        tg_user_id = tg_user.id
-        is_admin = (await user_crud.get_multi()) == []
-        await user_crud.create(
+    # Повторный /start от известного пользователя не трогает базу
+    if not (await known_users.contains(tg_user.id)):
+        created = await async_user_crud.register(
             {
-                'name': name,
-                'username': username,
-                'telegram_id': tg_user_id,
-                'is_admin': is_admin,
+                'name': tg_user.full_name,
+                'username': tg_user.username,
+                'telegram_id': tg_user.id,
             },
-        )
-        app.logger.info(
-            f'Пользователь {name} ({username}) зарегистрирован в боте.',
-        )
-
-    if not (await telegram_user_crud.exists_by_telegram_id(tg_user.id)):
-        username = tg_user.username
-        first_name = tg_user.first_name
-        last_name = tg_user.last_name
-        is_premium = tg_user.is_premium
-        added_to_attachment_menu = tg_user.added_to_attachment_menu
-        language_code = tg_user.language_code
-
-        await telegram_user_crud.create(
             {
-                'telegram_id': tg_user_id,
-                'first_name': first_name,
-                'last_name': last_name,
-                'username': username,
-                'language_code': language_code,
-                'is_premium': is_premium,
-                'added_to_attachment_menu': added_to_attachment_menu,
+                'telegram_id': tg_user.id,
+                'first_name': tg_user.first_name,
+                'last_name': tg_user.last_name,
+                'username': tg_user.username,
+                'language_code': tg_user.language_code,
+                'is_premium': tg_user.is_premium,
+                'added_to_attachment_menu': tg_user.added_to_attachment_menu,
             },
         )
-        app.logger.info(
-            f'Пользователь {tg_user_id} зарегистрирован в TelegramUser.',
-        )
+        if created:
+            app.logger.info(
+                f'Пользователь {tg_user.full_name} ({tg_user.username}) '
+                'зарегистрирован в боте.',
+            )
+        await known_users.add(tg_user.id)
 
     # Отправляем приветственное сообщение с кнопкой 'Start'
     await message.answer(
@@ -117,7 +185,7 @@ async def on_start_button(message: Message) -> None:
         message (Message): Входящее сообщение.
 
     """
-    user = await user_crud.get_by_telegram_id(message.from_user.id)
+    user = await async_user_crud.get_by_telegram_id(message.from_user.id)
     if user is None or not user.is_active:
         # Уведомляем пользователя о бане или повторной регистрации
         await message.answer(
@@ -0,0 +1,228 @@
+import asyncio
+from contextlib import aclosing
+from datetime import datetime
+from typing import Optional, Sequence
+
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    WebAppInfo,
+)
+from redis.asyncio.lock import Lock as AsyncLock
+from redis.exceptions import LockError
+from sqlalchemy import Row
+
+from . import app
+from .bot import bot
+from .crud.broadcast import async_broadcast_crud
+from .models.broadcast import (
+    BROADCAST_FAILED,
+    BROADCAST_FINISHED,
+    BROADCAST_PENDING,
+    BROADCAST_RUNNING,
+    Broadcast,
+)
+from .outbound import PRIORITY_LOW, outbound_priority
+from .redis_client import async_redis_client, redis_key
+from .settings import settings
+
+# Время жизни блокировки рассылки в секундах, продлевается после
+# каждой пачки. Блокировка не дает двум процессам вести одну рассылку.
+BROADCAST_LOCK_TTL = 60
+
+
+class BroadcastRunner:
+
+    """Исполнитель рассылок.
+
+    Рассылки выполняются задачами на основном цикле событий сервера
+    и работают с базой только через асинхронную сессию, чтобы не
+    блокировать цикл. Получатели читаются серверным курсором,
+    сообщения уходят через
+    ограничитель исходящих запросов с низким приоритетом, а статусы
+    и контрольная точка сохраняются после каждой пачки. После сбоя
+    рассылка продолжается с контрольной точки: повторно может уйти
+    не больше одной незаписанной пачки.
+
+    """
+
+    def __init__(self, batch_size: int) -> None:
+        """Цикл событий подключается в attach() при старте сервера."""
+        self.batch_size = batch_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Запоминаем цикл событий сервера."""
+        self._loop = loop
+
+    def start(
+        self,
+        broadcast_id: int,
+        statuses: Sequence[str] = (BROADCAST_PENDING,),
+    ) -> bool:
+        """Запустить рассылку. Можно вызывать из потока flask.
+
+        Returns
+        -------
+        bool
+            False, если сервер бота не запущен в этом процессе.
+            Рассылка останется в ожидании.
+
+        """
+        if self._loop is None:
+            app.logger.warning(
+                f'Рассылка {broadcast_id} не запущена: нет цикла событий',
+            )
+            return False
+        self._loop.call_soon_threadsafe(self._spawn, broadcast_id, statuses)
+        return True
+
+    async def resume_unfinished(self) -> None:
+        """Продолжить рассылки, прерванные остановкой сервера."""
+        for broadcast_id in await async_broadcast_crud.get_ids_by_status(
+            BROADCAST_RUNNING,
+        ):
+            app.logger.info(f'Продолжаем рассылку {broadcast_id}')
+            self._spawn(broadcast_id, (BROADCAST_RUNNING,))
+
+    async def stop(self) -> None:
+        """Остановить рассылки, они продолжатся при следующем старте."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn(self, broadcast_id: int, statuses: Sequence[str]) -> None:
+        """Создать задачу рассылки, если она еще не выполняется."""
+        if broadcast_id in self._tasks:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._run(broadcast_id, statuses),
+            name=f'broadcast-{broadcast_id}',
+        )
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(
+            lambda _: self._tasks.pop(broadcast_id, None),
+        )
+
+    async def _run(self, broadcast_id: int, statuses: Sequence[str]) -> None:
+        """Выполнить рассылку с контрольной точки."""
+        # Рассылка не должна задерживать ответы пользователям
+        outbound_priority.set(PRIORITY_LOW)
+        lock = async_redis_client.lock(
+            redis_key('broadcast', broadcast_id),
+            timeout=BROADCAST_LOCK_TTL,
+            blocking=False,
+        )
+        if not await lock.acquire():
+            app.logger.info(
+                f'Рассылка {broadcast_id} уже идет в другом процессе',
+            )
+            return
+        try:
+            with app.app_context():
+                await self._deliver(broadcast_id, statuses, lock)
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                pass
+
+    async def _deliver(
+        self,
+        broadcast_id: int,
+        statuses: Sequence[str],
+        lock: AsyncLock,
+    ) -> None:
+        """Отправить рассылку пачками, продлевая блокировку."""
+        if not await async_broadcast_crud.claim(broadcast_id, statuses):
+            return
+        broadcast = await async_broadcast_crud.get(broadcast_id)
+        if not broadcast.total:
+            await async_broadcast_crud.update(
+                broadcast,
+                {'total': await async_broadcast_crud.count_recipients()},
+            )
+        markup = self._markup(broadcast.quiz_id)
+        app.logger.info(
+            f'Рассылка {broadcast_id} начата с получателя '
+            f'{broadcast.last_recipient_id}',
+        )
+        stream = async_broadcast_crud.stream_recipients(
+            broadcast.last_recipient_id,
+            self.batch_size,
+        )
+        try:
+            async with aclosing(stream) as batches:
+                async for recipients in batches:
+                    deliveries = await asyncio.gather(
+                        *(
+                            self._send(broadcast, recipient, markup)
+                            for recipient in recipients
+                        ),
+                    )
+                    await async_broadcast_crud.save_progress(
+                        broadcast_id,
+                        deliveries,
+                    )
+                    await lock.reacquire()
+        except Exception:
+            app.logger.exception(f'Рассылка {broadcast_id} прервана')
+            await self._finish(broadcast_id, BROADCAST_FAILED)
+            return
+        await self._finish(broadcast_id, BROADCAST_FINISHED)
+        app.logger.info(f'Рассылка {broadcast_id} завершена')
+
+    async def _send(
+        self,
+        broadcast: Broadcast,
+        recipient: Row,
+        markup: InlineKeyboardMarkup,
+    ) -> dict:
+        """Отправить сообщение получателю и вернуть статус доставки."""
+        delivery = {
+            'broadcast_id': broadcast.id,
+            'tg_user_id': recipient.id,
+            'is_delivered': True,
+            'error': None,
+        }
+        try:
+            await bot.send_message(
+                recipient.telegram_id,
+                broadcast.text,
+                reply_markup=markup,
+            )
+        except TelegramAPIError as error:
+            delivery['is_delivered'] = False
+            delivery['error'] = str(error)[:255]
+        return delivery
+
+    async def _finish(self, broadcast_id: int, status: str) -> None:
+        """Записать итоговый статус рассылки."""
+        broadcast = await async_broadcast_crud.get(broadcast_id)
+        await async_broadcast_crud.update(
+            broadcast,
+            {'status': status, 'ended_on': datetime.utcnow()},
+        )
+
+    @staticmethod
+    def _markup(quiz_id: Optional[int]) -> InlineKeyboardMarkup:
+        """Кнопка открытия викторины в WebApp."""
+        url = settings.WEB_URL
+        if quiz_id:
+            url = f'{url}/{quiz_id}/'
+        return InlineKeyboardMarkup(
+            inline_keyboard=[
+                [
+                    InlineKeyboardButton(
+                        text='Викторина',
+                        web_app=WebAppInfo(url=url),
+                    ),
+                ],
+            ],
+        )
+
+
+broadcast_runner = BroadcastRunner(batch_size=settings.BROADCAST_BATCH_SIZE)
@@ -0,0 +1,159 @@
+from typing import Optional
+
+import msgspec
+from redis.exceptions import RedisError
+
+from . import app
+from .crud.category import category_crud
+from .redis_client import redis_client, redis_key
+from .settings import settings
+
+
+class CategoryQuiz(msgspec.Struct, frozen=True):
+
+    """Викторина с вопросами рубрики."""
+
+    id: int
+    title: str
+
+
+class CategorySummary(msgspec.Struct, frozen=True):
+
+    """Рубрика в каталоге."""
+
+    id: int
+    name: str
+    # Число активных вопросов рубрики
+    question_count: int
+    # Активные викторины с активными вопросами рубрики, по названию
+    quizzes: tuple[CategoryQuiz, ...]
+
+    @property
+    def quiz_count(self) -> int:
+        """Число викторин рубрики."""
+        return len(self.quizzes)
+
+
+class CategoryCatalog(msgspec.Struct, frozen=True):
+
+    """Неизменяемый каталог рубрик определенной версии."""
+
+    version: int
+    # Активные рубрики по названию
+    categories: tuple[CategorySummary, ...]
+
+
+class CompiledCategoryCatalog:
+
+    """Каталог рубрик с индексом для поиска рубрики за O(1)."""
+
+    def __init__(self, catalog: CategoryCatalog) -> None:
+        """Строим индекс рубрик."""
+        self.catalog = catalog
+        self.by_id = {category.id: category for category in catalog.categories}
+
+    @property
+    def version(self) -> int:
+        """Версия каталога."""
+        return self.catalog.version
+
+    @property
+    def categories(self) -> tuple[CategorySummary, ...]:
+        """Рубрики каталога."""
+        return self.catalog.categories
+
+    def get(self, category_id: int) -> Optional[CategorySummary]:
+        """Рубрика по ID или None, если ее нет в каталоге."""
+        return self.by_id.get(category_id)
+
+
+class CategoryCatalogCache:
+
+    """Кэш каталога рубрик для просмотра викторин по рубрикам.
+
+    Каталог собирается из базы один раз на версию, хранится в Redis
+    в msgpack и в памяти процесса, поэтому запрос страницы рубрик
+    читает только версию из Redis. Версия — счетчик в Redis, его
+    увеличивает админка при изменении рубрик, вопросов и викторин.
+    При недоступности Redis каталог собирается из базы на каждый
+    запрос.
+
+    """
+
+    def __init__(self, ttl: int) -> None:
+        """Настраиваем TTL каталога в Redis."""
+        self.ttl = ttl
+        self._local: Optional[CompiledCategoryCatalog] = None
+        self._encoder = msgspec.msgpack.Encoder()
+        self._decoder = msgspec.msgpack.Decoder(CategoryCatalog)
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.builds = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def version_key() -> str:
+        """Ключ Redis с версией каталога."""
+        return redis_key('category_catalog_version')
+
+    async def get(self) -> CompiledCategoryCatalog:
+        """Каталог рубрик текущей версии."""
+        try:
+            version = int(redis_client.get(self.version_key()) or 0)
+            if self._local is not None and self._local.version == version:
+                self.local_hits += 1
+                return self._local
+            data = redis_client.get(redis_key('category_catalog', version))
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Каталог рубрик без Redis: {error}')
+            return CompiledCategoryCatalog(await self._build(0))
+        if data is not None:
+            self.shared_hits += 1
+            catalog = self._decoder.decode(data)
+        else:
+            catalog = await self._build(version)
+            try:
+                redis_client.set(
+                    redis_key('category_catalog', version),
+                    self._encoder.encode(catalog),
+                    ex=self.ttl,
+                )
+            except RedisError as error:
+                self.redis_errors += 1
+                app.logger.warning(f'Не удалось сохранить каталог: {error}')
+        self._local = CompiledCategoryCatalog(catalog)
+        return self._local
+
+    def invalidate(self) -> None:
+        """Данные каталога изменились: следующий запрос соберет новый."""
+        try:
+            redis_client.incr(self.version_key())
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Не удалось сменить версию каталога: {error}')
+
+    async def _build(self, version: int) -> CategoryCatalog:
+        """Собрать каталог рубрик из базы."""
+        self.builds += 1
+        categories, quizzes = await category_crud.get_catalog_rows()
+        quizzes_by_category: dict[int, list[CategoryQuiz]] = {}
+        for row in quizzes:
+            quizzes_by_category.setdefault(row.category_id, []).append(
+                CategoryQuiz(id=row.id, title=row.title),
+            )
+        return CategoryCatalog(
+            version=version,
+            categories=tuple(
+                CategorySummary(
+                    id=category.id,
+                    name=category.name,
+                    question_count=category.question_count,
+                    quizzes=tuple(quizzes_by_category.get(category.id, ())),
+                )
+                for category in categories
+            ),
+        )
+
+
+category_catalog = CategoryCatalogCache(ttl=settings.CATEGORY_CATALOG_TTL)
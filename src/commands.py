@@ -0,0 +1,9 @@
+from . import app
+from .crud.statistic import rebuild_statistics
+
+
+@app.cli.command('rebuild-statistics')
+def rebuild_statistics_command() -> None:
+    """Пересчитать таблицы статистики ответов по всем ответам."""
+    mismatches = rebuild_statistics()
+    app.logger.info(f'Статистика пересчитана, расхождения: {mismatches}')
@@ -2,6 +2,8 @@ from http import HTTPStatus
 
 HTTP_NOT_FOUND = HTTPStatus.NOT_FOUND
 UNAUTHORIZED = HTTPStatus.UNAUTHORIZED
+HTTP_CONFLICT = HTTPStatus.CONFLICT
+HTTP_BAD_REQUEST = HTTPStatus.BAD_REQUEST
 PER_PAGE = 5
 DEFAULT_PAGE_NUMBER = 1
 ONE_ANSWER_VARIANT = 'Должен быть хотя бы один вариант ответа.'
@@ -23,3 +25,5 @@ ERROR_FOR_CATEGORY = ' ни на один вопрос в этой рубрик
 ERROR_FOR_QUIZ = ' ни на один вопрос в этой викторине.'
 ERROR_FOR_QUESTION = ' на этот вопрос.'
 AT_LEAST_ONE_QUESTION = 'Викторина должна содержать хотя бы один вопрос.'
+INVALID_QUESTION_CHOICE = 'Выбраны несуществующие вопросы.'
+QUESTION_PICKER_PAGE_SIZE = 50
@@ -1,8 +1,41 @@
-from typing import Optional
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from typing import AsyncIterator, Optional, Union
 
+from flask import abort
 from flask_sqlalchemy import model
+from sqlalchemy import Executable, Result, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from src import db
+from src.database import async_session
+
+
+class SessionAdapter:
+
+    """Сессия flask с тем же интерфейсом, что у AsyncSession.
+
+    Запросы круд классов пишутся один раз через await execute()
+    и работают как с синхронной, так и с асинхронной сессией.
+
+    """
+
+    def __init__(self, session: Session) -> None:
+        """Сессия flask."""
+        self.session = session
+
+    async def execute(
+        self,
+        statement: Executable,
+        params: Optional[dict] = None,
+    ) -> Result:
+        """Выполнить запрос."""
+        return self.session.execute(statement, params)
+
+    def add(self, obj: object) -> None:
+        """Добавить объект в сессию."""
+        self.session.add(obj)
 
 
 class CRUDBase:
@@ -13,6 +46,22 @@ class CRUDBase:
         """Модель бд."""
         self.model = model
 
+    async def execute(self, statement: Executable) -> Result:
+        """Выполнить запрос на чтение."""
+        return db.session.execute(statement)
+
+    @asynccontextmanager
+    async def transaction(
+        self,
+    ) -> AsyncIterator[Union[SessionAdapter, AsyncSession]]:
+        """Транзакция: коммит при выходе, откат при ошибке."""
+        try:
+            yield SessionAdapter(db.session)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
     async def get(self, obj_id: int) -> Optional[object]:
         """Получить объект."""
         return self.model.query.get_or_404(obj_id)
@@ -51,3 +100,66 @@ class CRUDBase:
         db.session.delete(db_obj)
         db.session.commit()
         return db_obj
+
+
+class AsyncCRUDBase(CRUDBase):
+
+    """CRUD через асинхронную сессию, не блокирующую цикл событий.
+
+    Каждый вызов берет соединение из пула на время запроса. Возвращаемые
+    объекты отсоединены от сессии: загруженные поля доступны, а связи
+    нужно подгружать в самом запросе.
+
+    """
+
+    async def execute(self, statement: Executable) -> Result:
+        """Выполнить запрос на чтение."""
+        async with async_session() as session:
+            return await session.execute(statement)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncSession]:
+        """Транзакция: коммит при выходе, откат при ошибке."""
+        async with async_session() as session, session.begin():
+            yield session
+
+    async def get(self, obj_id: int) -> Optional[object]:
+        """Получить объект."""
+        async with async_session() as session:
+            db_obj = await session.get(self.model, obj_id)
+        if db_obj is None:
+            abort(HTTPStatus.NOT_FOUND)
+        return db_obj
+
+    async def get_multi(self) -> list[object]:
+        """Создать список объектов."""
+        return (await self.execute(select(self.model))).scalars().all()
+
+    async def create(self, obj_in: dict) -> object:
+        """Создать обект."""
+        db_obj = self.model(**obj_in)
+        return await self.update_with_obj(db_obj)
+
+    async def update(self, db_obj: object, obj_in: dict) -> object:
+        """Обновить объект."""
+        obj_data = db_obj.__dict__
+
+        for field in obj_data:
+            if field in obj_in:
+                setattr(db_obj, field, obj_in[field])
+        return await self.update_with_obj(db_obj)
+
+    async def update_with_obj(self, obj_in: object) -> object:
+        """Сохранить объект вместе с изменениями, сделанными вне сессии."""
+        async with async_session() as session:
+            session.add(obj_in)
+            await session.commit()
+            await session.refresh(obj_in)
+        return obj_in
+
+    async def remove(self, db_obj: object) -> object:
+        """Удалить обект."""
+        async with async_session() as session:
+            await session.delete(db_obj)
+            await session.commit()
+        return db_obj
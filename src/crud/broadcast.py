@@ -0,0 +1,155 @@
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from src.crud.base import AsyncCRUDBase, CRUDBase
+from src.database import async_session
+from src.models.broadcast import (
+    BROADCAST_RUNNING,
+    Broadcast,
+    BroadcastDelivery,
+)
+from src.models.telegram_user import TelegramUser
+
+
+class CRUDBroadcast(CRUDBase):
+
+    """Круд класс рассылок."""
+
+    async def claim(
+        self,
+        broadcast_id: int,
+        statuses: Sequence[str],
+    ) -> bool:
+        """Атомарно перевести рассылку из statuses в статус running."""
+        async with self.transaction() as session:
+            claimed = (
+                await session.execute(
+                    update(Broadcast)
+                    .where(
+                        Broadcast.id == broadcast_id,
+                        Broadcast.status.in_(statuses),
+                    )
+                    .values(status=BROADCAST_RUNNING)
+                    .returning(Broadcast.id),
+                )
+            ).scalar()
+        return claimed is not None
+
+    async def get_ids_by_status(self, status: str) -> list[int]:
+        """Идентификаторы рассылок в статусе."""
+        return (
+            (
+                await self.execute(
+                    select(Broadcast.id).where(Broadcast.status == status),
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    async def count_recipients(self) -> int:
+        """Количество получателей рассылки."""
+        return (
+            await self.execute(
+                select(func.count()).select_from(TelegramUser),
+            )
+        ).scalar()
+
+    async def save_progress(
+        self,
+        broadcast_id: int,
+        deliveries: list[dict],
+    ) -> None:
+        """Записать статусы пачки и контрольную точку одной транзакцией.
+
+        Статусы вставляются одним INSERT. Счетчики увеличиваются только
+        на реально вставленные строки, поэтому повторная обработка пачки
+        после сбоя не искажает прогресс.
+
+        """
+        async with self.transaction() as session:
+            inserted = (
+                (
+                    await session.execute(
+                        insert(BroadcastDelivery)
+                        .values(deliveries)
+                        .on_conflict_do_nothing(
+                            index_elements=[
+                                BroadcastDelivery.broadcast_id,
+                                BroadcastDelivery.tg_user_id,
+                            ],
+                        )
+                        .returning(BroadcastDelivery.is_delivered),
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            sent = sum(inserted)
+            await session.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id)
+                .values(
+                    sent_count=Broadcast.sent_count + sent,
+                    failed_count=(
+                        Broadcast.failed_count + len(inserted) - sent
+                    ),
+                    last_recipient_id=max(
+                        delivery['tg_user_id'] for delivery in deliveries
+                    ),
+                ),
+            )
+
+    async def get_progress(self, broadcast_ids: list[int]) -> dict:
+        """Прогресс рассылок по идентификаторам."""
+        rows = await self.execute(
+            select(
+                Broadcast.id,
+                Broadcast.status,
+                Broadcast.total,
+                Broadcast.sent_count,
+                Broadcast.failed_count,
+            ).where(Broadcast.id.in_(broadcast_ids)),
+        )
+        return {
+            row.id: {
+                'status': row.status,
+                'total': row.total,
+                'sent': row.sent_count,
+                'failed': row.failed_count,
+            }
+            for row in rows
+        }
+
+
+class AsyncCRUDBroadcast(AsyncCRUDBase, CRUDBroadcast):
+
+    """Асинхронный круд класс рассылок для исполнителя рассылок."""
+
+    async def stream_recipients(
+        self,
+        after_id: int,
+        batch_size: int,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Получатели после контрольной точки пачками.
+
+        Выборка идет серверным курсором в отдельной сессии, поэтому
+        таблица не загружается в память целиком, а коммиты прогресса
+        в других сессиях не закрывают курсор.
+
+        """
+        async with async_session() as session:
+            result = await session.stream(
+                select(TelegramUser.id, TelegramUser.telegram_id)
+                .where(TelegramUser.id > after_id)
+                .order_by(TelegramUser.id)
+                .execution_options(yield_per=batch_size),
+            )
+            async for recipients in result.partitions():
+                yield recipients
+
+
+broadcast_crud = CRUDBroadcast(Broadcast)
+async_broadcast_crud = AsyncCRUDBroadcast(Broadcast)
@@ -1,12 +1,15 @@
-from typing import Tuple
+from typing import Sequence, Tuple
 
+from sqlalchemy import Row, func, select, true
 from sqlalchemy.orm import Query
 
 from src import db
 from src.crud.base import CRUDBase
+from src.crud.statistic import category_statistic_crud
 from src.models.category import Category
 from src.models.question import Question
-from src.models.user_answer import UserAnswer
+from src.models.quiz import Quiz
+from src.models.quiz_question import quiz_questions
 
 
 class CRUDCategory(CRUDBase):
@@ -17,48 +20,55 @@ class CRUDCategory(CRUDBase):
         """Получить все активные рубрики как запрос Query."""
         return db.session.query(Category)
 
-    async def get_statistic(self, category_id: int) -> Tuple:
-        """Получить статистику по рубрике."""
-        try:
-            category = (
-                db.session.query(Category.name)
-                .filter(Category.id == category_id)
-                .first()
-            )
-            if not category:
-                return ('Нет данных', 0, 0, 0)
+    async def get_catalog_rows(self) -> Tuple[Sequence[Row], Sequence[Row]]:
+        """Получить строки каталога рубрик.
 
-            category_name = category.name
+        Returns
+        -------
+        Tuple[Sequence[Row], Sequence[Row]]
+            Активные рубрики по названию с числом активных вопросов
+            и пары (рубрика, викторина) активных викторин, в которых
+            есть активные вопросы рубрики, по названию викторины.
 
-            # Выбираем все ответы, относящиеся к данной рубрике.
-            results = (
-                db.session.query(UserAnswer.is_right)
-                .where(
-                    UserAnswer.question_id == Question.id,
-                    Question.category_id == category_id)
-                .all()
+        """
+        categories = (
+            await self.execute(
+                select(
+                    Category.id,
+                    Category.name,
+                    func.count(Question.id).label('question_count'),
+                )
+                .outerjoin(
+                    Question,
+                    (Question.category_id == Category.id)
+                    & (Question.is_active == true()),
+                )
+                .where(Category.is_active == true())
+                .group_by(Category.id)
+                .order_by(Category.name),
             )
-
-            total_answers = len(results)
-            correct_answers = sum(1 for result in results if result.is_right)
-
-            if total_answers > 0:
-                correct_percentage = round(
-                    (correct_answers / total_answers) * 100.0,
-                    2,
+        ).all()
+        quizzes = (
+            await self.execute(
+                select(Question.category_id, Quiz.id, Quiz.title)
+                .join(
+                    quiz_questions,
+                    quiz_questions.c.question_id == Question.id,
                 )
-            else:
-                correct_percentage = 0
-
-            return (
-                category_name,
-                total_answers,
-                correct_answers,
-                correct_percentage,
+                .join(Quiz, Quiz.id == quiz_questions.c.quiz_id)
+                .where(Question.is_active == true(), Quiz.is_active == true())
+                .distinct()
+                .order_by(Quiz.title, Question.category_id),
             )
-        except Exception:
-            db.session.rollback()
-            return ('Нет данных', 0, 0, 0)
+        ).all()
+        return categories, quizzes
+
+    async def get_statistic(self, category_id: int) -> Tuple:
+        """Получить статистику по рубрике."""
+        return await category_statistic_crud.get_statistic(
+            Category.name,
+            category_id,
+        )
 
 
 category_crud = CRUDCategory(Category)
@@ -1,12 +1,13 @@
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Sequence, Tuple
 
-from sqlalchemy import null, select, true
+from sqlalchemy import Row, select, true
 from sqlalchemy.orm import defer
 
-from src import db
+from src.constants import QUESTION_PICKER_PAGE_SIZE
 from src.crud.base import CRUDBase
+from src.crud.statistic import question_statistic_crud
+from src.models.category import Category
 from src.models.question import Question
-from src.models.user_answer import UserAnswer
 
 # from src.models.quiz import Quiz
 
@@ -15,93 +16,69 @@ class CRUDQuestion(CRUDBase):
 
     """Круд класс для вопросов."""
 
-    async def get_new(
+    async def search(
         self,
-        user_id: int,
-        quiz_id: int,
+        title: str = '',
+        category_id: Optional[int] = None,
+        after: int = 0,
+        limit: int = QUESTION_PICKER_PAGE_SIZE,
         is_active: bool = true(),
-    ) -> Optional[Question]:
-        """Получить новый вопрос."""
-        return (
-            db.session.execute(
-                select(Question)
-                .options(defer(Question.image))
-                .where(
-                    Question.quizzes.any(id=quiz_id),
-                    Question.is_active == is_active,
-                    UserAnswer.id == null(),
-                )
-                .outerjoin(
-                    UserAnswer,
-                    (Question.id == UserAnswer.question_id)
-                    & (UserAnswer.user_id == user_id)
-                    & (UserAnswer.quiz_id == quiz_id),
-                )
-                .limit(1),
+    ) -> Sequence[Row]:
+        """Найти вопросы активных рубрик для выбора в викторину.
+
+        Args:
+        ----
+            title (str): Часть названия вопроса.
+            category_id (Optional[int]): ID рубрики.
+            after (int): ID последнего вопроса предыдущей страницы.
+            limit (int): Число вопросов на странице.
+            is_active (bool): Искать только активные вопросы.
+
+        Returns:
+        -------
+            Sequence[Row]: До limit + 1 строк (id, title, category)
+            по возрастанию ID, лишняя строка означает следующую страницу.
+
+        """
+        statement = (
+            select(
+                Question.id,
+                Question.title,
+                Category.name.label('category'),
+            )
+            .join(Category, Category.id == Question.category_id)
+            .where(
+                Question.is_active == is_active,
+                Category.is_active == true(),
+                Question.id > after,
             )
-            .scalars()
-            .first()
+            .order_by(Question.id)
+            .limit(limit + 1)
         )
+        if title:
+            statement = statement.where(Question.title.ilike(f'%{title}%'))
+        if category_id:
+            statement = statement.where(Question.category_id == category_id)
+        return (await self.execute(statement)).all()
 
-    async def get_all_by_quiz_id(
-        self,
-        quiz_id: int,
-        is_active: bool = true(),
-    ) -> list[Question]:
-        """Получить все вопросы по идентификатору теста."""
+    def get_by_ids(self, ids: Iterable[int]) -> list[Question]:
+        """Получить вопросы по ID одним запросом, без изображений.
+
+        Вызывается при разборе формы админки, поэтому синхронный.
+
+        """
         return (
-            db.session.execute(
-                select(Question)
-                .options(defer(Question.image))
-                .where(
-                    Question.quizzes.any(id=quiz_id),
-                    Question.is_active == is_active,
-                )
-                .order_by(Question.id),
-            )
-            .scalars()
+            Question.query.options(defer(Question.image))
+            .filter(Question.id.in_(list(ids)))
             .all()
         )
 
     async def get_statistic(self, question_id: int) -> Tuple:
         """Получить статистику по вопросу."""
-        try:
-            question = (
-                db.session.query(Question)
-                .filter(Question.id == question_id)
-                .first()
-            )
-            if not question:
-                return ('Нет данных', 0, 0, 0)
-
-            question_text = question.title
-
-            user_answers = (
-                db.session.query(UserAnswer.is_right)
-                .filter(UserAnswer.question_id == question_id)
-                .all()
-            )
-
-            total_answers = len(user_answers)
-            correct_answers = sum(1 for ua in user_answers if ua.is_right)
-
-            if total_answers > 0:
-                correct_percentage = round(
-                    (correct_answers / total_answers) * 100.0,
-                    2,
-                )
-            else:
-                correct_percentage = 0
-
-            return (
-                question_text,
-                total_answers,
-                correct_answers,
-                correct_percentage,
-            )
-        except Exception:
-            db.session.rollback()
-            return ('Нет данных', 0, 0, 0)
+        return await question_statistic_crud.get_statistic(
+            Question.title,
+            question_id,
+        )
 
 
 question_crud = CRUDQuestion(Question)
@@ -1,13 +1,16 @@
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple
 
-from sqlalchemy import select  # , true
+from sqlalchemy import Row, false, func, select, true, update
 from sqlalchemy.orm import Query
 
 from src import db
 from src.crud.base import CRUDBase
+from src.crud.statistic import quiz_statistic_crud
 from src.models.question import Question
 from src.models.quiz import Quiz
-from src.models.user_answer import UserAnswer
+from src.models.quiz_question import quiz_questions
+from src.models.quiz_result import QuizResult
+from src.models.variant import Variant
 
 
 class CRUDQuiz(CRUDBase):
@@ -30,65 +33,140 @@ class CRUDQuiz(CRUDBase):
         """Создать список объектов."""
         return Quiz.query
 
-    async def get_by_id(self, quiz_id: int) -> Optional[Quiz]:
-        """Получить викторину по ID."""
-        return (
-            db.session.execute(
-                select(Quiz).where(Quiz.id == quiz_id),
-            )
-            .scalars()
-            .first()
-        )
-
-    async def get_statistic(self, quiz_id: int) -> Tuple:
-        """Получить статистику по викторине."""
-        try:
-            quiz = db.session.query(Quiz).filter(Quiz.id == quiz_id).first()
+    def get_catalog_query(self, user_id: Optional[int] = None) -> Query:
+        """Каталог активных викторин без загрузки их вопросов.
 
-            if not quiz:
-                return ('Нет данных', 0, 0, 0)
+        Одна строка на викторину: id, title и question_count — число
+        активных вопросов. Для пользователя добавляются answered_count
+        и is_complete по его текущему результату викторины.
 
-            # Получаем все вопросы викторины
-            questions_subquery = (
-                db.session.query(Question.id)
-                .filter(Question.quizzes.any(id=quiz_id))
-                .subquery()
+        """
+        query = (
+            db.session.query(
+                Quiz.id,
+                Quiz.title,
+                func.count(Question.id).label('question_count'),
             )
-
-            total_answers = (
-                db.session.query(UserAnswer)
-                .filter(UserAnswer.question_id.in_(questions_subquery),
-                        UserAnswer.quiz_id == quiz_id,
-                        )
-                .count()
+            .outerjoin(quiz_questions, quiz_questions.c.quiz_id == Quiz.id)
+            .outerjoin(
+                Question,
+                (Question.id == quiz_questions.c.question_id)
+                & (Question.is_active == true()),
             )
+            .filter(Quiz.is_active == true())
+            .group_by(Quiz.id)
+        )
+        if user_id is None:
+            return query
+        # Результат пользователя по викторине один, строки не множатся
+        return query.outerjoin(
+            QuizResult,
+            (QuizResult.quiz_id == Quiz.id) & (QuizResult.user_id == user_id),
+        ).add_columns(
+            func.coalesce(func.max(QuizResult.total_questions), 0).label(
+                'answered_count',
+            ),
+            func.coalesce(func.bool_or(QuizResult.is_complete), false()).label(
+                'is_complete',
+            ),
+        )
 
-            correct_answers = (
-                db.session.query(UserAnswer)
-                .filter(
-                    UserAnswer.question_id.in_(questions_subquery),
-                    UserAnswer.quiz_id == quiz_id,
-                    UserAnswer.is_right,
+    def renumber_questions(self, quiz_id: int) -> None:
+        """Пронумеровать вопросы викторины подряд, начиная с 1.
+
+        Порядок уже пронумерованных вопросов сохраняется, новые
+        (с позицией 0) добавляются в конец. Вызывается из синхронного
+        обработчика сохранения в админке, поэтому работает с сессией
+        flask.
+
+        """
+        ordered = (
+            select(
+                quiz_questions.c.question_id,
+                func.row_number()
+                .over(
+                    order_by=(
+                        quiz_questions.c.position == 0,
+                        quiz_questions.c.position,
+                        quiz_questions.c.question_id,
+                    ),
                 )
-                .count()
+                .label('position'),
+            )
+            .where(quiz_questions.c.quiz_id == quiz_id)
+            .subquery()
+        )
+        db.session.execute(
+            update(quiz_questions)
+            .where(
+                quiz_questions.c.quiz_id == quiz_id,
+                quiz_questions.c.question_id == ordered.c.question_id,
+                quiz_questions.c.position != ordered.c.position,
             )
+            .values(position=ordered.c.position),
+        )
+        db.session.commit()
 
-            if total_answers > 0:
-                correct_percentage = round(
-                    (correct_answers / total_answers) * 100.0,
-                    2,
+    async def get_by_id(self, quiz_id: int) -> Optional[Quiz]:
+        """Получить викторину по ID."""
+        statement = select(Quiz).where(Quiz.id == quiz_id)
+        return (await self.execute(statement)).scalars().first()
+
+    async def get_snapshot_rows(
+        self,
+        quiz_id: int,
+        is_active: bool = true(),
+    ) -> Optional[Tuple[Row, Sequence[Row], Sequence[Row]]]:
+        """Получить викторину, ее вопросы по порядку и их варианты.
+
+        Изображения не загружаются, вместо них читается признак has_image.
+
+        """
+        quiz = (
+            await self.execute(
+                select(Quiz.id, Quiz.title).where(Quiz.id == quiz_id),
+            )
+        ).first()
+        if quiz is None:
+            return None
+        questions = (
+            await self.execute(
+                select(
+                    Question.id,
+                    Question.title,
+                    Question.image.is_not(None).label('has_image'),
+                )
+                .join(
+                    quiz_questions,
+                    (quiz_questions.c.question_id == Question.id)
+                    & (quiz_questions.c.quiz_id == quiz_id),
                 )
-            else:
-                correct_percentage = 0
-            return (
-                quiz.title,
-                total_answers,
-                correct_answers,
-                correct_percentage,
+                .where(Question.is_active == is_active)
+                .order_by(quiz_questions.c.position, Question.id),
             )
-        except Exception:
-            db.session.rollback()
-            return ('Нет данных', 0, 0, 0)
+        ).all()
+        variants = (
+            await self.execute(
+                select(
+                    Variant.id,
+                    Variant.question_id,
+                    Variant.title,
+                    Variant.description,
+                    Variant.is_right_choice,
+                )
+                .where(
+                    Variant.question_id.in_(
+                        [question.id for question in questions],
+                    ),
+                )
+                .order_by(Variant.id),
+            )
+        ).all()
+        return quiz, questions, variants
+
+    async def get_statistic(self, quiz_id: int) -> Tuple:
+        """Получить статистику по викторине."""
+        return await quiz_statistic_crud.get_statistic(Quiz.title, quiz_id)
 
 
 quiz_crud = CRUDQuiz(Quiz)
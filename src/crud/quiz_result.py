@@ -1,11 +1,13 @@
 from typing import Optional
 
-from sqlalchemy import Result, select
-from sqlalchemy.orm import joinedload
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.orm import joinedload, undefer
 
-from src import db
 from src.crud.base import CRUDBase
+from src.crud.statistic import user_statistic_crud
+from src.models.quiz import Quiz
 from src.models.quiz_result import QuizResult
+from src.pagination import KeysetPagination, keyset_paginate
 
 
 class CRUDQuizResult(CRUDBase):
@@ -16,18 +18,16 @@ class CRUDQuizResult(CRUDBase):
         self,
         user_id: int,
         quiz_id: int,
+        with_breakdown: bool = False,
     ) -> Optional[QuizResult]:
         """Получить результат квиза с пользователем и квизом."""
-        return (
-            db.session.execute(
-                select(QuizResult).where(
-                    QuizResult.user_id == user_id,
-                    QuizResult.quiz_id == quiz_id,
-                ),
-            )
-            .scalars()
-            .first()
+        statement = select(QuizResult).where(
+            QuizResult.user_id == user_id,
+            QuizResult.quiz_id == quiz_id,
         )
+        if with_breakdown:
+            statement = statement.options(undefer(QuizResult.breakdown))
+        return (await self.execute(statement)).scalars().first()
 
     async def get_results_by_user(
         self,
@@ -35,19 +35,52 @@ class CRUDQuizResult(CRUDBase):
         tg_user: bool = False,
     ) -> Optional[QuizResult]:
         """Получить результаты квизов пользователя."""
-        return (
-            db.session.execute(
-                select(QuizResult)
-                # загрузка связанных Quiz
-                .options(joinedload(QuizResult.quiz)).where(
-                    QuizResult.user_id == user_id
-                    if not tg_user
-                    else QuizResult.tg_user_id == user_id,
-                ),
+        statement = (
+            select(QuizResult)
+            # загрузка связанных Quiz
+            .options(joinedload(QuizResult.quiz)).where(
+                QuizResult.user_id == user_id
+                if not tg_user
+                else QuizResult.tg_user_id == user_id,
             )
-            .scalars()
-            .all()
         )
+        return (await self.execute(statement)).scalars().all()
+
+    async def detach_from_user(self, user_id: int, quiz_id: int) -> None:
+        """Отвязать результат от пользователя при перезапуске викторины.
+
+        Тем же запросом результат вычитается из итогов пользователя,
+        поэтому ответ, сохраненный одновременно с перезапуском,
+        не приводит к расхождению.
+
+        """
+        detached = (
+            update(QuizResult)
+            .where(
+                QuizResult.user_id == user_id,
+                QuizResult.quiz_id == quiz_id,
+            )
+            .values(user_id=None)
+            .returning(
+                QuizResult.total_questions,
+                QuizResult.correct_answers_count,
+            )
+            .cte('detached')
+        )
+        statistic = user_statistic_crud.upsert(
+            select(
+                literal(user_id),
+                -detached.c.total_questions,
+                -detached.c.correct_answers_count,
+            ),
+        ).cte('user_statistic')
+        statement = (
+            select(func.count())
+            .select_from(detached)
+            .add_cte(statistic)
+        )
+        async with self.transaction() as session:
+            await session.execute(statement)
 
     async def get_results_by_user_paginated(
         self,
@@ -55,17 +88,23 @@ class CRUDQuizResult(CRUDBase):
         page: int,
         per_page: int,
         tg_user: bool = False,
-    ) -> Result:
+    ) -> KeysetPagination:
         """Получить результаты квизов пользователя c пагинацией."""
+        # Викторины загружаются тем же запросом, что и страница,
+        # а их вопросы странице не нужны
+        query = self.model.query.options(
+            joinedload(QuizResult.quiz).lazyload(Quiz.questions),
+        )
         if not tg_user:
-            query = self.model.query.filter_by(user_id=user_id)
+            query = query.filter_by(user_id=user_id)
         else:
-            query = self.model.query.filter_by(tg_user_id=user_id)
+            query = query.filter_by(tg_user_id=user_id)
 
-        return query.paginate(
+        return keyset_paginate(
+            query,
+            [QuizResult.id],
             page=page,
             per_page=per_page,
-            error_out=False,
         )
 
 
@@ -0,0 +1,378 @@
+from typing import Optional, Tuple
+
+from sqlalchemy import (
+    CTE,
+    Column,
+    ColumnElement,
+    Integer,
+    Select,
+    cast,
+    delete,
+    distinct,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+from src import db
+from src.crud.base import CRUDBase
+from src.models.question import Question
+from src.models.quiz_result import QuizResult
+from src.models.statistic import (
+    CategoryStatistic,
+    QuestionStatistic,
+    QuizStatistic,
+    TelegramUserStatistic,
+    UserStatistic,
+    correct_percentage,
+)
+from src.models.user_answer import UserAnswer
+
+# Ключ блокировки postgres, чтобы пересчеты статистики не шли
+# одновременно
+REBUILD_LOCK_ID = 7_340_019
+
+
+class CRUDStatistic(CRUDBase):
+
+    """Круд класс для таблиц статистики ответов.
+
+    Первичный ключ таблицы — ID вопроса, викторины или рубрики.
+
+    """
+
+    @property
+    def key(self) -> str:
+        """Название столбца первичного ключа."""
+        return self.model.__table__.primary_key.columns.keys()[0]
+
+    @property
+    def owner_id(self) -> Column:
+        """Столбец ID вопроса, викторины или рубрики в их таблице."""
+        (foreign_key,) = getattr(self.model, self.key).foreign_keys
+        return foreign_key.column
+
+    def with_counts(
+        self,
+        query: Query,
+        owner_id: InstrumentedAttribute,
+    ) -> Query:
+        """Добавить к запросу списка счетчики и процент правильных ответов.
+
+        Счетчики читаются из таблицы статистики тем же запросом,
+        что и страница списка. Строка статистики есть у каждого
+        объекта, поэтому таблица присоединяется без outer join.
+        Столбцы total_answers, correct_answers и correct_percentage
+        доступны для сортировки, см. sort_keys.
+
+        """
+        return query.join(
+            self.model,
+            getattr(self.model, self.key) == owner_id,
+        ).add_columns(*self.columns().values())
+
+    def columns(self) -> dict[str, ColumnElement]:
+        """Столбцы статистики по названию для выборки и сортировки."""
+        total_answers = self.model.__table__.c.total_answers
+        correct_answers = self.model.__table__.c.correct_answers
+        return {
+            'total_answers': total_answers.label('total_answers'),
+            'correct_answers': correct_answers.label('correct_answers'),
+            'correct_percentage': correct_percentage(
+                total_answers,
+                correct_answers,
+            ).label('correct_percentage'),
+        }
+
+    def sort_keys(
+        self,
+        sort: Optional[str],
+        owner_id: InstrumentedAttribute,
+    ) -> list[ColumnElement]:
+        """Ключ сортировки списка по столбцу статистики и ID объекта.
+
+        Ключ статистики совпадает с индексом таблицы статистики
+        (счетчик, ID объекта), поэтому страница читается по индексу,
+        а список не упорядочивается целиком.
+
+        """
+        column = self.columns().get(sort)
+        if column is None:
+            return [owner_id]
+        return [column.element, getattr(self.model, self.key)]
+
+    async def get_statistic(
+        self,
+        title: InstrumentedAttribute,
+        obj_id: int,
+    ) -> Tuple:
+        """Получить название, ответы, правильные ответы и их процент.
+
+        Args:
+        ----
+            title (InstrumentedAttribute): Столбец названия вопроса,
+                викторины или рубрики.
+            obj_id (int): ID вопроса, викторины или рубрики.
+
+        Returns:
+        -------
+            Tuple: Статистика для админки или ('Нет данных', 0, 0, 0).
+
+        """
+        owner = title.class_
+        statement = (
+            select(
+                title,
+                self.model.total_answers,
+                self.model.correct_answers,
+            )
+            .outerjoin(self.model, getattr(self.model, self.key) == owner.id)
+            .where(owner.id == obj_id)
+        )
+        try:
+            row = (await self.execute(statement)).first()
+        except Exception:
+            db.session.rollback()
+            return ('Нет данных', 0, 0, 0)
+        if row is None:
+            return ('Нет данных', 0, 0, 0)
+        name, total_answers, correct_answers = row
+        total_answers = total_answers or 0
+        correct_answers = correct_answers or 0
+        if total_answers > 0:
+            correct_percentage = round(
+                (correct_answers / total_answers) * 100.0,
+                2,
+            )
+        else:
+            correct_percentage = 0
+        return (name, total_answers, correct_answers, correct_percentage)
+
+    async def get_counts(self, obj_id: int) -> Tuple[int, int]:
+        """Получить число ответов и правильных ответов."""
+        statement = select(
+            self.model.total_answers,
+            self.model.correct_answers,
+        ).where(getattr(self.model, self.key) == obj_id)
+        return tuple((await self.execute(statement)).first() or (0, 0))
+
+    def upsert(self, source: Select) -> Insert:
+        """Прибавить к счетчикам строки (ключ, ответы, правильные)."""
+        statement = insert(self.model).from_select(
+            [self.key, 'total_answers', 'correct_answers'],
+            source,
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[self.key],
+            set_={
+                'total_answers': (
+                    self.model.total_answers
+                    + statement.excluded.total_answers
+                ),
+                'correct_answers': (
+                    self.model.correct_answers
+                    + statement.excluded.correct_answers
+                ),
+            },
+        )
+
+
+question_statistic_crud = CRUDStatistic(QuestionStatistic)
+quiz_statistic_crud = CRUDStatistic(QuizStatistic)
+category_statistic_crud = CRUDStatistic(CategoryStatistic)
+user_statistic_crud = CRUDStatistic(UserStatistic)
+telegram_user_statistic_crud = CRUDStatistic(TelegramUserStatistic)
+
+
+def answer_statistic_upserts(
+    answer: CTE,
+    quiz_id: ColumnElement[int],
+) -> list[CTE]:
+    """Обновления статистики для сохраненного ответа.
+
+    Args:
+    ----
+        answer (CTE): Вставка ответа, возвращающая user_id, tg_user_id,
+            question_id и is_right. Пустая, если ответ уже был сохранен.
+        quiz_id (ColumnElement[int]): ID викторины.
+
+    Returns:
+    -------
+        list[CTE]: Обновления статистики вопроса, викторины, рубрики
+        и пользователей для добавления в запрос сохранения ответа.
+
+    """
+    is_right = cast(answer.c.is_right, Integer)
+    return [
+        question_statistic_crud.upsert(
+            select(answer.c.question_id, literal_column('1'), is_right),
+        ).cte('question_statistic'),
+        quiz_statistic_crud.upsert(
+            select(quiz_id, literal_column('1'), is_right),
+        ).cte('quiz_statistic'),
+        category_statistic_crud.upsert(
+            select(Question.category_id, literal_column('1'), is_right).join(
+                answer,
+                answer.c.question_id == Question.id,
+            ),
+        ).cte('category_statistic'),
+        user_statistic_crud.upsert(
+            select(answer.c.user_id, literal_column('1'), is_right).where(
+                answer.c.user_id.is_not(None),
+            ),
+        ).cte('user_statistic'),
+        telegram_user_statistic_crud.upsert(
+            select(
+                answer.c.tg_user_id,
+                literal_column('1'),
+                is_right,
+            ).where(answer.c.tg_user_id.is_not(None)),
+        ).cte('telegram_user_statistic'),
+    ]
+
+
+def move_question_statistic(
+    question_id: int,
+    old_category_id: int,
+    new_category_id: int,
+) -> None:
+    """Перенести ответы на вопрос в статистику его новой рубрики.
+
+    Выполняется в транзакции изменения вопроса. Ответы, сохраненные
+    одновременно с переносом, могут попасть в прежнюю рубрику, такое
+    расхождение исправляет flask rebuild-statistics.
+
+    """
+    counts = db.session.execute(
+        select(
+            QuestionStatistic.total_answers,
+            QuestionStatistic.correct_answers,
+        )
+        .where(QuestionStatistic.question_id == question_id)
+        .with_for_update(),
+    ).first()
+    if counts is None or not any(counts):
+        return
+    total_answers, correct_answers = counts
+    db.session.execute(
+        update(CategoryStatistic)
+        .where(CategoryStatistic.category_id == old_category_id)
+        .values(
+            total_answers=CategoryStatistic.total_answers - total_answers,
+            correct_answers=(
+                CategoryStatistic.correct_answers - correct_answers
+            ),
+        ),
+    )
+    db.session.execute(
+        category_statistic_crud.upsert(
+            select(
+                literal(new_category_id),
+                literal(total_answers),
+                literal(correct_answers),
+            ),
+        ),
+    )
+
+
+def rebuild_statistics() -> dict[str, int]:
+    """Пересчитать таблицы статистики по всем ответам.
+
+    Таблицы очищаются и заполняются заново одной транзакцией.
+    Ответы, сохраненные во время пересчета, дождутся ее завершения
+    и прибавятся к новым счетчикам, поэтому пересчет запускается
+    вручную (flask rebuild-statistics): один раз после обновления,
+    добавившего таблицы статистики, или для исправления расхождений.
+    Одновременный второй пересчет ждет первый. Итоги пользователя
+    считаются по его текущим результатам, как на странице профиля.
+
+    Returns
+    -------
+    dict[str, int]
+        Число строк каждой таблицы, которые отличались от пересчета.
+
+    """
+    correct = func.count().filter(UserAnswer.is_right)
+    sources = (
+        (
+            question_statistic_crud,
+            select(UserAnswer.question_id, func.count(), correct)
+            .group_by(UserAnswer.question_id),
+        ),
+        (
+            quiz_statistic_crud,
+            select(UserAnswer.quiz_id, func.count(), correct)
+            .group_by(UserAnswer.quiz_id),
+        ),
+        (
+            category_statistic_crud,
+            select(Question.category_id, func.count(), correct)
+            .join(UserAnswer, UserAnswer.question_id == Question.id)
+            .group_by(Question.category_id),
+        ),
+        (
+            user_statistic_crud,
+            select(
+                QuizResult.user_id,
+                func.sum(QuizResult.total_questions),
+                func.sum(QuizResult.correct_answers_count),
+            )
+            .where(QuizResult.user_id.is_not(None))
+            .group_by(QuizResult.user_id),
+        ),
+        (
+            telegram_user_statistic_crud,
+            select(UserAnswer.tg_user_id, func.count(), correct)
+            .where(UserAnswer.tg_user_id.is_not(None))
+            .group_by(UserAnswer.tg_user_id),
+        ),
+    )
+    mismatches = {}
+    try:
+        db.session.execute(select(func.pg_advisory_xact_lock(REBUILD_LOCK_ID)))
+        for crud, source in sources:
+            # Нулевые строки остаются после перезапуска викторины
+            current = select(
+                getattr(crud.model, crud.key),
+                crud.model.total_answers,
+                crud.model.correct_answers,
+            ).where(
+                or_(
+                    crud.model.total_answers != 0,
+                    crud.model.correct_answers != 0,
+                ),
+            )
+            difference = union_all(
+                source.except_(current),
+                current.except_(source),
+            ).subquery()
+            mismatches[crud.model.__tablename__] = db.session.execute(
+                select(func.count(distinct(list(difference.c)[0]))),
+            ).scalar()
+            db.session.execute(delete(crud.model))
+            db.session.execute(
+                insert(crud.model).from_select(
+                    [crud.key, 'total_answers', 'correct_answers'],
+                    source,
+                ),
+            )
+            # Объекты без ответов получают нулевые строки, как от триггера
+            db.session.execute(
+                insert(crud.model)
+                .from_select(
+                    [crud.key, 'total_answers', 'correct_answers'],
+                    select(crud.owner_id, literal(0), literal(0)),
+                )
+                .on_conflict_do_nothing(),
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return mismatches
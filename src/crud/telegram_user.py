@@ -14,21 +14,17 @@ class CRUDTelegramUser(CRUDBase):
         telegram_id: int,
     ) -> Optional[TelegramUser]:
         """Получение пользователя по telegram_id."""
-        return (
-            db.session.execute(
-                db.select(TelegramUser).where(
-                    TelegramUser.telegram_id == telegram_id,
-                ),
-            )
-            .scalars()
-            .first()
+        statement = db.select(TelegramUser).where(
+            TelegramUser.telegram_id == telegram_id,
         )
+        return (await self.execute(statement)).scalars().first()
 
     async def exists_by_telegram_id(self, telegram_id: int) -> bool:
         """Проверка существования пользователя по telegram_id."""
-        return db.session.query(
+        statement = db.select(
             db.exists().where(TelegramUser.telegram_id == telegram_id),
-        ).scalar()
+        )
+        return (await self.execute(statement)).scalar()
 
 
 telegram_user_crud = CRUDTelegramUser(TelegramUser)
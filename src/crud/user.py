@@ -1,7 +1,10 @@
 from typing import Optional
 
+from sqlalchemy.dialects.postgresql import insert
+
 from src import db
-from src.crud.base import CRUDBase
+from src.crud.base import AsyncCRUDBase, CRUDBase
+from src.models.telegram_user import TelegramUser
 from src.models.user import User
 
 
@@ -17,10 +20,76 @@ class CRUDUser(CRUDBase):
         telegram_id (int): тг ид пользователя
 
         """
-        user = db.session.execute(
+        user = await self.execute(
             db.select(User).where(User.telegram_id == telegram_id),
         )
         return user.scalars().first()
 
+    async def register(
+        self,
+        user_data: dict,
+        telegram_user_data: dict,
+    ) -> bool:
+        """Зарегистрировать пользователя одной транзакцией.
+
+        Создает User и TelegramUser через INSERT ... ON CONFLICT DO NOTHING.
+        Первый пользователь становится администратором: это проверяется
+        подзапросом NOT EXISTS прямо в INSERT, без выборки всей таблицы.
+        Если username уже занят другим пользователем, например после
+        смены имени в Telegram, пользователь создается без username.
+
+        Keyword Arguments:
+        -----------------
+        user_data (dict): поля модели User без is_admin
+        telegram_user_data (dict): поля модели TelegramUser
+
+        Returns:
+        -------
+        bool: True, если пользователь User был создан.
+
+        """
+        is_first_user = ~db.select(User.id).exists()
+        async with self.transaction() as session:
+            # Без цели ON CONFLICT пропускает и занятый telegram_id,
+            # и занятый username
+            created_id = (
+                await session.execute(
+                    insert(User)
+                    .values(**user_data, is_admin=is_first_user)
+                    .on_conflict_do_nothing()
+                    .returning(User.id),
+                )
+            ).scalar()
+            if created_id is None and user_data.get('username'):
+                # Без username конфликт возможен только по telegram_id,
+                # тогда пользователь уже зарегистрирован
+                created_id = (
+                    await session.execute(
+                        insert(User)
+                        .values(
+                            **user_data | {'username': None},
+                            is_admin=is_first_user,
+                        )
+                        .on_conflict_do_nothing(
+                            index_elements=[User.telegram_id],
+                        )
+                        .returning(User.id),
+                    )
+                ).scalar()
+            await session.execute(
+                insert(TelegramUser)
+                .values(**telegram_user_data)
+                .on_conflict_do_nothing(
+                    index_elements=[TelegramUser.telegram_id],
+                ),
+            )
+        return created_id is not None
+
+
+class AsyncCRUDUser(AsyncCRUDBase, CRUDUser):
+
+    """Асинхронный круд класс пользователя."""
+
 
 user_crud = CRUDUser(User)
+async_user_crud = AsyncCRUDUser(User)
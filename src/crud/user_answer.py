@@ -1,10 +1,29 @@
+from datetime import datetime
+from functools import cache
 from typing import List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Integer,
+    TextClause,
+    bindparam,
+    cast,
+    false,
+    func,
+    literal_column,
+    select,
+    text,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
 
-from src import db
 from src.crud.base import CRUDBase
+from src.crud.statistic import answer_statistic_upserts
 from src.models.question import Question
+from src.models.quiz_result import QuizResult
+from src.models.telegram_user import TelegramUser
 from src.models.user_answer import UserAnswer
 
 
@@ -23,13 +42,8 @@ class CRUDUserAnswer(CRUDBase):
             if not tg_user
             else UserAnswer.tg_user_id == user_id
         )
-        return (
-            db.session.execute(
-                select(UserAnswer).where(args),
-            )
-            .scalars()
-            .all()
-        )
+        statement = select(UserAnswer).where(args)
+        return (await self.execute(statement)).scalars().all()
 
     async def get_results_by_user_and_quiz(
         self,
@@ -37,20 +51,154 @@ class CRUDUserAnswer(CRUDBase):
         quiz_id: int,
     ) -> Optional[UserAnswer]:
         """Получить результаты ответов пользователя по конкретной викторине."""
-        return (
-            db.session.execute(
-                select(UserAnswer).where(
-                    UserAnswer.user_id == user_id,
-                    UserAnswer.question_id.in_(
-                        select(Question.id)
-                        .where(Question.quizzes.any(id=quiz_id)),
-                    ),
-                    UserAnswer.quiz_id == quiz_id,
-                ),
+        statement = select(UserAnswer).where(
+            UserAnswer.user_id == user_id,
+            UserAnswer.question_id.in_(
+                select(Question.id)
+                .where(Question.quizzes.any(id=quiz_id)),
+            ),
+            UserAnswer.quiz_id == quiz_id,
+        )
+        return (await self.execute(statement)).scalars().all()
+
+    async def get_answer_ids_by_question(
+        self,
+        user_id: int,
+        quiz_id: int,
+    ) -> dict[int, int]:
+        """Получить выбранные пользователем варианты по ID вопроса."""
+        statement = select(UserAnswer.question_id, UserAnswer.answer_id).where(
+            UserAnswer.user_id == user_id,
+            UserAnswer.quiz_id == quiz_id,
+        )
+        return dict((await self.execute(statement)).tuples().all())
+
+    async def record_answer(
+        self,
+        user_id: int,
+        telegram_id: int,
+        quiz_id: int,
+        question_id: int,
+        answer_id: int,
+        is_right: bool,
+    ) -> bool:
+        """Сохранить ответ и обновить счетчики результата одним запросом.
+
+        Ответ вставляется только один раз: повторная отправка того же
+        вопроса (например, двойной клик) не увеличивает счетчики.
+        Результат викторины создается или обновляется атомарно через
+        INSERT ... ON CONFLICT, поэтому параллельные ответы не теряются.
+        Тем же запросом обновляется статистика вопроса, викторины
+        и рубрики.
+
+        Returns
+        -------
+        bool
+            True, если ответ сохранен, False, если он уже был.
+
+        """
+        async with self.transaction() as session:
+            result = await session.execute(
+                record_answer_statement(),
+                {
+                    'user_id': user_id,
+                    'telegram_id': telegram_id,
+                    'quiz_id': quiz_id,
+                    'question_id': question_id,
+                    'answer_id': answer_id,
+                    'is_right': is_right,
+                    'now': datetime.utcnow(),
+                },
             )
-            .scalars()
-            .all()
+            return bool(result.scalar())
+
+
+@cache
+def record_answer_statement() -> TextClause:
+    """Запрос сохранения ответа, см. CRUDUserAnswer.record_answer.
+
+    INSERT диалекта postgresql не попадает в кэш компиляции
+    SQLAlchemy, и запрос из нескольких вставок компилировался бы
+    при каждом ответе. Поэтому он компилируется один раз
+    с именованными параметрами.
+
+    """
+    user_id = bindparam('user_id', type_=Integer)
+    quiz_id = bindparam('quiz_id', type_=Integer)
+    # Значения по умолчанию столбцов модели не попадают в готовый текст
+    now = bindparam('now', type_=DateTime)
+    tg_user_id = (
+        select(TelegramUser.id)
+        .where(
+            TelegramUser.telegram_id
+            == bindparam('telegram_id', type_=BigInteger),
+        )
+        .scalar_subquery()
+    )
+    answer = (
+        insert(UserAnswer)
+        .values(
+            user_id=user_id,
+            tg_user_id=tg_user_id,
+            quiz_id=quiz_id,
+            question_id=bindparam('question_id', type_=Integer),
+            answer_id=bindparam('answer_id', type_=Integer),
+            is_right=bindparam('is_right', type_=Boolean),
+        )
+        .on_conflict_do_nothing(
+            index_elements=['user_id', 'quiz_id', 'question_id'],
+        )
+        .returning(
+            UserAnswer.user_id,
+            UserAnswer.tg_user_id,
+            UserAnswer.question_id,
+            UserAnswer.is_right,
         )
+        .cte('answer')
+    )
+    result_insert = insert(QuizResult).from_select(
+        [
+            'user_id',
+            'tg_user_id',
+            'quiz_id',
+            'total_questions',
+            'correct_answers_count',
+            'is_complete',
+            'created_on',
+            'ended_on',
+        ],
+        select(
+            user_id,
+            tg_user_id,
+            quiz_id,
+            literal_column('1'),
+            cast(answer.c.is_right, Integer),
+            false(),
+            now,
+            now,
+        ),
+    )
+    result = result_insert.on_conflict_do_update(
+        index_elements=['user_id', 'quiz_id'],
+        set_={
+            'total_questions': (
+                QuizResult.total_questions
+                + result_insert.excluded.total_questions
+            ),
+            'correct_answers_count': (
+                QuizResult.correct_answers_count
+                + result_insert.excluded.correct_answers_count
+            ),
+        },
+    ).returning(QuizResult.id).cte('result')
+    statement = (
+        select(func.count())
+        .select_from(answer)
+        .add_cte(result, *answer_statistic_upserts(answer, quiz_id))
+    )
+    return text(
+        str(statement.compile(dialect=postgresql.dialect(paramstyle='named'))),
+    )
 
 
 user_answer_crud = CRUDUserAnswer(UserAnswer)
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import NullPool, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+
+from .settings import Config, settings
+
+ASYNC_DATABASE_URI = make_url(Config.SQLALCHEMY_DATABASE_URI).set(
+    drivername='postgresql+asyncpg',
+)
+
+# Пул соединений живет на цикле событий сервера, им пользуются бот,
+# рассылки и нативные маршруты. Соединения asyncpg привязаны к своему циклу,
+# а async представления flask получают новый цикл на каждый запрос,
+# поэтому они работают через пул синхронной сессии flask. Скрипты
+# и тесты вне uvicorn получают движок без пула.
+_server_engine: Optional[AsyncEngine] = None
+_loop_engines: WeakKeyDictionary[
+    asyncio.AbstractEventLoop,
+    AsyncEngine,
+] = WeakKeyDictionary()
+
+
+def init_async_engine() -> AsyncEngine:
+    """Создать пул соединений на текущем цикле событий сервера."""
+    global _server_engine
+    _server_engine = create_async_engine(
+        ASYNC_DATABASE_URI,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+    _loop_engines[asyncio.get_running_loop()] = _server_engine
+    return _server_engine
+
+
+async def dispose_async_engine() -> None:
+    """Закрыть соединения пула при остановке сервера."""
+    if _server_engine is not None:
+        await _server_engine.dispose()
+
+
+def get_async_engine() -> AsyncEngine:
+    """Движок для текущего цикла событий."""
+    loop = asyncio.get_running_loop()
+    engine = _loop_engines.get(loop)
+    if engine is None:
+        engine = _loop_engines[loop] = create_async_engine(
+            ASYNC_DATABASE_URI,
+            poolclass=NullPool,
+        )
+    return engine
+
+
+def async_session() -> AsyncSession:
+    """Новая асинхронная сессия.
+
+    Объекты остаются доступными после коммита и закрытия сессии,
+    но связи нужно загружать заранее.
+
+    """
+    return AsyncSession(get_async_engine(), expire_on_commit=False)
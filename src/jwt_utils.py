@@ -1,14 +1,19 @@
 from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
-from flask import Response, abort
+from flask import Response, abort, g
 from flask_jwt_extended import (
     JWTManager,
     create_access_token,
+    get_current_user,
     get_jwt,
     get_jwt_identity,
     set_access_cookies,
+    verify_jwt_in_request,
 )
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+from werkzeug.exceptions import HTTPException
 
 from . import app, cache
 from .models.user import User
@@ -84,3 +89,19 @@ def refresh_expiring_jwts(response: Response) -> Response:
         return response
     except (RuntimeError, KeyError):
         return response
+
+
+def get_optional_user() -> Optional[User]:
+    """Пользователь публичной страницы или None, если он не вошел.
+
+    Истекший или неверный токен не мешает показать страницу, она
+    отображается как для гостя. Результат сохраняется на время запроса.
+
+    """
+    if 'optional_user' not in g:
+        try:
+            verify_jwt_in_request(optional=True)
+            g.optional_user = get_current_user()
+        except (JWTExtendedException, PyJWTError, HTTPException):
+            g.optional_user = None
+    return g.optional_user
@@ -0,0 +1,74 @@
+import time
+
+from redis.exceptions import RedisError
+
+from . import app
+from .redis_client import async_redis_client, redis_client, redis_key
+from .settings import settings
+
+# После этого размера из кэша процесса вычищаются устаревшие записи
+LOCAL_CACHE_LIMIT = 100_000
+
+
+class KnownUsers:
+
+    """Множество уже зарегистрированных telegram_id.
+
+    Повторный /start от известного пользователя не обращается к базе.
+    Общий источник — множество в Redis, перед ним стоит кэш процесса
+    с коротким TTL, чтобы удаление профиля в другом процессе
+    учитывалось быстро.
+
+    """
+
+    def __init__(self, local_ttl: int) -> None:
+        """Настраиваем время жизни записей в кэше процесса."""
+        self.local_ttl = local_ttl
+        self.key = redis_key('known_telegram_ids')
+        self._local: dict[int, float] = {}
+
+    async def contains(self, telegram_id: int) -> bool:
+        """Зарегистрирован ли пользователь."""
+        expires_at = self._local.get(telegram_id)
+        if expires_at is not None:
+            if expires_at > time.monotonic():
+                return True
+            del self._local[telegram_id]
+        try:
+            known = await async_redis_client.sismember(self.key, telegram_id)
+        except RedisError as error:
+            app.logger.warning(f'Кэш пользователей недоступен: {error}')
+            return False
+        if known:
+            self._remember(telegram_id)
+        return bool(known)
+
+    async def add(self, telegram_id: int) -> None:
+        """Отметить пользователя как зарегистрированного."""
+        self._remember(telegram_id)
+        try:
+            await async_redis_client.sadd(self.key, telegram_id)
+        except RedisError as error:
+            app.logger.warning(f'Кэш пользователей недоступен: {error}')
+
+    def discard(self, telegram_id: int) -> None:
+        """Убрать пользователя, например после удаления профиля."""
+        self._local.pop(telegram_id, None)
+        try:
+            redis_client.srem(self.key, telegram_id)
+        except RedisError as error:
+            app.logger.warning(f'Кэш пользователей недоступен: {error}')
+
+    def _remember(self, telegram_id: int) -> None:
+        """Запомнить пользователя в кэше процесса."""
+        now = time.monotonic()
+        if len(self._local) >= LOCAL_CACHE_LIMIT:
+            self._local = {
+                key: expires_at
+                for key, expires_at in self._local.items()
+                if expires_at > now
+            }
+        self._local[telegram_id] = now + self.local_ttl
+
+
+known_users = KnownUsers(local_ttl=settings.KNOWN_USERS_LOCAL_TTL)
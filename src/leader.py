@@ -0,0 +1,91 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from redis.exceptions import LockError, RedisError
+
+from . import app
+from .redis_client import async_redis_client, redis_key
+from .settings import settings
+
+LeaderCallback = Callable[[], Awaitable[None]]
+
+
+class LeaderElection:
+
+    """Выбор ведущего процесса среди воркеров и реплик.
+
+    Ведущим становится процесс, захвативший блокировку в Redis.
+    Блокировка живет ttl секунд и продлевается ведущим каждую треть
+    ttl. Остальные процессы с тем же интервалом пытаются ее захватить,
+    поэтому после падения ведущего его место займет другой процесс.
+    При избрании вызываются зарегистрированные разовые задачи.
+
+    """
+
+    def __init__(self, name: str, ttl: int) -> None:
+        """Блокировка не ждет освобождения: захват либо удался, либо нет."""
+        self.ttl = ttl
+        self.lock = async_redis_client.lock(
+            redis_key('leader', name),
+            timeout=ttl,
+            blocking=False,
+        )
+        self.is_leader = False
+        self._callbacks: list[LeaderCallback] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def on_elected(self, callback: LeaderCallback) -> LeaderCallback:
+        """Зарегистрировать задачу, которую выполнит только ведущий."""
+        self._callbacks.append(callback)
+        return callback
+
+    async def start(self) -> None:
+        """Попытаться стать ведущим и следить за блокировкой."""
+        await self._elect()
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        """Освободить блокировку, чтобы ведущим стал другой процесс."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self.is_leader:
+            self.is_leader = False
+            try:
+                await self.lock.release()
+            except (LockError, RedisError) as error:
+                app.logger.warning(f'Не удалось освободить лидерство: {error}')
+
+    async def _elect(self) -> None:
+        """Захватить или продлить блокировку ведущего."""
+        try:
+            if self.is_leader:
+                await self.lock.reacquire()
+                return
+            if not await self.lock.acquire():
+                return
+        except LockError:
+            app.logger.warning('Процесс потерял роль ведущего')
+            self.is_leader = False
+            return
+        except RedisError as error:
+            app.logger.warning(f'Выбор ведущего без Redis: {error}')
+            return
+        self.is_leader = True
+        app.logger.info('Процесс выбран ведущим')
+        for callback in self._callbacks:
+            try:
+                await callback()
+            except Exception:
+                app.logger.exception(
+                    f'Ошибка задачи ведущего {callback.__name__}',
+                )
+
+    async def _watch(self) -> None:
+        """Продлевать блокировку или ждать ее освобождения."""
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            await self._elect()
+
+
+leader = LeaderElection('startup', ttl=settings.LEADER_LOCK_TTL)
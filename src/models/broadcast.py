@@ -0,0 +1,115 @@
+from sqlalchemy import UniqueConstraint
+
+from src import db
+from src.models.base import BaseModel, TimestampMixin
+
+# Статусы рассылки
+BROADCAST_PENDING = 'pending'
+BROADCAST_RUNNING = 'running'
+BROADCAST_FINISHED = 'finished'
+BROADCAST_FAILED = 'failed'
+
+
+class Broadcast(BaseModel, TimestampMixin):
+
+    """Модель рассылки.
+
+    Хранит текст объявления, статус и прогресс отправки. Поле
+    last_recipient_id — контрольная точка: после сбоя рассылка
+    продолжается с получателей, идущих после него.
+
+    """
+
+    __tablename__ = 'broadcasts'
+
+    text = db.Column(
+        db.Text,
+        nullable=False,
+        comment='Текст рассылки.',
+    )
+    quiz_id = db.Column(
+        db.Integer,
+        db.ForeignKey('quizzes.id'),
+        nullable=True,
+        comment='Викторина, которую анонсирует рассылка.',
+    )
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        default=BROADCAST_PENDING,
+        index=True,
+        comment='Статус рассылки.',
+    )
+    total = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='Количество получателей.',
+    )
+    sent_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='Количество доставленных сообщений.',
+    )
+    failed_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='Количество недоставленных сообщений.',
+    )
+    last_recipient_id = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='Идентификатор последнего обработанного получателя.',
+    )
+    ended_on = db.Column(db.DateTime, nullable=True)
+
+    quiz = db.relationship('Quiz')
+
+    @property
+    def progress(self) -> str:
+        """Прогресс рассылки для админ зоны."""
+        return f'{self.sent_count + self.failed_count} / {self.total}'
+
+    def __str__(self) -> str:
+        """Отображение названия объекта в админ зоне."""
+        return self.text[:30]
+
+
+class BroadcastDelivery(BaseModel):
+
+    """Модель статуса доставки рассылки одному получателю."""
+
+    __tablename__ = 'broadcast_deliveries'
+
+    broadcast_id = db.Column(
+        db.Integer,
+        db.ForeignKey('broadcasts.id', ondelete='CASCADE'),
+        nullable=False,
+        comment='Идентификатор рассылки.',
+    )
+    tg_user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('telegram_users.id'),
+        nullable=False,
+        comment='Идентификатор телеграм пользователя.',
+    )
+    is_delivered = db.Column(
+        db.Boolean,
+        nullable=False,
+        comment='Флаг успешной доставки.',
+    )
+    error = db.Column(
+        db.String(255),
+        nullable=True,
+        comment='Текст ошибки Telegram.',
+    )
+    __table_args__ = (
+        UniqueConstraint(
+            'broadcast_id',
+            'tg_user_id',
+            name='_broadcast_recipient_uc',
+        ),
+    )
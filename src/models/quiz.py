@@ -40,6 +40,7 @@ class Quiz(BaseModel, IsActiveMixin):
         secondary=quiz_questions,
         back_populates='quizzes',
         lazy='subquery',
+        order_by=(quiz_questions.c.position, quiz_questions.c.question_id),
     )
 
     # Связь с таблицей результатов викторины
@@ -15,4 +15,12 @@ quiz_questions = db.Table(
         db.ForeignKey('questions.id'),
         primary_key=True,
     ),
+    db.Column(
+        'position',
+        db.Integer,
+        nullable=False,
+        server_default='0',
+        comment='Порядковый номер вопроса в викторине, 0 — еще не задан.',
+    ),
+    db.Index('ix_quiz_questions_quiz_position', 'quiz_id', 'position'),
 )
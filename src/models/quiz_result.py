@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from sqlalchemy import UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 
 from src import db
 from src.models.base import BaseModel, TimestampMixin
@@ -52,6 +53,15 @@ class QuizResult(BaseModel, TimestampMixin):
     )
 
     ended_on = db.Column(db.DateTime, default=datetime.utcnow)
+    # Разбор завершенной викторины для страницы результатов,
+    # загружается только по запросу
+    breakdown = db.deferred(
+        db.Column(
+            JSONB,
+            nullable=True,
+            comment='Разбор ответов завершенной викторины.',
+        ),
+    )
 
     __table_args__ = (
         UniqueConstraint(
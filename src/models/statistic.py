@@ -0,0 +1,170 @@
+from sqlalchemy import ColumnElement, Numeric
+
+from src import db
+
+# Выражение correct_percentage() для индекса в том виде, в котором
+# его возвращает postgres: так автогенерация миграций не считает
+# индекс измененным и не пересоздает его
+CORRECT_PERCENTAGE_INDEX = (
+    'COALESCE(round(100.0 * correct_answers::numeric / '
+    'NULLIF(total_answers, 0)::numeric, 2), 0::numeric)'
+)
+
+
+def correct_percentage(
+    total_answers: ColumnElement[int],
+    correct_answers: ColumnElement[int],
+) -> ColumnElement:
+    """Процент правильных ответов, 0 без ответов."""
+    return db.func.coalesce(
+        db.func.round(
+            100.0 * correct_answers / db.func.nullif(total_answers, 0),
+            2,
+            type_=Numeric,
+        ),
+        0,
+    )
+
+
+class AnswerStatisticMixin:
+
+    """Миксин счетчиков ответов для таблиц статистики.
+
+    Строка статистики создается триггером базы вместе с объектом,
+    поэтому списки присоединяют таблицу статистики без outer join
+    и сортируются по индексам счетчиков, см. CRUDStatistic.sort_keys.
+
+    """
+
+    __abstract__ = True
+    total_answers = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='Количество ответов.',
+    )
+    correct_answers = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='Количество правильных ответов.',
+    )
+
+
+class QuestionStatistic(db.Model, AnswerStatisticMixin):
+
+    """Модель статистики ответов на вопрос.
+
+    Обновляется при сохранении каждого ответа.
+
+    """
+
+    __tablename__ = 'question_statistics'
+
+    question_id = db.Column(
+        db.Integer,
+        db.ForeignKey('questions.id', ondelete='CASCADE'),
+        primary_key=True,
+        comment='Идентификатор вопроса.',
+    )
+
+
+class QuizStatistic(db.Model, AnswerStatisticMixin):
+
+    """Модель статистики ответов в викторине.
+
+    Обновляется при сохранении каждого ответа.
+
+    """
+
+    __tablename__ = 'quiz_statistics'
+
+    quiz_id = db.Column(
+        db.Integer,
+        db.ForeignKey('quizzes.id', ondelete='CASCADE'),
+        primary_key=True,
+        comment='Идентификатор викторины.',
+    )
+
+
+class CategoryStatistic(db.Model, AnswerStatisticMixin):
+
+    """Модель статистики ответов на вопросы рубрики.
+
+    Обновляется при сохранении каждого ответа.
+
+    """
+
+    __tablename__ = 'category_statistics'
+
+    category_id = db.Column(
+        db.Integer,
+        db.ForeignKey('categories.id', ondelete='CASCADE'),
+        primary_key=True,
+        comment='Идентификатор рубрики.',
+    )
+
+
+class UserStatistic(db.Model, AnswerStatisticMixin):
+
+    """Модель итогов пользователя по его текущим результатам викторин.
+
+    Обновляется при сохранении каждого ответа и при перезапуске
+    викторины, когда результат отвязывается от пользователя.
+
+    """
+
+    __tablename__ = 'user_statistics'
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True,
+        comment='Идентификатор пользователя.',
+    )
+
+
+class TelegramUserStatistic(db.Model, AnswerStatisticMixin):
+
+    """Модель статистики всех ответов пользователя Telegram.
+
+    Обновляется при сохранении каждого ответа.
+
+    """
+
+    __tablename__ = 'telegram_user_statistics'
+
+    tg_user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('telegram_users.id', ondelete='CASCADE'),
+        primary_key=True,
+        comment='Идентификатор телеграм пользователя.',
+    )
+
+
+def add_sort_indexes(model: type[AnswerStatisticMixin]) -> None:
+    """Индексы сортировки списков по счетчикам статистики.
+
+    ID объекта в конце индекса делает ключ сортировки уникальным,
+    как того требует курсор страниц.
+
+    """
+    table = model.__table__
+    key = table.primary_key.columns[0]
+    columns = {
+        'total_answers': table.c.total_answers,
+        'correct_answers': table.c.correct_answers,
+        'correct_percentage': db.text(CORRECT_PERCENTAGE_INDEX),
+    }
+    for name, column in columns.items():
+        db.Index(f'ix_{table.name}_{name}', column, key)
+
+
+for statistic_model in (
+    QuestionStatistic,
+    QuizStatistic,
+    CategoryStatistic,
+    UserStatistic,
+    TelegramUserStatistic,
+):
+    add_sort_indexes(statistic_model)
@@ -16,7 +16,7 @@ class User(BaseModel, TimestampMixin, IsActiveMixin):
 
     name = db.Column(db.String)
     username = db.Column(db.String, unique=True)
-    telegram_id = db.Column(db.BigInteger)
+    telegram_id = db.Column(db.BigInteger, unique=True, index=True)
     updated_on = db.Column(
         db.DateTime(),
         default=datetime.utcnow,
@@ -0,0 +1,77 @@
+from http import HTTPStatus
+from typing import Callable
+
+from aiogram.types import Update
+from pydantic import ValidationError
+
+from . import app, bot
+from .outbound import outbound_limiter
+from .router import Request, Response, router
+from .settings import settings
+from .update_dedup import update_dedup
+from .update_lanes import SubmitResult, lane_scheduler
+from .update_queue import update_queue
+
+
+async def enqueue(
+    update: Update,
+    submit: Callable[[Update], SubmitResult],
+) -> Response:
+    """Отвечаем сразу, обновление обработают в фоне.
+
+    Если очередь заполнена или остановлена, просим Telegram повторить
+    обновление позже. Обновление сверх лимита очереди пользователя
+    отбрасывается с ответом 200: повторы Telegram задержали бы
+    обновления остальных пользователей, а отметка о дубле остается.
+
+    """
+    if submit(update) is SubmitResult.REJECTED:
+        app.logger.warning(f'Обновление {update.update_id} отклонено')
+        await update_dedup.forget(update.update_id)
+        return Response(status=HTTPStatus.SERVICE_UNAVAILABLE)
+    return Response()
+
+
+@router.post(settings.WEBHOOK_PATH)
+async def webhook(request: Request) -> Response:
+    """Получаем от тг обновления и передаем в бота."""
+    try:
+        update: Update = Update.model_validate_json(
+            await request.body(),
+            context={'bot': bot.bot},
+        )
+    except ValidationError:
+        return Response(status=HTTPStatus.BAD_REQUEST)
+    if await update_dedup.is_duplicate(update.update_id):
+        app.logger.info(f'Повтор обновления {update.update_id} отброшен')
+        return Response()
+    # Полосы сами ограничивают очередь каждого пользователя, поэтому
+    # при включенных полосах очередь вебхука не используется
+    if lane_scheduler.enabled and lane_scheduler.running:
+        return await enqueue(update, lane_scheduler.submit)
+    if update_queue.enabled and update_queue.running:
+        return await enqueue(update, update_queue.submit)
+    try:
+        with app.app_context():
+            await bot.feed_update(update)
+    except Exception:
+        # Telegram повторит обновление, его нельзя считать дублем
+        await update_dedup.forget(update.update_id)
+        app.logger.exception(
+            f'Ошибка обработки обновления {update.update_id}',
+        )
+        return Response(status=HTTPStatus.INTERNAL_SERVER_ERROR)
+    return Response()
+
+
+@router.get(f'{settings.WEBHOOK_PATH}/stats')
+async def webhook_stats(request: Request) -> Response:
+    """Метрики обработки обновлений и исходящих сообщений бота."""
+    return Response.json(
+        {
+            'queue': update_queue.stats(),
+            'lanes': lane_scheduler.stats(),
+            'dedup': update_dedup.stats(),
+            'outbound': outbound_limiter.stats(),
+        },
+    )
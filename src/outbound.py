@@ -0,0 +1,308 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from . import app
+from .settings import settings
+
+# Приоритеты исходящих сообщений: меньше — раньше
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 10
+
+# Приоритет запросов текущей задачи. Ответы пользователям идут
+# с высоким приоритетом, массовые рассылки понижают его.
+outbound_priority: ContextVar[int] = ContextVar(
+    'outbound_priority',
+    default=PRIORITY_HIGH,
+)
+
+# После этого размера из словаря удаляются простаивающие ведра чатов
+CHAT_BUCKETS_LIMIT = 10_000
+
+ChatId = Union[int, str]
+
+
+class TokenBucket:
+
+    """Ведро токенов с резервированием.
+
+    Токен можно взять в долг: reserve() уводит баланс в минус
+    и возвращает, сколько нужно подождать, пока долг не восполнится.
+    Так ожидающие обслуживаются в порядке резервирования.
+
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Ведро пополняется на rate токенов в секунду до capacity."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """Начислить токены за прошедшее время."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.rate,
+        )
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        """Взять токен и вернуть задержку в секундах до его готовности."""
+        self._refill()
+        self.tokens -= 1
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Не выдавать токены ближайшие seconds секунд."""
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+    @property
+    def idle(self) -> bool:
+        """Ведро полное, его можно пересоздать без потери состояния."""
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class OutboundMetrics:
+
+    """Метрики исходящих запросов к Bot API."""
+
+    def __init__(self) -> None:
+        """Обнуляем счетчики."""
+        self.sent = 0
+        self.waits = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failed = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def observe_wait(self, wait_time: float, throttled: bool) -> None:
+        """Учесть время ожидания токена."""
+        self.waits += 1
+        if throttled:
+            self.throttled += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+
+class OutboundLimiter:
+
+    """Ограничитель исходящих сообщений.
+
+    Сначала запрос ждет токен ведра своего чата, затем встает
+    в очередь с приоритетом за токеном общего ведра бота.
+
+    Очередь и ведра живут на цикле событий бота (см. attach()):
+    запросы с других циклов ждут разрешения, выданного на нем.
+
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_rate: float,
+        chat_burst: float,
+    ) -> None:
+        """Настраиваем общее ведро и параметры ведер чатов."""
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chat_buckets: dict[ChatId, TokenBucket] = {}
+        self.metrics = OutboundMetrics()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Привязать очередь к циклу событий бота."""
+        self._loop = loop
+
+    def chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        """Ведро токенов чата."""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= CHAT_BUCKETS_LIMIT:
+                self.chat_buckets = {
+                    key: value
+                    for key, value in self.chat_buckets.items()
+                    if not value.idle
+                }
+            bucket = self.chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate,
+                self.chat_burst,
+            )
+        return bucket
+
+    async def acquire(self, chat_id: ChatId, priority: int) -> None:
+        """Дождаться разрешения на отправку в чат."""
+        loop = self._loop
+        if (
+            loop is not None
+            and loop.is_running()
+            and loop is not asyncio.get_running_loop()
+        ):
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(
+                    self._acquire(chat_id, priority),
+                    loop,
+                ),
+            )
+            return
+        await self._acquire(chat_id, priority)
+
+    async def _acquire(self, chat_id: ChatId, priority: int) -> None:
+        """Дождаться разрешения на цикле событий очереди."""
+        started_at = time.monotonic()
+        delay = self.chat_bucket(chat_id).reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters,
+            (priority, next(self._sequence), waiter),
+        )
+        # Без привязки к циклу бота задача выдачи могла остаться
+        # на уже закрытом цикле, тогда она создается заново
+        if (
+            self._pump_task is None
+            or self._pump_task.done()
+            or self._pump_task.get_loop() is not waiter.get_loop()
+        ):
+            self._pump_task = asyncio.create_task(self._pump())
+        global_delay = await waiter
+        self.metrics.observe_wait(
+            time.monotonic() - started_at,
+            throttled=bool(delay or global_delay),
+        )
+
+    async def _pump(self) -> None:
+        """Выдавать токены общего ведра ожидающим по приоритету."""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done() or waiter.get_loop().is_closed():
+                continue
+            delay = self.global_bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            resolve(waiter, delay)
+
+    def pause(self, chat_id: ChatId, seconds: float) -> None:
+        """Приостановить отправку после ответа 429.
+
+        Telegram не сообщает, превышен ли лимит чата или общий лимит
+        бота. Темп чатов и так держится ниже их лимита, поэтому 429
+        скорее означает общий лимит: пауза ставится и на ведро чата,
+        и на общее ведро.
+
+        """
+        self.chat_bucket(chat_id).pause(seconds)
+        self.global_bucket.pause(seconds)
+
+    def stats(self) -> dict:
+        """Метрики для мониторинга."""
+        metrics = self.metrics
+        return {
+            'queue': len(self._waiters),
+            'sent': metrics.sent,
+            'waits': metrics.waits,
+            'throttled': metrics.throttled,
+            'retries': metrics.retries,
+            'failed': metrics.failed,
+            'wait_time_avg': (
+                round(metrics.wait_time_total / metrics.waits, 4)
+                if metrics.waits
+                else 0
+            ),
+            'wait_time_max': round(metrics.wait_time_max, 4),
+            'chats': len(self.chat_buckets),
+        }
+
+
+def resolve(waiter: asyncio.Future, delay: float) -> None:
+    """Выдать разрешение ожидающему на его цикле событий."""
+    loop = waiter.get_loop()
+    if loop is asyncio.get_running_loop():
+        if not waiter.done():
+            waiter.set_result(delay)
+        return
+    try:
+        loop.call_soon_threadsafe(
+            lambda: waiter.done() or waiter.set_result(delay),
+        )
+    except RuntimeError:
+        # Цикл закрылся, ожидающего больше нет
+        pass
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+
+    """Middleware сессии бота: темп отправки и повтор после 429.
+
+    Ограничиваются только методы с chat_id (отправка и редактирование
+    сообщений). На ответ TelegramRetryAfter отправка приостанавливается
+    на retry_after секунд, и запрос повторяется.
+
+    """
+
+    def __init__(self, limiter: OutboundLimiter, max_retries: int) -> None:
+        """Сохраняем ограничитель и число повторов."""
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        """Отправить запрос с учетом ограничений."""
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await make_request(bot, method)
+        attempt = 0
+        while True:
+            await self.limiter.acquire(chat_id, outbound_priority.get())
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                if attempt >= self.max_retries:
+                    self.limiter.metrics.failed += 1
+                    raise
+                attempt += 1
+                self.limiter.metrics.retries += 1
+                self.limiter.pause(chat_id, error.retry_after)
+                app.logger.warning(
+                    f'Telegram просит подождать {error.retry_after} с '
+                    f'перед отправкой в чат {chat_id}',
+                )
+                continue
+            self.limiter.metrics.sent += 1
+            return response
+
+
+outbound_limiter = OutboundLimiter(
+    global_rate=settings.OUTBOUND_GLOBAL_RATE,
+    chat_rate=settings.OUTBOUND_CHAT_RATE,
+    chat_burst=settings.OUTBOUND_CHAT_BURST,
+)
+rate_limit_middleware = RateLimitMiddleware(
+    outbound_limiter,
+    max_retries=settings.OUTBOUND_MAX_RETRIES,
+)
@@ -0,0 +1,263 @@
+import base64
+import hashlib
+import json
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Optional, Sequence
+
+from flask import request
+from flask_sqlalchemy.pagination import Pagination, QueryPagination
+from sqlalchemy import ColumnElement, text, tuple_
+from sqlalchemy.orm import Query
+
+from . import cache, db
+from .settings import settings
+
+# Оценка числа строк таблицы по статистике планировщика
+ESTIMATE_STATEMENT = text(
+    'SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)',
+)
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Курсор страницы по значениям ключа сортировки строки."""
+    return base64.urlsafe_b64encode(
+        json.dumps(list(values), default=str).encode(),
+    ).decode()
+
+
+def to_int(value: Any) -> int:
+    """Целое значение ключа из курсора."""
+    if type(value) is not int:
+        raise ValueError(value)
+    return value
+
+
+def to_decimal(value: Any) -> Decimal:
+    """Дробное значение ключа, в курсоре оно записано строкой."""
+    if type(value) not in (int, str):
+        raise ValueError(value)
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(value)
+    if not number.is_finite():
+        raise ValueError(value)
+    return number
+
+
+def to_str(value: Any) -> str:
+    """Строковое значение ключа из курсора."""
+    if not isinstance(value, str):
+        raise ValueError(value)
+    return value
+
+
+# Проверка значений курсора по типу столбца ключа
+CURSOR_TYPES: dict[type, Callable[[Any], Any]] = {
+    int: to_int,
+    Decimal: to_decimal,
+    str: to_str,
+}
+
+
+def decode_cursor(
+    cursor: Optional[str],
+    keys: Sequence[ColumnElement],
+) -> Optional[list]:
+    """Значения ключа сортировки из курсора или None, если он неверный.
+
+    Значения приводятся к типам столбцов ключа, чтобы подделанный
+    курсор не ломал запрос, а страница открывалась по номеру.
+
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(keys):
+        return None
+    try:
+        return [
+            CURSOR_TYPES[key.type.python_type](value)
+            for key, value in zip(keys, values)
+        ]
+    except (KeyError, NotImplementedError, ValueError):
+        return None
+
+
+class KeysetPagination(QueryPagination):
+
+    """Пагинация списка по ключу сортировки вместо OFFSET.
+
+    Соседние страницы запрашиваются по курсору — значениям ключа
+    первой или последней строки текущей страницы в параметрах before
+    и after, поэтому глубина страницы не влияет на время запроса.
+    Переход на произвольный номер без курсора остается запросом
+    с OFFSET. Лишняя строка в запросе показывает, есть ли следующая
+    страница, а число строк нужно только для номеров страниц: оно
+    кэшируется, а для списков без фильтров берется из оценки
+    планировщика.
+
+    Ключ сортировки должен быть уникальным, обычно последний его
+    столбец — ID. Все столбцы ключа сортируются в одну сторону.
+
+    """
+
+    def _query_items(self) -> list[Any]:
+        """Строки страницы по курсору или по номеру страницы."""
+        keys = self._query_args['keys']
+        descending = self._query_args['descending']
+        after = decode_cursor(self._query_args['after'], keys)
+        before = decode_cursor(self._query_args['before'], keys)
+        self._backward = after is None and before is not None
+
+        query = self._query_args['query'].add_columns(
+            *(key.label(f'keyset_{index}') for index, key in enumerate(keys)),
+        )
+        # Назад по курсору before — обратный порядок и разворот строк
+        reverse = descending != self._backward
+        cursor = after if after is not None else before
+        if cursor is not None:
+            query = query.filter(
+                tuple_(*keys) < tuple_(*cursor)
+                if reverse
+                else tuple_(*keys) > tuple_(*cursor),
+            )
+        query = query.order_by(
+            *(key.desc() if reverse else key.asc() for key in keys),
+        )
+        if cursor is None:
+            query = query.offset(self._query_offset)
+        rows = query.limit(self.per_page + 1).all()
+
+        self._has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if self._backward:
+            rows.reverse()
+        if not rows:
+            self._first_key = self._last_key = None
+            return []
+        self._first_key = tuple(rows[0][-len(keys):])
+        self._last_key = tuple(rows[-1][-len(keys):])
+        fields = rows[0]._fields[:-len(keys)]
+        if len(fields) == 1:
+            return [row[0] for row in rows]
+        # Строки без столбцов ключа, с доступом к столбцам по имени
+        item = namedtuple('Item', fields, rename=True)
+        return [item(*row[:-len(keys)]) for row in rows]
+
+    def _query_count(self) -> int:
+        """Число строк списка: оценка или кэшированный подсчет."""
+        query = self._query_args['query']
+        total = self._estimate(query)
+        if total is not None:
+            return total
+        statement = query.statement.compile()
+        key = 'pagination_count_' + hashlib.md5(
+            f'{statement}{sorted(statement.params.items())}'.encode(),
+        ).hexdigest()
+        total = cache.get(key)
+        if total is None:
+            total = query.order_by(None).count()
+            cache.set(
+                key,
+                total,
+                timeout=settings.PAGINATION_COUNT_CACHE_TTL,
+            )
+        return total
+
+    @staticmethod
+    def _estimate(query: Query) -> Optional[int]:
+        """Оценка числа строк большого списка без фильтров.
+
+        Присоединенные таблицы не должны менять число строк, как
+        таблицы статистики с ключом по ID объекта списка.
+
+        """
+        if query.whereclause is not None:
+            return None
+        table = query.column_descriptions[0]['entity'].__table__
+        reltuples = db.session.execute(
+            ESTIMATE_STATEMENT,
+            {'table': table.name},
+        ).scalar()
+        if reltuples is None or reltuples < (
+            settings.PAGINATION_ESTIMATE_MIN_ROWS
+        ):
+            return None
+        return int(reltuples)
+
+    @property
+    def pages(self) -> int:
+        """Число страниц, не меньше известных по курсору."""
+        return max(super().pages, self.page + self.has_next)
+
+    @property
+    def has_next(self) -> bool:
+        """Есть ли следующая страница, по лишней строке запроса."""
+        return self._backward or self._has_more
+
+    def url_args(self, page: int) -> dict[str, Any]:
+        """Параметры ссылки на страницу для шаблона пагинации.
+
+        Ссылки на соседние страницы передают курсор, на остальные —
+        только номер страницы.
+
+        """
+        if page == self.page + 1 and self._last_key:
+            return {'page': page, 'after': encode_cursor(self._last_key)}
+        if page == self.page - 1 and page > 1 and self._first_key:
+            return {'page': page, 'before': encode_cursor(self._first_key)}
+        return {'page': page}
+
+
+class ListPagination(Pagination):
+
+    """Пагинация готового списка в памяти."""
+
+    def _query_items(self) -> list[Any]:
+        """Элементы страницы."""
+        offset = self._query_offset
+        return list(self._query_args['items'][offset:offset + self.per_page])
+
+    def _query_count(self) -> int:
+        """Число элементов списка."""
+        return len(self._query_args['items'])
+
+
+def keyset_paginate(
+    query: Query,
+    keys: Sequence[ColumnElement],
+    page: int,
+    per_page: int,
+    descending: bool = False,
+) -> KeysetPagination:
+    """Страница списка по ключу сортировки.
+
+    Args:
+    ----
+        query (Query): Запрос списка без сортировки.
+        keys (Sequence[ColumnElement]): Уникальный ключ сортировки.
+        page (int): Номер страницы.
+        per_page (int): Число строк на странице.
+        descending (bool): Сортировать по убыванию.
+
+    Returns:
+    -------
+        KeysetPagination: Страница с курсорами соседних страниц
+        из параметров after и before запроса.
+
+    """
+    return KeysetPagination(
+        page=page,
+        per_page=per_page,
+        error_out=False,
+        query=query,
+        keys=list(keys),
+        descending=descending,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+    )
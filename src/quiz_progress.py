@@ -0,0 +1,132 @@
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from . import app
+from .crud.user_answer import user_answer_crud
+from .quiz_snapshot import CompiledQuiz, QuestionSnapshot, quiz_snapshots
+from .redis_client import redis_client, redis_key
+from .settings import settings
+
+# Сдвинуть курсор, если он стоит на отвеченном вопросе. Иначе
+# (ответ не по порядку) курсор сбрасывается и будет пересчитан.
+ADVANCE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+redis.call('DEL', KEYS[1])
+return 0
+"""
+
+
+class QuizProgress:
+
+    """Курсор прогресса пользователя по викторине.
+
+    Порядок вопросов задает позиция в quiz_questions, снимок
+    викторины хранит вопросы в этом порядке. Курсор — позиция
+    следующего вопроса в снимке вместе с версией снимка, вида
+    "версия:позиция". Версия викторины и курсор читаются одним MGET,
+    вопрос берется из снимка, поэтому следующий вопрос находится
+    за постоянное время. Курсор другой версии или отсутствующий
+    пересчитывается по ответам в базе.
+    Без Redis позиция считается по базе на каждый запрос.
+
+    """
+
+    def __init__(self, ttl: int) -> None:
+        """Настраиваем время жизни курсоров."""
+        self.ttl = ttl
+        self._advance = redis_client.register_script(ADVANCE_SCRIPT)
+        self.rebuilds = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def _key(user_id: int, quiz_id: int) -> str:
+        """Ключ курсора пользователя."""
+        return redis_key('progress', user_id, quiz_id)
+
+    async def next_question(
+        self,
+        user_id: int,
+        quiz_id: int,
+    ) -> Optional[QuestionSnapshot]:
+        """Следующий неотвеченный вопрос или None, если викторина пройдена."""
+        key = self._key(user_id, quiz_id)
+        try:
+            version, cursor = redis_client.mget(
+                quiz_snapshots.version_key(quiz_id),
+                key,
+            )
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Прогресс викторины без Redis: {error}')
+            quiz = await quiz_snapshots.get(quiz_id)
+            if quiz is None:
+                return None
+            return quiz.question_at(await self._position(user_id, quiz))
+        quiz = await quiz_snapshots.get(
+            quiz_id,
+            int(version) if version is not None else None,
+        )
+        if quiz is None:
+            return None
+        cursor_version, _, position = (cursor or b'').decode().partition(':')
+        if cursor_version == str(quiz.version):
+            return quiz.question_at(int(position))
+        position = await self._position(user_id, quiz)
+        try:
+            redis_client.set(key, f'{quiz.version}:{position}', ex=self.ttl)
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Не удалось сохранить курсор: {error}')
+        return quiz.question_at(position)
+
+    def advance(
+        self,
+        user_id: int,
+        quiz: CompiledQuiz,
+        question_id: int,
+    ) -> None:
+        """Учесть сохраненный ответ пользователя."""
+        position = quiz.positions[question_id]
+        try:
+            self._advance(
+                keys=[self._key(user_id, quiz.id)],
+                args=[
+                    f'{quiz.version}:{position}',
+                    f'{quiz.version}:{position + 1}',
+                    self.ttl,
+                ],
+            )
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Не удалось сдвинуть курсор: {error}')
+
+    def reset(self, user_id: int, quiz_id: int) -> None:
+        """Начать викторину заново."""
+        try:
+            redis_client.delete(self._key(user_id, quiz_id))
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Не удалось сбросить курсор: {error}')
+
+    async def _position(self, user_id: int, quiz: CompiledQuiz) -> int:
+        """Позиция первого неотвеченного вопроса по ответам в базе."""
+        self.rebuilds += 1
+        answered = await user_answer_crud.get_answer_ids_by_question(
+            user_id=user_id,
+            quiz_id=quiz.id,
+        )
+        return next(
+            (
+                position
+                for position, question in enumerate(quiz.snapshot.questions)
+                if question.id not in answered
+            ),
+            len(quiz.snapshot.questions),
+        )
+
+
+quiz_progress = QuizProgress(ttl=settings.QUIZ_PROGRESS_TTL)
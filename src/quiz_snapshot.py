@@ -0,0 +1,269 @@
+import secrets
+from collections import OrderedDict
+from typing import Optional
+
+import msgspec
+from redis.exceptions import RedisError
+
+from . import app
+from .crud.quiz import quiz_crud
+from .redis_client import redis_client, redis_key
+from .settings import settings
+
+# Разрядность случайной версии снимка
+VERSION_BITS = 62
+
+
+class VariantSnapshot(msgspec.Struct, frozen=True):
+
+    """Вариант ответа в снимке викторины."""
+
+    id: int
+    question_id: int
+    title: str
+    description: Optional[str]
+    is_right_choice: bool
+
+
+class QuestionSnapshot(msgspec.Struct, frozen=True):
+
+    """Вопрос в снимке викторины."""
+
+    id: int
+    title: str
+    has_image: bool
+    variants: tuple[VariantSnapshot, ...]
+
+
+class QuizSnapshot(msgspec.Struct, frozen=True):
+
+    """Неизменяемый снимок викторины определенной версии."""
+
+    id: int
+    title: str
+    version: int
+    # Активные вопросы в порядке прохождения
+    questions: tuple[QuestionSnapshot, ...]
+    # ID вопроса -> ID правильного варианта
+    correct_variants: dict[int, int]
+
+
+class CompiledQuiz:
+
+    """Снимок викторины с индексами для поиска за O(1)."""
+
+    def __init__(self, snapshot: QuizSnapshot) -> None:
+        """Строим индексы вопросов и вариантов."""
+        self.snapshot = snapshot
+        self.questions = {
+            question.id: question for question in snapshot.questions
+        }
+        self.positions = {
+            question.id: position
+            for position, question in enumerate(snapshot.questions)
+        }
+        self.variants = {
+            variant.id: variant
+            for question in snapshot.questions
+            for variant in question.variants
+        }
+
+    @property
+    def id(self) -> int:
+        """ID викторины."""
+        return self.snapshot.id
+
+    @property
+    def title(self) -> str:
+        """Название викторины."""
+        return self.snapshot.title
+
+    @property
+    def version(self) -> int:
+        """Версия снимка."""
+        return self.snapshot.version
+
+    def question_at(self, position: int) -> Optional[QuestionSnapshot]:
+        """Вопрос по порядковому номеру или None после последнего."""
+        if position < len(self.snapshot.questions):
+            return self.snapshot.questions[position]
+        return None
+
+    def grade(
+        self,
+        question_id: int,
+        answer_id: int,
+    ) -> Optional[VariantSnapshot]:
+        """Выбранный вариант или None, если он не относится к вопросу."""
+        variant = self.variants.get(answer_id)
+        if variant is None or variant.question_id != question_id:
+            return None
+        if question_id not in self.questions:
+            return None
+        return variant
+
+    def correct_variant(self, question_id: int) -> Optional[VariantSnapshot]:
+        """Правильный вариант ответа на вопрос."""
+        return self.variants.get(
+            self.snapshot.correct_variants.get(question_id),
+        )
+
+
+class QuizSnapshotCache:
+
+    """Кэш скомпилированных викторин.
+
+    Снимок викторины собирается из базы один раз на версию, хранится
+    в Redis в msgpack и в LRU процесса. Версия викторины — случайное
+    число в Redis, его заменяет админка при изменении викторины или
+    вопроса, поэтому все процессы сразу переходят на новый снимок,
+    а старые ключи истекают по TTL. При недоступности Redis снимок
+    собирается из базы на каждый запрос.
+
+    Версии не повторяются: если ключ версии вытеснен или Redis
+    очищен, выбирается новая случайная версия, и LRU процесса
+    не отдаст снимок, собранный до изменения викторины.
+
+    """
+
+    def __init__(self, ttl: int, lru_size: int) -> None:
+        """Настраиваем TTL снимков в Redis и размер LRU процесса."""
+        self.ttl = ttl
+        self.lru_size = lru_size
+        self._local: OrderedDict[tuple[int, int], CompiledQuiz] = (
+            OrderedDict()
+        )
+        self._encoder = msgspec.msgpack.Encoder()
+        self._decoder = msgspec.msgpack.Decoder(QuizSnapshot)
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.builds = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def version_key(quiz_id: int) -> str:
+        """Ключ Redis с версией викторины."""
+        return redis_key('quiz_version', quiz_id)
+
+    def current_version(self, quiz_id: int) -> int:
+        """Текущая версия викторины, новая при отсутствии ключа."""
+        key = self.version_key(quiz_id)
+        version = redis_client.get(key)
+        if version is not None:
+            return int(version)
+        version = new_version()
+        # Версию могли одновременно выбрать другие процессы
+        if redis_client.set(key, version, nx=True):
+            return version
+        return int(redis_client.get(key))
+
+    async def get(
+        self,
+        quiz_id: int,
+        version: Optional[int] = None,
+    ) -> Optional[CompiledQuiz]:
+        """Снимок викторины текущей (или заданной) версии."""
+        try:
+            if version is None:
+                version = self.current_version(quiz_id)
+            compiled = self._local.get((quiz_id, version))
+            if compiled is not None:
+                self._local.move_to_end((quiz_id, version))
+                self.local_hits += 1
+                return compiled
+            data = redis_client.get(redis_key('quiz', quiz_id, version))
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Снимок викторины без Redis: {error}')
+            snapshot = await self._build(quiz_id, version or 0)
+            return CompiledQuiz(snapshot) if snapshot else None
+        if data is not None:
+            self.shared_hits += 1
+            snapshot = self._decoder.decode(data)
+        else:
+            snapshot = await self._build(quiz_id, version)
+            if snapshot is None:
+                return None
+            try:
+                redis_client.set(
+                    redis_key('quiz', quiz_id, version),
+                    self._encoder.encode(snapshot),
+                    ex=self.ttl,
+                )
+            except RedisError as error:
+                self.redis_errors += 1
+                app.logger.warning(f'Не удалось сохранить снимок: {error}')
+        compiled = self._local[(quiz_id, version)] = CompiledQuiz(snapshot)
+        if len(self._local) > self.lru_size:
+            self._local.popitem(last=False)
+        return compiled
+
+    def invalidate(self, quiz_id: int) -> None:
+        """Викторина изменилась: следующий запрос соберет новый снимок."""
+        try:
+            redis_client.set(self.version_key(quiz_id), new_version())
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Не удалось сменить версию викторины: {error}')
+
+    async def _build(
+        self,
+        quiz_id: int,
+        version: int,
+    ) -> Optional[QuizSnapshot]:
+        """Собрать снимок викторины из базы."""
+        self.builds += 1
+        rows = await quiz_crud.get_snapshot_rows(quiz_id)
+        if rows is None:
+            return None
+        quiz, questions, variants = rows
+        variants_by_question: dict[int, list[VariantSnapshot]] = {}
+        correct_variants = {}
+        for variant in variants:
+            variants_by_question.setdefault(variant.question_id, []).append(
+                VariantSnapshot(
+                    id=variant.id,
+                    question_id=variant.question_id,
+                    title=variant.title,
+                    description=variant.description,
+                    is_right_choice=bool(variant.is_right_choice),
+                ),
+            )
+            if variant.is_right_choice:
+                correct_variants[variant.question_id] = variant.id
+        return QuizSnapshot(
+            id=quiz.id,
+            title=quiz.title,
+            version=version,
+            questions=tuple(
+                QuestionSnapshot(
+                    id=question.id,
+                    title=question.title,
+                    has_image=question.has_image,
+                    variants=tuple(variants_by_question.get(question.id, ())),
+                )
+                for question in questions
+            ),
+            correct_variants=correct_variants,
+        )
+
+    def stats(self) -> dict:
+        """Счетчики кэша."""
+        return {
+            'local': len(self._local),
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'builds': self.builds,
+            'redis_errors': self.redis_errors,
+        }
+
+
+def new_version() -> int:
+    """Случайная версия снимка, не совпадающая с прежними."""
+    return secrets.randbits(VERSION_BITS)
+
+
+quiz_snapshots = QuizSnapshotCache(
+    ttl=settings.QUIZ_SNAPSHOT_TTL,
+    lru_size=settings.QUIZ_SNAPSHOT_LRU_SIZE,
+)
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, Optional
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.lock import Lock
+
+from .settings import settings
+
+REDIS_OPTIONS = {
+    'host': settings.REDIS_HOST,
+    'port': settings.REDIS_PORT,
+    'db': settings.REDIS_DB,
+    'username': settings.REDIS_USER,
+    'password': settings.REDIS_PASSWORD,
+}
+
+# Синхронный клиент для flask представлений и админки
+redis_client: Redis = Redis(**REDIS_OPTIONS)
+
+
+class LoopBoundRedis:
+
+    """Асинхронный клиент Redis, отдельный для каждого цикла событий.
+
+    Соединения redis.asyncio привязаны к циклу, на котором открыты,
+    а flask выполняет каждое async представление на новом цикле.
+    Общий клиент падал бы на втором таком запросе с RuntimeError
+    "Event loop is closed", поэтому команды выполняет клиент текущего
+    цикла. Основной цикл uvicorn использует один клиент все время.
+
+    """
+
+    def __init__(self, **options: Any) -> None:
+        """Клиенты создаются при первом обращении на цикле."""
+        self.options = options
+        self._clients: dict[asyncio.AbstractEventLoop, AsyncRedis] = {}
+        self._closers: set[asyncio.Task] = set()
+        # Клиент для вызовов вне цикла, например регистрации скриптов
+        self._default: Optional[AsyncRedis] = None
+
+    def client(self) -> AsyncRedis:
+        """Клиент текущего цикла событий."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._default is None:
+                self._default = AsyncRedis(**self.options)
+            return self._default
+        client = self._clients.get(loop)
+        if client is None:
+            for closed_loop in [
+                key for key in self._clients if key.is_closed()
+            ]:
+                del self._clients[closed_loop]
+            client = self._clients[loop] = AsyncRedis(**self.options)
+            closer = loop.create_task(self._close_with_loop(client))
+            self._closers.add(closer)
+            closer.add_done_callback(self._closers.discard)
+        return client
+
+    @staticmethod
+    async def _close_with_loop(client: AsyncRedis) -> None:
+        """Закрыть клиент, когда цикл отменит задачи перед остановкой.
+
+        asyncio.run и asgiref отменяют оставшиеся задачи перед закрытием
+        цикла, поэтому соединения закрываются, пока цикл еще работает.
+
+        """
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await client.aclose()
+
+    def lock(
+        self,
+        name: str,
+        lock_class: Optional[type[Lock]] = None,
+        **kwargs: Any,
+    ) -> Lock:
+        """Блокировка, которая выполняет команды на клиенте цикла."""
+        return (lock_class or Lock)(self, name, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        """Команды Redis передаются клиенту текущего цикла."""
+        return getattr(self.client(), name)
+
+
+# Асинхронный клиент для бота, воркеров и async представлений
+async_redis_client = LoopBoundRedis(**REDIS_OPTIONS)
+
+
+def redis_key(*parts: object) -> str:
+    """Ключ Redis с общим префиксом приложения."""
+    return ':'.join([settings.REDIS_KEY_PREFIX, *map(str, parts)])
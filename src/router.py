@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Optional
+
+import msgspec
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class Request:
+
+    """HTTP запрос для нативных обработчиков ASGI."""
+
+    def __init__(self, scope: Scope, receive: Receive) -> None:
+        """Сохраняем scope и канал получения тела запроса."""
+        self.scope = scope
+        self._receive = receive
+        self._body: Optional[bytes] = None
+
+    @property
+    def method(self) -> str:
+        """HTTP метод."""
+        return self.scope['method']
+
+    @property
+    def path(self) -> str:
+        """Путь запроса."""
+        return self.scope['path']
+
+    def header(self, name: str) -> Optional[str]:
+        """Значение заголовка по имени без учета регистра."""
+        key = name.lower().encode()
+        for header, value in self.scope['headers']:
+            if header == key:
+                return value.decode('latin-1')
+        return None
+
+    async def body(self) -> bytes:
+        """Прочитать тело запроса целиком."""
+        if self._body is None:
+            chunks = []
+            more_body = True
+            while more_body:
+                message = await self._receive()
+                chunks.append(message.get('body', b''))
+                more_body = message.get('more_body', False)
+            self._body = b''.join(chunks)
+        return self._body
+
+
+class Response:
+
+    """HTTP ответ нативного обработчика."""
+
+    def __init__(
+        self,
+        body: bytes = b'',
+        status: int = HTTPStatus.OK,
+        content_type: str = 'text/plain; charset=utf-8',
+    ) -> None:
+        """Тело ответа передается уже закодированным."""
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+
+    @classmethod
+    def json(cls, data: Any, status: int = HTTPStatus.OK) -> 'Response':
+        """Ответ с телом в формате JSON."""
+        return cls(msgspec.json.encode(data), status, 'application/json')
+
+    async def __call__(self, send: Send) -> None:
+        """Отправить ответ клиенту."""
+        await send(
+            {
+                'type': 'http.response.start',
+                'status': int(self.status),
+                'headers': [
+                    (b'content-type', self.content_type.encode()),
+                    (b'content-length', str(len(self.body)).encode()),
+                ],
+            },
+        )
+        await send({'type': 'http.response.body', 'body': self.body})
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class Router:
+
+    """ASGI маршрутизатор перед flask.
+
+    Зарегистрированные пути обслуживаются прямо на цикле событий
+    uvicorn, без перехода в поток WSGI. Остальные запросы уходят
+    в смонтированное приложение flask. Оно запускается в пустом
+    контексте: иначе на keep-alive соединении asgiref находит метку
+    занятого исполнителя от предыдущего запроса и падает с ошибкой
+    "Single thread executor already being used, would deadlock".
+
+    """
+
+    def __init__(self) -> None:
+        """Маршруты хранятся по паре (метод, путь)."""
+        self.routes: dict[tuple[str, str], Handler] = {}
+        self.fallback: Optional[ASGIApp] = None
+
+    def route(
+        self,
+        path: str,
+        methods: tuple[str, ...] = ('GET',),
+    ) -> Callable[[Handler], Handler]:
+        """Декоратор регистрации нативного обработчика."""
+
+        def decorator(handler: Handler) -> Handler:
+            for method in methods:
+                self.routes[(method, path)] = handler
+            return handler
+
+        return decorator
+
+    def get(self, path: str) -> Callable[[Handler], Handler]:
+        """Обработчик GET запроса."""
+        return self.route(path, ('GET',))
+
+    def post(self, path: str) -> Callable[[Handler], Handler]:
+        """Обработчик POST запроса."""
+        return self.route(path, ('POST',))
+
+    def mount(self, application: ASGIApp) -> None:
+        """Приложение для всех остальных запросов."""
+        self.fallback = application
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Передать запрос нативному обработчику или flask."""
+        if scope['type'] == 'http':
+            handler = self.routes.get((scope['method'], scope['path']))
+            if handler is not None:
+                response = await handler(Request(scope, receive))
+                await response(send)
+                return
+        await asyncio.create_task(
+            self.fallback(scope, receive, send),
+            context=contextvars.Context(),
+        )
+
+
+router = Router()
@@ -1,36 +1,28 @@
-import asyncio
-
 import uvicorn
-from asgiref.wsgi import WsgiToAsgi
 
-from . import app, bot
+from . import app
 from .settings import settings
 
 
-async def main() -> None:
-    """Стартуем сервер и бота."""
-    webserver = uvicorn.Server(
-        config=uvicorn.Config(
-            app=WsgiToAsgi(app),
-            port=settings.PORT,
-            use_colors=False,
-            host='0.0.0.0',
-        ),
-    )
+def main() -> None:
+    """Стартуем сервер и бота.
+
+    Каждый из WEB_WORKERS процессов запускает бота при старте
+    (см. src.asgi), вебхук регистрирует только ведущий процесс.
 
-    # Закомментировать bot.bot.set_webhook, если нет ТГ токена
-    await bot.bot.set_webhook(
-        url=settings.WEBHOOK_URL,
-        allowed_updates=bot.dp.resolve_used_update_types(),
-        drop_pending_updates=True,
+    """
+    uvicorn.run(
+        'src.asgi:application',
+        port=settings.PORT,
+        host='0.0.0.0',
+        workers=settings.WEB_WORKERS,
+        lifespan='on',
+        use_colors=False,
     )
-    app.logger.info('Бот запущен')
-    await webserver.serve()
-    await bot.bot.session.close()
 
 
 if __name__ == '__main__':
     try:
-        asyncio.run(main())
+        main()
     except (KeyboardInterrupt, SystemExit):
         app.logger.error('Бот остановлен')
@@ -65,11 +65,93 @@ class Settings:
     """Настройки приложения."""
 
     PORT: int = int(get('PORT', 5000))
+    # Пул соединений асинхронного движка базы данных
+    DB_POOL_SIZE: int = int(get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW: int = int(get('DB_MAX_OVERFLOW', 10))
     TELEGRAM_TOKEN: str = get('TELEGRAM_TOKEN')
+    # Адрес Bot API, например локального сервера для тестов
+    TELEGRAM_API_URL: str = get('TELEGRAM_API_URL', 'https://api.telegram.org')
+    # Размер пула соединений aiohttp к Bot API
+    TELEGRAM_POOL_SIZE: int = int(get('TELEGRAM_POOL_SIZE', 100))
+    # Лимиты исходящих сообщений: на бота и на один чат в секунду
+    OUTBOUND_GLOBAL_RATE: float = float(get('OUTBOUND_GLOBAL_RATE', 30))
+    OUTBOUND_CHAT_RATE: float = float(get('OUTBOUND_CHAT_RATE', 1))
+    OUTBOUND_CHAT_BURST: float = float(get('OUTBOUND_CHAT_BURST', 1))
+    OUTBOUND_MAX_RETRIES: int = int(get('OUTBOUND_MAX_RETRIES', 3))
+    # Размер пачки получателей рассылки между контрольными точками
+    BROADCAST_BATCH_SIZE: int = int(get('BROADCAST_BATCH_SIZE', 100))
     WEB_URL: str = get('WEB_URL', 'http://localhost:5000')
     WEBHOOK_PATH: str = f'/bot/{TELEGRAM_TOKEN}'
     WEBHOOK_URL: str = f'{WEB_URL}{WEBHOOK_PATH}'
+    # Число одновременных соединений Telegram к вебхуку,
+    # стоит согласовать с числом воркеров сервера
+    WEBHOOK_MAX_CONNECTIONS: int = int(get('WEBHOOK_MAX_CONNECTIONS', 40))
+    WEBHOOK_DROP_PENDING: bool = (
+        get('WEBHOOK_DROP_PENDING', 'false').lower() == 'true'
+    )
+    # Количество процессов uvicorn
+    WEB_WORKERS: int = int(get('WEB_WORKERS', 1))
+    # Время жизни блокировки ведущего процесса в секундах
+    LEADER_LOCK_TTL: int = int(get('LEADER_LOCK_TTL', 30))
     SECRET_KEY: str = get('SECRET_KEY')
+    REDIS_HOST: str = get('REDIS_HOST')
+    REDIS_PORT: int = int(get('REDIS_PORT', 6379))
+    REDIS_USER: str = get('REDIS_USER')
+    REDIS_PASSWORD: str = get('REDIS_USER_PASSWORD')
+    # Отдельная база Redis для служебных данных бота и приложения
+    REDIS_DB: int = int(get('REDIS_DB', 1))
+    REDIS_KEY_PREFIX: str = get('REDIS_KEY_PREFIX', 'quizbot')
+    # Очередь входящих обновлений: вебхук отвечает сразу,
+    # а обновления обрабатывает пул воркеров
+    WEBHOOK_QUEUE_ENABLED: bool = (
+        get('WEBHOOK_QUEUE_ENABLED', 'false').lower() == 'true'
+    )
+    WEBHOOK_QUEUE_MAXSIZE: int = int(get('WEBHOOK_QUEUE_MAXSIZE', 1000))
+    WEBHOOK_WORKERS: int = int(get('WEBHOOK_WORKERS', 4))
+    WEBHOOK_DRAIN_TIMEOUT: float = float(get('WEBHOOK_DRAIN_TIMEOUT', 10))
+    # Шардирование обновлений по пользователям: 0 — выключено.
+    # Включенные полосы заменяют очередь вебхука
+    WEBHOOK_LANES: int = int(get('WEBHOOK_LANES', 0))
+    WEBHOOK_LANE_USER_LIMIT: int = int(get('WEBHOOK_LANE_USER_LIMIT', 5))
+    # Дедупликация повторно доставленных обновлений по update_id
+    UPDATE_DEDUP_TTL: int = int(get('UPDATE_DEDUP_TTL', 600))
+    UPDATE_DEDUP_LRU_SIZE: int = int(get('UPDATE_DEDUP_LRU_SIZE', 10000))
+    # Сколько секунд процесс помнит зарегистрированного пользователя
+    KNOWN_USERS_LOCAL_TTL: int = int(get('KNOWN_USERS_LOCAL_TTL', 30))
+    # Состояния диалогов бота хранятся в Redis, TTL в секундах (0 — без)
+    FSM_STATE_TTL: int = int(get('FSM_STATE_TTL', 60 * 60 * 24))
+    FSM_DATA_TTL: int = int(get('FSM_DATA_TTL', 60 * 60 * 24))
+    # Блокировка обработки обновлений пользователя между процессами
+    FSM_EVENT_ISOLATION: bool = (
+        get('FSM_EVENT_ISOLATION', 'true').lower() == 'true'
+    )
+    # Ключи идемпотентности ответов: TTL в секундах и сколько секунд
+    # повтор ждет завершения первого запроса
+    ANSWER_IDEMPOTENCY_TTL: int = int(get('ANSWER_IDEMPOTENCY_TTL', 3600))
+    ANSWER_IDEMPOTENCY_WAIT: float = float(
+        get('ANSWER_IDEMPOTENCY_WAIT', 5),
+    )
+    # Время жизни курсоров прогресса в Redis
+    QUIZ_PROGRESS_TTL: int = int(get('QUIZ_PROGRESS_TTL', 60 * 60 * 24 * 7))
+    # Снимки викторин: TTL в Redis и размер LRU процесса
+    QUIZ_SNAPSHOT_TTL: int = int(get('QUIZ_SNAPSHOT_TTL', 60 * 60 * 24))
+    QUIZ_SNAPSHOT_LRU_SIZE: int = int(get('QUIZ_SNAPSHOT_LRU_SIZE', 256))
+    # TTL каталога рубрик в Redis, см. category_catalog
+    CATEGORY_CATALOG_TTL: int = int(get('CATEGORY_CATALOG_TTL', 60 * 60 * 24))
+    # Время жизни разбора викторины в профиле пользователя
+    PROFILE_BREAKDOWN_CACHE_TTL: int = int(
+        get('PROFILE_BREAKDOWN_CACHE_TTL', 60 * 60),
+    )
+    # Время жизни страниц в кэше, см. view_cache
+    VIEW_CACHE_TIMEOUT: int = int(get('VIEW_CACHE_TIMEOUT', 60 * 60))
+    # Число строк списков кэшируется на время в секундах; списки без
+    # фильтров больше порога считаются по оценке планировщика
+    PAGINATION_COUNT_CACHE_TTL: int = int(
+        get('PAGINATION_COUNT_CACHE_TTL', 60),
+    )
+    PAGINATION_ESTIMATE_MIN_ROWS: int = int(
+        get('PAGINATION_ESTIMATE_MIN_ROWS', 10000),
+    )
 
 
 class LoggingSettings:
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+
+from . import app
+from .redis_client import async_redis_client, redis_key
+from .settings import settings
+
+
+class UpdateDeduplicator:
+
+    """Отсечение повторно доставленных обновлений Telegram.
+
+    Telegram повторяет доставку, если вебхук отвечает медленно.
+    Сначала update_id проверяется в LRU текущего процесса, затем
+    в Redis: ключ с коротким TTL ставится через SET NX, поэтому
+    повтор, пришедший в другой процесс, тоже будет отброшен.
+    При недоступности Redis обновление считается новым.
+
+    """
+
+    def __init__(self, ttl: int, lru_size: int) -> None:
+        """Настраиваем TTL ключей в Redis и размер локального LRU."""
+        self.ttl = ttl
+        self.lru_size = lru_size
+        self._seen: OrderedDict[int, None] = OrderedDict()
+        self.checked = 0
+        self.dropped_local = 0
+        self.dropped_shared = 0
+        self.redis_errors = 0
+
+    def _remember(self, update_id: int) -> None:
+        """Запомнить update_id в локальном LRU."""
+        self._seen[update_id] = None
+        self._seen.move_to_end(update_id)
+        if len(self._seen) > self.lru_size:
+            self._seen.popitem(last=False)
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """Проверить обновление и отметить его как полученное."""
+        self.checked += 1
+        if update_id in self._seen:
+            self._seen.move_to_end(update_id)
+            self.dropped_local += 1
+            return True
+        try:
+            is_new = await async_redis_client.set(
+                redis_key('update', update_id),
+                1,
+                nx=True,
+                ex=self.ttl,
+            )
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Дедупликация без Redis: {error}')
+            is_new = True
+        self._remember(update_id)
+        if not is_new:
+            self.dropped_shared += 1
+            return True
+        return False
+
+    async def forget(self, update_id: int) -> None:
+        """Снять отметку, чтобы повтор обновления был обработан."""
+        self._seen.pop(update_id, None)
+        try:
+            await async_redis_client.delete(redis_key('update', update_id))
+        except RedisError as error:
+            self.redis_errors += 1
+            app.logger.warning(f'Не удалось снять отметку обновления: {error}')
+
+    def stats(self) -> dict:
+        """Счетчики дедупликации."""
+        return {
+            'checked': self.checked,
+            'dropped_local': self.dropped_local,
+            'dropped_shared': self.dropped_shared,
+            'dropped': self.dropped_local + self.dropped_shared,
+            'redis_errors': self.redis_errors,
+        }
+
+
+update_dedup = UpdateDeduplicator(
+    ttl=settings.UPDATE_DEDUP_TTL,
+    lru_size=settings.UPDATE_DEDUP_LRU_SIZE,
+)
@@ -0,0 +1,258 @@
+import asyncio
+import time
+from collections import deque
+from enum import Enum
+from typing import Awaitable, Callable, Optional
+
+from aiogram.types import Update
+
+from . import app
+from .bot import feed_update
+from .settings import settings
+from .utils import call_in_loop
+
+UpdateHandler = Callable[[Update], Awaitable[None]]
+
+# Сколько последних задержек хранить для расчета перцентилей
+LATENCY_WINDOW = 1000
+
+
+class SubmitResult(Enum):
+
+    """Итог постановки обновления в обработку."""
+
+    ACCEPTED = 'accepted'
+    # Превышен лимит очереди пользователя, повтор обновления не нужен
+    DROPPED = 'dropped'
+    # Очередь заполнена или остановлена, Telegram должен повторить
+    REJECTED = 'rejected'
+
+
+def update_owner_id(update: Update) -> int:
+    """Ключ шардирования обновления: id пользователя, иначе id чата."""
+    event = update.event
+    user = getattr(event, 'from_user', None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, 'chat', None)
+    if chat is not None:
+        return chat.id
+    return update.update_id
+
+
+class Lane:
+
+    """Упорядоченная полоса обработки обновлений.
+
+    Обновления одного пользователя всегда попадают в одну полосу
+    и обрабатываются строго по очереди. Пользователи внутри полосы
+    обслуживаются по кругу, по одному обновлению за ход, а очередь
+    каждого пользователя ограничена, поэтому один пользователь
+    не может занять полосу целиком.
+
+    """
+
+    def __init__(self, index: int, user_limit: int) -> None:
+        """Создаем пустую полосу."""
+        self.index = index
+        self.user_limit = user_limit
+        self.pending: dict[int, deque] = {}
+        self.turns: deque[int] = deque()
+        self.size = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.has_work = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def push(self, owner_id: int, update: Update) -> bool:
+        """Добавить обновление в очередь пользователя.
+
+        Вызывается только на цикле событий полосы.
+
+        """
+        queue = self.pending.get(owner_id, ())
+        if len(queue) >= self.user_limit:
+            self.dropped += 1
+            return False
+        if not queue:
+            queue = self.pending[owner_id] = deque()
+            self.turns.append(owner_id)
+        queue.append((time.monotonic(), update))
+        self.size += 1
+        self.idle.clear()
+        self.has_work.set()
+        return True
+
+    def pop(self) -> tuple[float, Update]:
+        """Взять обновление следующего по кругу пользователя."""
+        owner_id = self.turns.popleft()
+        queue = self.pending[owner_id]
+        item = queue.popleft()
+        if queue:
+            self.turns.append(owner_id)
+        else:
+            del self.pending[owner_id]
+        self.size -= 1
+        return item
+
+
+class LaneScheduler:
+
+    """Планировщик обновлений по полосам.
+
+    Хэширует id пользователя на одну из N полос: обновления разных
+    пользователей обрабатываются параллельно, а одного пользователя —
+    в порядке поступления.
+
+    """
+
+    def __init__(
+        self,
+        handler: UpdateHandler,
+        lanes: int,
+        user_limit: int,
+    ) -> None:
+        """Настраиваем полосы, задачи создаются в start()."""
+        self.handler = handler
+        self.lanes_count = lanes
+        self.user_limit = user_limit
+        self.lanes: list[Lane] = []
+        self._tasks: list[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started_at: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Включено ли шардирование по полосам."""
+        return self.lanes_count > 0
+
+    async def start(self) -> None:
+        """Создать полосы и запустить их обработчики."""
+        if not self.enabled or self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.lanes = [
+            Lane(index, self.user_limit) for index in range(self.lanes_count)
+        ]
+        self._tasks = [
+            asyncio.create_task(self._run(lane), name=f'update-lane-{i}')
+            for i, lane in enumerate(self.lanes)
+        ]
+        self._started_at = time.monotonic()
+        app.logger.info(f'Запущено полос обработки: {self.lanes_count}.')
+
+    def lane_for(self, owner_id: int) -> Lane:
+        """Полоса, в которую попадают обновления пользователя."""
+        return self.lanes[hash(owner_id) % self.lanes_count]
+
+    @property
+    def running(self) -> bool:
+        """Запущены ли обработчики полос."""
+        return bool(self._tasks)
+
+    def submit(self, update: Update) -> SubmitResult:
+        """Поставить обновление в полосу его пользователя.
+
+        Метод можно вызывать из любого потока: добавление выполняется
+        на цикле событий полос, а вызывающий поток ждет его результата.
+
+        Returns
+        -------
+        SubmitResult
+            REJECTED, если полосы не запущены, DROPPED, если очередь
+            пользователя заполнена.
+
+        """
+        return call_in_loop(self._loop, self._push, update)
+
+    def _push(self, update: Update) -> SubmitResult:
+        """Добавить обновление в полосу на цикле событий полос."""
+        if not self.running:
+            return SubmitResult.REJECTED
+        owner_id = update_owner_id(update)
+        if not self.lane_for(owner_id).push(owner_id, update):
+            app.logger.warning(
+                f'Превышен лимит очереди пользователя {owner_id}, '
+                f'обновление {update.update_id} отброшено',
+            )
+            return SubmitResult.DROPPED
+        return SubmitResult.ACCEPTED
+
+    async def _run(self, lane: Lane) -> None:
+        """Последовательно обрабатывать обновления полосы."""
+        while True:
+            if not lane.size:
+                lane.idle.set()
+                lane.has_work.clear()
+                await lane.has_work.wait()
+                continue
+            enqueued_at, update = lane.pop()
+            try:
+                with app.app_context():
+                    await self.handler(update)
+                lane.processed += 1
+            except Exception:
+                lane.failed += 1
+                app.logger.exception(
+                    f'Ошибка обработки обновления {update.update_id}',
+                )
+            lane.latencies.append(time.monotonic() - enqueued_at)
+
+    async def drain(self, grace_period: Optional[float] = None) -> None:
+        """Дождаться опустошения полос и остановить обработчики."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(lane.idle.wait() for lane in self.lanes)),
+                grace_period,
+            )
+        except asyncio.TimeoutError:
+            app.logger.warning(
+                f'Полосы не разобраны за {grace_period} с, осталось '
+                f'обновлений: {sum(lane.size for lane in self.lanes)}',
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        app.logger.info(f'Полосы обработки остановлены: {self.stats()}')
+
+    def stats(self) -> dict:
+        """Метрики полос: глубина, пропускная способность и задержки."""
+        latencies = sorted(
+            latency for lane in self.lanes for latency in lane.latencies
+        )
+        processed = sum(lane.processed for lane in self.lanes)
+        uptime = (
+            time.monotonic() - self._started_at if self._started_at else 0
+        )
+        return {
+            'lanes': self.lanes_count,
+            'depth': [lane.size for lane in self.lanes],
+            'processed': processed,
+            'failed': sum(lane.failed for lane in self.lanes),
+            'dropped': sum(lane.dropped for lane in self.lanes),
+            'throughput': round(processed / uptime, 2) if uptime else 0,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p99': percentile(latencies, 99),
+        }
+
+
+def percentile(values: list[float], rank: int) -> float:
+    """Перцентиль по отсортированному списку значений."""
+    if not values:
+        return 0
+    index = min(len(values) - 1, len(values) * rank // 100)
+    return round(values[index], 4)
+
+
+lane_scheduler = LaneScheduler(
+    handler=feed_update,
+    lanes=settings.WEBHOOK_LANES,
+    user_limit=settings.WEBHOOK_LANE_USER_LIMIT,
+)
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from typing import Optional
+
+from aiogram.types import Update
+
+from . import app
+from .bot import feed_update
+from .settings import settings
+from .update_lanes import SubmitResult, UpdateHandler
+from .utils import call_in_loop
+
+
+class QueueMetrics:
+
+    """Метрики очереди обновлений."""
+
+    def __init__(self) -> None:
+        """Обнуляем счетчики."""
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def observe_wait(self, wait_time: float) -> None:
+        """Учесть время ожидания обновления в очереди."""
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def as_dict(self, depth: int) -> dict:
+        """Метрики в виде словаря."""
+        handled = self.processed + self.failed
+        return {
+            'depth': depth,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'wait_time_avg': (
+                round(self.wait_time_total / handled, 4) if handled else 0
+            ),
+            'wait_time_max': round(self.wait_time_max, 4),
+        }
+
+
+class UpdateQueue:
+
+    """Ограниченная очередь обновлений с пулом воркеров.
+
+    Вебхук кладет провалидированное обновление в очередь и сразу отвечает
+    Telegram, а воркеры на основном цикле событий передают обновления
+    в обработчик. При переполнении очереди обновление отклоняется,
+    чтобы Telegram повторил его позже.
+
+    """
+
+    def __init__(
+        self,
+        handler: UpdateHandler,
+        maxsize: int,
+        workers: int,
+        enabled: bool = True,
+    ) -> None:
+        """Настраиваем очередь, воркеры создаются в start()."""
+        self.handler = handler
+        self.maxsize = maxsize
+        self.workers_count = workers
+        self.enabled = enabled
+        self.metrics = QueueMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: list[asyncio.Task] = []
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        """Запущены ли воркеры очереди."""
+        return bool(self._workers) and not self._closing
+
+    @property
+    def depth(self) -> int:
+        """Текущее количество обновлений в очереди."""
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self) -> None:
+        """Создать очередь и запустить воркеры на текущем цикле событий."""
+        if not self.enabled or self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._closing = False
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f'update-worker-{i}')
+            for i in range(self.workers_count)
+        ]
+        app.logger.info(
+            f'Очередь обновлений запущена: {self.workers_count} воркеров, '
+            f'размер {self.maxsize}.',
+        )
+
+    def submit(self, update: Update) -> SubmitResult:
+        """Положить обновление в очередь.
+
+        Метод можно вызывать из любого потока: добавление выполняется
+        на цикле событий очереди, а вызывающий поток ждет его результата,
+        чтобы не ответить Telegram 200 на отброшенное обновление.
+
+        Returns
+        -------
+        SubmitResult
+            REJECTED, если очередь не запущена или переполнена.
+
+        """
+        return call_in_loop(self._loop, self._put, (time.monotonic(), update))
+
+    def _put(self, item: tuple[float, Update]) -> SubmitResult:
+        """Добавить элемент в очередь на ее цикле событий."""
+        if not self.running:
+            self.metrics.rejected += 1
+            return SubmitResult.REJECTED
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            return SubmitResult.REJECTED
+        self.metrics.enqueued += 1
+        return SubmitResult.ACCEPTED
+
+    async def _worker(self) -> None:
+        """Разбирать очередь, пока воркер не отменят."""
+        while True:
+            enqueued_at, update = await self._queue.get()
+            self.metrics.observe_wait(time.monotonic() - enqueued_at)
+            try:
+                with app.app_context():
+                    await self.handler(update)
+                self.metrics.processed += 1
+            except Exception:
+                self.metrics.failed += 1
+                app.logger.exception(
+                    f'Ошибка обработки обновления {update.update_id}',
+                )
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, grace_period: Optional[float] = None) -> None:
+        """Перестать принимать обновления, дождаться очереди и остановиться.
+
+        Args:
+        ----
+            grace_period (Optional[float]): Сколько секунд ждать обработки
+            оставшихся обновлений.
+
+        """
+        if not self._workers:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._queue.join(), grace_period)
+        except asyncio.TimeoutError:
+            app.logger.warning(
+                f'Очередь не разобрана за {grace_period} с, '
+                f'осталось обновлений: {self.depth}',
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        app.logger.info(f'Очередь обновлений остановлена: {self.stats()}')
+
+    def stats(self) -> dict:
+        """Метрики очереди для мониторинга."""
+        return self.metrics.as_dict(self.depth)
+
+
+update_queue = UpdateQueue(
+    handler=feed_update,
+    maxsize=settings.WEBHOOK_QUEUE_MAXSIZE,
+    workers=settings.WEBHOOK_WORKERS,
+    enabled=settings.WEBHOOK_QUEUE_ENABLED,
+)
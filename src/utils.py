@@ -1,3 +1,6 @@
+import asyncio
+from typing import Any, Callable, Optional
+
 from sqlalchemy.inspection import inspect
 
 
@@ -42,3 +45,28 @@ def obj_to_dict(obj: object, seen: dict | None = None) -> Dotdict:
             data[rel.key] = obj_to_dict(value, seen) if value else None
         return data
     return obj
+
+
+def call_in_loop(
+    loop: Optional[asyncio.AbstractEventLoop],
+    callback: Callable[..., Any],
+    *args: Any,
+) -> Any:
+    """Выполнить callback на цикле событий loop и вернуть результат.
+
+    На самом цикле loop или без цикла callback вызывается сразу.
+    Из другого потока вызов передается циклу, а поток ждет результата,
+    поэтому состояние объектов цикла меняется только в его потоке.
+
+    """
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if loop is None or running_loop is loop or not loop.is_running():
+        return callback(*args)
+
+    async def call() -> Any:
+        return callback(*args)
+
+    return asyncio.run_coroutine_threadsafe(call(), loop).result()
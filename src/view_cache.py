@@ -0,0 +1,91 @@
+from typing import Callable, Optional
+
+from flask import request
+from flask_jwt_extended import current_user
+
+from . import app, cache
+from .jwt_utils import get_optional_user
+from .settings import settings
+
+# Версия данных всех страниц: меняется при правках в админке
+GLOBAL_VERSION_KEY = 'view_version'
+
+
+class ViewCache:
+
+    """Кэш отрисованных страниц по пользователю и версии данных.
+
+    Ключ страницы состоит из представления, пользователя, общей версии
+    данных, версии данных пользователя и адреса запроса. Версии —
+    счетчики в кэше: сохраненный ответ, перезапуск викторины
+    и удаление профиля увеличивают версию пользователя, правки
+    в админке — общую версию. Старые страницы становятся недоступны
+    сразу и истекают по TTL, поэтому TTL может быть долгим.
+
+    """
+
+    def __init__(self, timeout: int) -> None:
+        """Настраиваем время жизни страниц."""
+        self.timeout = timeout
+
+    @staticmethod
+    def _user_version_key(user_id: int) -> str:
+        """Ключ версии данных пользователя."""
+        return f'view_version_{user_id}'
+
+    def make_key(self, per_user: bool = True) -> str:
+        """Ключ страницы текущего запроса."""
+        user = current_user if per_user else get_optional_user()
+        if user:
+            user_id = user.id
+            global_version, user_version = cache.get_many(
+                GLOBAL_VERSION_KEY,
+                self._user_version_key(user_id),
+            )
+        else:
+            user_id, user_version = None, None
+            global_version = cache.get(GLOBAL_VERSION_KEY)
+        return (
+            f'view_{request.endpoint}_{user_id}_'
+            f'{global_version or 0}_{user_version or 0}_{request.full_path}'
+        )
+
+    def cached(
+        self,
+        per_user: bool = True,
+        unless: Optional[Callable] = None,
+    ) -> Callable:
+        """Кэшировать страницу представления.
+
+        Для страниц пользователя декоратор ставится после jwt_required.
+        Публичные страницы (per_user=False) общие для гостей, а для
+        вошедшего пользователя кэшируются отдельно, см.
+        get_optional_user. Кэшируются только успешно отрисованные
+        страницы, ошибки кэша не мешают ответу.
+
+        """
+        return cache.cached(
+            timeout=self.timeout,
+            make_cache_key=lambda *args, **kwargs: self.make_key(per_user),
+            unless=unless,
+            response_filter=lambda response: isinstance(response, str),
+        )
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Данные пользователя изменились."""
+        self._increment(self._user_version_key(user_id))
+
+    def invalidate_all(self) -> None:
+        """Изменились данные, общие для всех страниц."""
+        self._increment(GLOBAL_VERSION_KEY)
+
+    @staticmethod
+    def _increment(key: str) -> None:
+        """Увеличить версию, не прерывая запрос при ошибке кэша."""
+        try:
+            cache.cache.inc(key)
+        except Exception as error:
+            app.logger.warning(f'Не удалось сменить версию страниц: {error}')
+
+
+view_cache = ViewCache(timeout=settings.VIEW_CACHE_TIMEOUT)
@@ -1,28 +1,50 @@
-# from flask import (
-#     render_template,
-#     request,
-# )
+from flask import (
+    render_template,
+    request,
+)
 
-# from src import app, cache
-# from src.constants import DEFAULT_PAGE_NUMBER, HTTP_NOT_FOUND, PER_PAGE
-# from src.crud.category import category_crud
+from src import app
+from src.category_catalog import category_catalog
+from src.constants import DEFAULT_PAGE_NUMBER, HTTP_NOT_FOUND, PER_PAGE
+from src.pagination import ListPagination
 
 
-# @app.route('/', methods=['GET'])
-# @cache.cached(timeout=30, key_prefix='categories_view_cache')
-# async def categories() -> str:
-#     """Вывод страницы рубрик."""
-#     page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
-#     per_page = PER_PAGE
-#     categories_paginated = (await category_crud.get_active()).paginate(
-#         page=page,
-#         per_page=per_page,
-#         error_out=False,
-#     )
-#     if not categories_paginated.items:
-#         return render_template('errors/404.html'), HTTP_NOT_FOUND
-#     return render_template(
-#         'categories.html',
-#         categories=categories_paginated.items,
-#         pagination=categories_paginated,
-#     )
+@app.route('/categories/', methods=['GET'])
+async def categories() -> str:
+    """Вывод страницы рубрик."""
+    page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
+    catalog = await category_catalog.get()
+    categories_paginated = ListPagination(
+        page=page,
+        per_page=PER_PAGE,
+        error_out=False,
+        items=catalog.categories,
+    )
+    if not categories_paginated.items:
+        return render_template('errors/404.html'), HTTP_NOT_FOUND
+    return render_template(
+        'categories.html',
+        categories=categories_paginated.items,
+        pagination=categories_paginated,
+    )
+
+
+@app.route('/categories/<int:category_id>/', methods=['GET'])
+async def category_quizzes(category_id: int) -> str:
+    """Вывод викторин с вопросами рубрики."""
+    page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
+    category = (await category_catalog.get()).get(category_id)
+    if category is None:
+        return render_template('errors/404.html'), HTTP_NOT_FOUND
+    quizzes_paginated = ListPagination(
+        page=page,
+        per_page=PER_PAGE,
+        error_out=False,
+        items=category.quizzes,
+    )
+    return render_template(
+        'category_quizzes.html',
+        category=category,
+        quizzes=quizzes_paginated.items,
+        pagination=quizzes_paginated,
+    )
@@ -1,6 +1,6 @@
-
 from flask import (
     Response,
+    jsonify,
     render_template,
     request,
 )
@@ -14,28 +14,48 @@ from src.constants import (
     DEFAULT_PAGE_NUMBER,
     ITEMS_PER_PAGE,
 )
-from src.crud.question import question_crud
 from src.crud.quiz_result import quiz_result_crud
+from src.crud.statistic import user_statistic_crud
 from src.crud.user import user_crud
 from src.crud.user_answer import user_answer_crud
+from src.known_users import known_users
+from src.models.quiz_result import QuizResult
+from src.quiz_snapshot import quiz_snapshots
+from src.settings import settings
+from src.view_cache import view_cache
+from src.views.result import get_user_breakdown
+
+
+def breakdown_cache_key(
+    user_id: int,
+    quiz_result: QuizResult,
+    version: int,
+) -> str:
+    """Ключ кэша разбора по версии результата и снимка викторины."""
+    return (
+        f'breakdown_{user_id}_{quiz_result.quiz_id}_{quiz_result.id}_'
+        f'{quiz_result.total_questions}_{version}'
+    )
 
 
 @app.route('/me', methods=['GET'])
-@cache.cached(timeout=5)
 @jwt_required()
+@view_cache.cached()
 async def profile() -> Response:
-    """Отображаем профиль пользователя."""
+    """Отображаем профиль пользователя.
+
+    Страница содержит только итоги и строки результатов, разбор
+    ответов по викторине загружается отдельно, см. profile_breakdown.
+
+    """
     user = current_user
     page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
     per_page = ITEMS_PER_PAGE
 
-    all_quiz_results = await quiz_result_crud.get_results_by_user(user.id)
-    total_questions = sum(
-        result.total_questions for result in all_quiz_results
-    )
-    correct_answers_count = sum(
-        result.correct_answers_count for result in all_quiz_results
-    )
+    (
+        total_questions,
+        correct_answers_count,
+    ) = await user_statistic_crud.get_counts(user.id)
 
     pagination = await quiz_result_crud.get_results_by_user_paginated(
         user.id,
@@ -44,48 +64,6 @@ async def profile() -> Response:
     )
     quiz_results = pagination.items
 
-    # Добавляем вопросы к каждому результату
-    for result in quiz_results:
-        result.questions = []
-        user_answers = await user_answer_crud.get_results_by_user(user.id)
-
-        # Получаем все вопросы по викторине
-        questions = await question_crud.get_all_by_quiz_id(result.quiz_id)
-
-        for question in questions:
-            user_answer = next(
-                (ua for ua in user_answers if ua.question_id == question.id),
-                None,
-            )
-            correct_answer_text = next(
-                (v.title for v in question.variants if v.is_right_choice),
-                None,
-            )
-
-            # Получаем текст ответа пользователя
-            user_answer_text = next(
-                (
-                    v.title
-                    for v in question.variants
-                    if v.id == (user_answer.answer_id if user_answer else None)
-                ),
-                'Не отвечено',
-            )
-
-            result.questions.append(
-                {
-                    # Текст вопроса
-                    'title': question.title,
-                    # Текст ответа
-                    'user_answer': user_answer_text,
-                    # Правильный ответ
-                    'correct_answer': correct_answer_text,
-                    # Пояснение
-                    'explanation': question.explanation
-                    if hasattr(question, 'explanation')
-                    else None,
-                },
-            )
     return render_template(
         'user_profile.html',
         user=user,
@@ -96,6 +74,44 @@ async def profile() -> Response:
     )
 
 
+@app.route('/me/results/<int:quiz_id>', methods=['GET'])
+@jwt_required()
+async def profile_breakdown(quiz_id: int) -> Response:
+    """Разбор ответов пользователя по одной викторине для профиля.
+
+    Разбор кэшируется по версии результата: ID результата, число
+    ответов и версия снимка викторины. Новый ответ, перезапуск или
+    изменение викторины дают новый ключ, старый истекает по TTL.
+
+    """
+    user = current_user
+    quiz_result = await quiz_result_crud.get_by_user_and_quiz(
+        user.id,
+        quiz_id,
+    )
+    if quiz_result is None:
+        return jsonify(error='Результаты викторины не найдены'), 404
+    quiz = await quiz_snapshots.get(quiz_id)
+    cache_key = breakdown_cache_key(
+        user.id,
+        quiz_result,
+        quiz.version if quiz else 0,
+    )
+    breakdown = cache.get(cache_key)
+    if breakdown is None:
+        _, breakdown = await get_user_breakdown(
+            user.id,
+            quiz_id,
+            quiz_result,
+        )
+        cache.set(
+            cache_key,
+            breakdown,
+            timeout=settings.PROFILE_BREAKDOWN_CACHE_TTL,
+        )
+    return jsonify(breakdown)
+
+
 @app.route('/me', methods=['POST'])
 @jwt_required()
 async def delete_profile() -> Response:
@@ -116,6 +132,9 @@ async def delete_profile() -> Response:
         await user_crud.update(answer, {'user_id': None})
 
     cache.delete(f'user_{user.id}')
+    view_cache.invalidate_user(user.id)
+    # Следующий /start должен заново зарегистрировать пользователя
+    known_users.discard(user.telegram_id)
     await user_crud.remove(current_user)
 
     return 'Профиль удален', 204
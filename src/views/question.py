@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional, Union
+from uuid import uuid4
 
 from flask import (
+    abort,
     redirect,
     render_template,
     request,
@@ -13,14 +15,24 @@ from flask_jwt_extended import (
     jwt_required,
 )
 
-from src import app
-from src.crud.question import question_crud
+from src import app, db
+from src.answer_idempotency import (
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    IdempotencyConflict,
+    answer_idempotency,
+)
+from src.constants import HTTP_BAD_REQUEST, HTTP_CONFLICT, HTTP_NOT_FOUND
 from src.crud.quiz_result import quiz_result_crud
-from src.crud.telegram_user import telegram_user_crud
 from src.crud.user_answer import user_answer_crud
-from src.crud.variant import variant_crud
-from src.models.question import Question as QuestionModel
-from src.utils import Dotdict, obj_to_dict
+from src.quiz_progress import quiz_progress
+from src.quiz_snapshot import (
+    CompiledQuiz,
+    QuestionSnapshot,
+    VariantSnapshot,
+    quiz_snapshots,
+)
+from src.view_cache import view_cache
+from src.views.result import build_breakdown
 
 
 @app.route(
@@ -76,53 +88,113 @@ async def handle_question_post(
     question_id = int(request.form.get('question_id'))
     answer_id = int(request.form.get('answer'))
 
-    current_question = await question_crud.get(question_id)
-    chosen_answer = await variant_crud.get(answer_id)
+    # Вопрос и правильность ответа берутся из снимка викторины
+    quiz = await quiz_snapshots.get(quiz_id)
+    chosen_answer = quiz.grade(question_id, answer_id) if quiz else None
+    if chosen_answer is None:
+        abort(HTTP_NOT_FOUND)
 
     if test:
         # Сохраняем ответы в сессии пользователя
         session['test_answers'] = session.get('test_answers', []) + [
-            Dotdict(
-                {
-                    'question': Dotdict(obj_to_dict(current_question)),
-                    'answer': Dotdict(obj_to_dict(chosen_answer)),
-                },
-            ),
+            {'question_id': question_id, 'answer_id': answer_id},
         ]
+        result = {
+            'answer': chosen_answer.title,
+            'description': chosen_answer.description,
+            'user_answer': chosen_answer.is_right_choice,
+        }
     else:
-        tg_user_id = (
-            await telegram_user_crud.get_by_telegram_id(
-                current_user.telegram_id,
-            )
-        ).id
-        await update_quiz_results(
-            current_user.id,
-            quiz_id,
-            question_id,
-            chosen_answer.is_right_choice,
-            tg_user_id=tg_user_id,
-        )
-        await save_user_answer(
-            user_id=current_user.id,
-            tg_user_id=tg_user_id,
-            quiz_id=quiz_id,
-            question_id=current_question.id,
-            answer_id=answer_id,
-            is_right=chosen_answer.is_right_choice,
-        )
+        result = await submit_answer(quiz, question_id, chosen_answer)
 
     image_url = url_for('get_question_image', question_id=question_id)
     return render_template(
         'question_result.html',
         quiz_id=quiz_id,
-        answer=chosen_answer.title,
-        description=chosen_answer.description,
-        user_answer=chosen_answer.is_right_choice,
-        image_url=image_url if image_url else None,
+        image_url=image_url if quiz.questions[question_id].has_image else None,
         test=test,
+        **result,
     )
 
 
+async def submit_answer(
+    quiz: CompiledQuiz,
+    question_id: int,
+    chosen_answer: VariantSnapshot,
+) -> dict:
+    """Сохраняет ответ пользователя ровно один раз.
+
+    Повтор запроса с тем же ключом идемпотентности получает
+    результат первого запроса из Redis без обращения к базе.
+
+    Args:
+    ----
+        quiz (CompiledQuiz): Снимок викторины.
+        question_id (int): ID вопроса.
+        chosen_answer (VariantSnapshot): Выбранный вариант ответа.
+
+    Returns:
+    -------
+        dict: Данные для страницы с результатами ответа.
+
+    """
+    idempotency_key = request.headers.get(
+        'Idempotency-Key',
+        request.form.get('idempotency_key'),
+    )
+    fingerprint = f'{quiz.id}:{question_id}:{chosen_answer.id}'
+    if idempotency_key:
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            abort(HTTP_BAD_REQUEST)
+        # Повтор может ждать первый запрос несколько секунд. Соединение,
+        # взятое сессией для пользователя, возвращается в пул, иначе
+        # ожидающие повторы займут весь пул и первый запрос не сохранит
+        # ответ. Загруженные поля пользователя остаются доступны
+        db.session.close()
+        try:
+            result = await answer_idempotency.claim(
+                current_user.id,
+                idempotency_key,
+                fingerprint,
+            )
+        except IdempotencyConflict:
+            abort(HTTP_CONFLICT)
+        if result is not None:
+            return result
+
+    try:
+        # Ответ и счетчики результата сохраняются одной транзакцией
+        recorded = await user_answer_crud.record_answer(
+            user_id=current_user.id,
+            telegram_id=current_user.telegram_id,
+            quiz_id=quiz.id,
+            question_id=question_id,
+            answer_id=chosen_answer.id,
+            is_right=chosen_answer.is_right_choice,
+        )
+    except Exception:
+        if idempotency_key:
+            answer_idempotency.release(current_user.id, idempotency_key)
+        raise
+
+    quiz_progress.advance(current_user.id, quiz, question_id)
+    if recorded:
+        view_cache.invalidate_user(current_user.id)
+    result = {
+        'answer': chosen_answer.title,
+        'description': chosen_answer.description,
+        'user_answer': chosen_answer.is_right_choice,
+    }
+    if idempotency_key:
+        answer_idempotency.complete(
+            current_user.id,
+            idempotency_key,
+            fingerprint,
+            result,
+        )
+    return result
+
+
 async def handle_question_get(
     quiz_id: int,
     test: Optional[str] = None,
@@ -143,22 +215,22 @@ async def handle_question_get(
 
     """
     if test:
-        completed = [
-            qst.get('question').get('id')
-            for qst in session.get('test_answers', [])
-        ]
-        question: Optional[QuestionModel] = next(
+        completed = {
+            answer['question_id'] for answer in session.get('test_answers', [])
+        }
+        quiz = await quiz_snapshots.get(quiz_id)
+        question: Optional[QuestionSnapshot] = next(
             (
                 qst
-                for qst in await question_crud.get_all_by_quiz_id(quiz_id)
+                for qst in (quiz.snapshot.questions if quiz else ())
                 if qst.id not in completed
             ),
             None,
         )
     else:
-        question: Optional[QuestionModel] = await question_crud.get_new(
-            quiz_id=quiz_id,
+        question = await quiz_progress.next_question(
             user_id=current_user.id,
+            quiz_id=quiz_id,
         )
 
     if question is None:
@@ -170,78 +242,7 @@ async def handle_question_get(
         question=question,
         answers=answers,
         test=test,
-    )
-
-
-async def update_quiz_results(
-    user_id: int,
-    quiz_id: int,
-    question_id: int,
-    is_correct_answer: bool,
-    tg_user_id: int,
-) -> None:
-    """Обновляет результаты викторины для пользователя.
-
-    Args:
-    ----
-        user_id (int): ID пользователя.
-        quiz_id (int): ID викторины.
-        question_id (int): ID вопроса.
-        is_correct_answer (bool): Флаг, указывающий, был ли ответ
-        на вопрос верным.
-        tg_user_id (int): ID телеграм пользователя.
-
-    """
-    quiz_result = await quiz_result_crud.get_by_user_and_quiz(
-        user_id=user_id,
-        quiz_id=quiz_id,
-    )
-    if quiz_result is None:
-        quiz_result = await quiz_result_crud.create(
-            {
-                'user_id': user_id,
-                'tg_user_id': tg_user_id,
-                'quiz_id': quiz_id,
-                'total_questions': 0,
-                'correct_answers_count': 0,
-                'is_complete': False,
-            },
-        )
-    quiz_result.total_questions += 1
-    if is_correct_answer:
-        quiz_result.correct_answers_count += 1
-    await quiz_result_crud.update_with_obj(quiz_result)
-
-
-async def save_user_answer(
-    user_id: int,
-    tg_user_id: int,
-    quiz_id: int,
-    question_id: int,
-    answer_id: int,
-    is_right: bool,
-) -> None:
-    """Сохраняет ответ пользователя в базе данных.
-
-    Args:
-    ----
-        user_id (int): ID пользователя.
-        tg_user_id (int): ID телеграм пользователя.
-        quiz_id (int): ID викторины.
-        question_id (int): ID вопроса.
-        answer_id (int): ID выбранного ответа.
-        is_right (bool): Флаг, указывающий, был ли ответ верным.
-
-    """
-    await user_answer_crud.create(
-        {
-            'user_id': user_id,
-            'tg_user_id': tg_user_id,
-            'quiz_id': quiz_id,
-            'question_id': question_id,
-            'answer_id': answer_id,
-            'is_right': is_right,
-        },
+        idempotency_key=uuid4().hex,
     )
 
 
@@ -273,5 +274,15 @@ async def handle_quiz_end(
     if quiz_result is not None and not quiz_result.is_complete:
         quiz_result.is_complete = True
         quiz_result.ended_on = datetime.utcnow()
+        # Завершенная викторина не меняется, поэтому разбор ответов
+        # сохраняется сразу, и страница результатов читает одну строку
+        quiz_result.breakdown = build_breakdown(
+            await quiz_snapshots.get(quiz_id),
+            await user_answer_crud.get_answer_ids_by_question(
+                current_user.id,
+                quiz_id,
+            ),
+        )
         await quiz_result_crud.update_with_obj(quiz_result)
+        view_cache.invalidate_user(current_user.id)
     return redirect(url_for('results', quiz_id=quiz_id))
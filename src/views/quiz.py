@@ -6,19 +6,29 @@ from src.constants import DEFAULT_PAGE_NUMBER, HTTP_NOT_FOUND, PER_PAGE
 from src.crud.quiz import quiz_crud
 from src.crud.quiz_result import quiz_result_crud
 from src.crud.user_answer import user_answer_crud
+from src.jwt_utils import get_optional_user
+from src.models.quiz import Quiz
+from src.pagination import keyset_paginate
+from src.quiz_progress import quiz_progress
+from src.view_cache import view_cache
 
 
 @app.route('/', methods=['GET'])
-# Возможно можно добавить кэш для викторин
-# @cache.cached(timeout=30, key_prefix='categories_view_cache')
+@view_cache.cached(per_user=False)
 async def quizzes() -> str:
-    """Вывод страницы викторин."""
+    """Вывод страницы викторин.
+
+    Вошедшему пользователю показывается его прогресс по викторинам.
+
+    """
     page = request.args.get('page', DEFAULT_PAGE_NUMBER, type=int)
     per_page = PER_PAGE
-    quizzes_paginated = quiz_crud.get_multi_query().paginate(
+    user = get_optional_user()
+    quizzes_paginated = keyset_paginate(
+        quiz_crud.get_catalog_query(user.id if user else None),
+        [Quiz.id],
         page=page,
         per_page=per_page,
-        error_out=False,
     )
     if not quizzes_paginated.items:
         return render_template('errors/404.html'), HTTP_NOT_FOUND
@@ -38,16 +48,12 @@ async def quiz_reload(quiz_id: int) -> str:
         user_id=current_user.id,
         quiz_id=quiz_id,
     )
-    quiz_result = await quiz_result_crud.get_by_user_and_quiz(
-        user_id=current_user.id,
-        quiz_id=quiz_id,
-    )
     for user_answer in user_answers:
         user_answer.user_id = None
         await user_answer_crud.update_with_obj(user_answer)
-    if quiz_result:
-        quiz_result.user_id = None
-        await quiz_result_crud.update_with_obj(quiz_result)
+    await quiz_result_crud.detach_from_user(current_user.id, quiz_id)
+    quiz_progress.reset(current_user.id, quiz_id)
+    view_cache.invalidate_user(current_user.id)
     return redirect(
         url_for('question',  quiz_id=quiz_id),
     )
@@ -1,5 +1,8 @@
+from typing import Optional
+
 from flask import (
     render_template,
+    request,
     session,
     url_for,
 )
@@ -9,106 +12,42 @@ from flask_jwt_extended import (
 )
 
 from src import app
-from src.crud.question import question_crud
-from src.crud.quiz import quiz_crud
 from src.crud.quiz_result import quiz_result_crud
 from src.crud.user_answer import user_answer_crud
-from src.utils import Dotdict, obj_to_dict
-
-
-@app.route(
-    '/results/<int:quiz_id>/',
-    defaults={'test': False},
-)
-@app.route('/results/<int:quiz_id>/<test>')
-@jwt_required()
-async def results(quiz_id: int, test: str) -> str:
-    """Результаты викторины."""
-    user = current_user
+from src.models.quiz_result import QuizResult
+from src.quiz_snapshot import CompiledQuiz, quiz_snapshots
+from src.utils import Dotdict
+from src.view_cache import view_cache
 
-    if not test:
-        # Получаем результат викторины для конкретного пользователя и викторины
-        quiz_result = await quiz_result_crud.get_by_user_and_quiz(
-            user.id,
-            quiz_id,
-        )
-    else:
-        test_answers = obj_to_dict(session.get('test_answers', []))
-        session['test_answers'] = []
-        correct_answers = sum(
-            1
-            for answer in test_answers
-            if answer.get('answer').get('is_right_choice')
-        )
-        total_questions = len(test_answers)
-        quiz_result = Dotdict(
-            {
-                'user_id': user.id,
-                'quiz_id': quiz_id,
-                'total_questions': total_questions,
-                'correct_answers_count': correct_answers,
-                'all_questions': [qr.question for qr in test_answers],
-                'user_answers': [qr.answer for qr in test_answers],
-            },
-        )
 
-    if not quiz_result:
-        return 'Результаты викторины не найдены', 404
+def build_breakdown(
+    quiz: Optional[CompiledQuiz],
+    user_answers: dict[int, int],
+) -> dict:
+    """Разбор ответов пользователя по вопросам викторины.
 
-    # Получаем название викторины
-    quiz = await quiz_crud.get_by_id(quiz_id)
-    quiz_title = quiz.title if quiz else 'Неизвестная викторина'
+    Args:
+    ----
+        quiz (Optional[CompiledQuiz]): Снимок викторины.
+        user_answers (dict[int, int]): ID вопроса -> ID выбранного варианта.
 
-    # Считаем общее количество вопросов и количество правильных ответов
-    total_questions = quiz_result.total_questions
-    correct_answers_count = quiz_result.correct_answers_count
+    Returns:
+    -------
+        dict: Название викторины и вопросы с ответами для страницы
+        результатов.
 
-    # Добавляем вопросы к результату
-    quiz_result.questions = []
-    if not test:
-        user_answers = await user_answer_crud.get_results_by_user_and_quiz(
-            user.id,
-            quiz_id,
-        )
-        # Получаем все вопросы по викторине
-        questions = await question_crud.get_all_by_quiz_id(quiz_result.quiz_id)
-    else:
-        user_answers = quiz_result.get('user_answers')
-        questions = quiz_result.get('all_questions')
-
-    for question in questions:
-        user_answer = next(
-            (ua for ua in user_answers if ua.question_id == question.id),
-            None,
-        )
-        # Найдем правильный вариант ответа
-        correct_variant = next(
-            (v for v in question.variants if v.is_right_choice),
-            None,
-        )
-        # Получаем текст ответа пользователя
-        # Так как из сессии получаем модель variant
-        # а тут из модели user_answer
-        # то условие будет разным
-        user_answer = (
-            user_answer
-            if test
-            else next(
-                (
-                    v
-                    for v in question.variants
-                    if v.id == user_answer.answer_id
-                ),
-                None,
-            )
-        )
+    """
+    questions = []
+    for question in quiz.snapshot.questions if quiz else ():
+        correct_variant = quiz.correct_variant(question.id)
+        user_answer = quiz.variants.get(user_answers.get(question.id))
         # Собираем все возможные ответы
         possible_answers = [v.title for v in question.variants]
         image_url = url_for('get_question_image', question_id=question.id)
-        quiz_result.questions.append(
+        questions.append(
             {
                 'title': question.title,
-                'user_answer': user_answer.title,
+                'user_answer': user_answer.title if user_answer else None,
                 'correct_answer': (
                     correct_variant.title if correct_variant else None
                 ),
@@ -117,16 +56,115 @@ async def results(quiz_id: int, test: str) -> str:
                 'correct_description': correct_variant.description
                 if correct_variant
                 else None,
-                'image_url': image_url if image_url else None,
+                'image_url': image_url if question.has_image else None,
             },
         )
+    return {
+        'quiz_title': quiz.title if quiz else 'Неизвестная викторина',
+        'questions': questions,
+    }
+
+
+@app.route(
+    '/results/<int:quiz_id>/',
+    defaults={'test': False},
+)
+@app.route('/results/<int:quiz_id>/<test>')
+@jwt_required()
+# Тестовый режим читает ответы из сессии и не кэшируется
+@view_cache.cached(unless=lambda: request.view_args.get('test'))
+async def results(quiz_id: int, test: str) -> str:
+    """Результаты викторины."""
+    user = current_user
+
+    if not test:
+        quiz_result, breakdown = await get_user_breakdown(user.id, quiz_id)
+        if not quiz_result:
+            return 'Результаты викторины не найдены', 404
+        return render_results(quiz_result, breakdown, test)
+
+    user_answers = {
+        answer['question_id']: answer['answer_id']
+        for answer in session.get('test_answers', [])
+    }
+    session['test_answers'] = []
+    quiz_result = Dotdict(
+        {
+            'user_id': user.id,
+            'quiz_id': quiz_id,
+            'total_questions': len(user_answers),
+            'correct_answers_count': 0,
+        },
+    )
+    quiz = await quiz_snapshots.get(quiz_id)
+    quiz_result.correct_answers_count = sum(
+        1
+        for answer_id in user_answers.values()
+        if quiz and answer_id in quiz.variants
+        and quiz.variants[answer_id].is_right_choice
+    )
+    return render_results(
+        quiz_result,
+        build_breakdown(quiz, user_answers),
+        test,
+    )
+
+
+async def get_user_breakdown(
+    user_id: int,
+    quiz_id: int,
+    quiz_result: Optional[QuizResult] = None,
+) -> tuple[Optional[QuizResult], Optional[dict]]:
+    """Результат пользователя по викторине и разбор его ответов.
+
+    Разбор завершенной викторины сохранен при ее завершении и читается
+    вместе с результатом. Для незавершенной он собирается по снимку
+    викторины, а для завершенной до появления сохраненного разбора —
+    собирается и сохраняется.
+
+    Уже загруженный результат передается в quiz_result, тогда он не
+    запрашивается повторно, а сохраненный разбор догружается только
+    для завершенной викторины.
+
+    Returns
+    -------
+    tuple[Optional[QuizResult], Optional[dict]]
+        Результат и разбор или (None, None), если результата нет.
+
+    """
+    if quiz_result is None:
+        quiz_result = await quiz_result_crud.get_by_user_and_quiz(
+            user_id,
+            quiz_id,
+            with_breakdown=True,
+        )
+    if quiz_result is None:
+        return None, None
+    if quiz_result.is_complete and quiz_result.breakdown:
+        return quiz_result, quiz_result.breakdown
+    quiz = await quiz_snapshots.get(quiz_id)
+    breakdown = build_breakdown(
+        quiz,
+        await user_answer_crud.get_answer_ids_by_question(
+            user_id,
+            quiz_id,
+        ),
+    )
+    if quiz_result.is_complete and quiz:
+        # Викторина завершена до появления сохраненного разбора
+        quiz_result.breakdown = breakdown
+        await quiz_result_crud.update_with_obj(quiz_result)
+    return quiz_result, breakdown
+
 
+def render_results(quiz_result: object, breakdown: dict, test: str) -> str:
+    """Отрисовка страницы результатов по разбору ответов."""
     return render_template(
         'full_results.html',
-        user=user,
-        quiz_results=[quiz_result],
-        total_questions=total_questions,
-        correct_answers_count=correct_answers_count,
-        quiz_title=quiz_title,
+        user=current_user,
+        quiz_results=[{'questions': breakdown['questions']}],
+        total_questions=quiz_result.total_questions,
+        correct_answers_count=quiz_result.correct_answers_count,
+        quiz_title=breakdown['quiz_title'],
         test=test,
     )
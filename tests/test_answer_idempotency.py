@@ -0,0 +1,112 @@
+"""Одновременные одинаковые отправки ответа на вопрос.
+
+Каждый запрос выполняется в своем потоке со своим циклом событий,
+как async представления flask в потоках WsgiToAsgi.
+
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from uuid import uuid4
+
+import pytest
+from flask_jwt_extended import create_access_token, get_csrf_token
+from sqlalchemy import text
+
+from benchmarks.fixtures import QuizFixture, quiz_fixture
+
+from src import app, db
+from src.crud.user_answer import user_answer_crud
+from src.models.user import User
+
+REQUESTS = 50
+
+
+@pytest.fixture
+def fixture() -> QuizFixture:
+    """Викторина из одного вопроса и пользователь."""
+    with quiz_fixture(questions=1, users=1) as fixture:
+        yield fixture
+
+
+@pytest.fixture
+def record_answer_calls(monkeypatch: pytest.MonkeyPatch) -> list[bool]:
+    """Результаты вызовов record_answer."""
+    calls = []
+    record_answer = user_answer_crud.record_answer
+
+    async def counted(**kwargs: object) -> bool:
+        recorded = await record_answer(**kwargs)
+        calls.append(recorded)
+        return recorded
+
+    monkeypatch.setattr(user_answer_crud, 'record_answer', counted)
+    return calls
+
+
+def post_in_parallel(
+    fixture: QuizFixture,
+    idempotency_key: Optional[str],
+) -> list[tuple[int, bytes]]:
+    """Отправить одинаковые ответы одновременно из разных потоков."""
+    user_id, _ = fixture.users[0]
+    question_id, answer_id = fixture.questions[0]
+    with app.app_context():
+        token = create_access_token(identity=db.session.get(User, user_id))
+    data = {
+        'question_id': question_id,
+        'answer': answer_id,
+        'csrf_token': get_csrf_token(token),
+    }
+    if idempotency_key:
+        data['idempotency_key'] = idempotency_key
+    barrier = threading.Barrier(REQUESTS)
+
+    def post(_: int) -> tuple[int, bytes]:
+        client = app.test_client()
+        client.set_cookie('access_token_cookie', token)
+        barrier.wait()
+        response = client.post(f'/{fixture.quiz_id}/', data=data)
+        return response.status_code, response.data
+
+    with ThreadPoolExecutor(REQUESTS) as executor:
+        return list(executor.map(post, range(REQUESTS)))
+
+
+def saved_answer(fixture: QuizFixture) -> tuple[int, int]:
+    """Число ответов пользователя и счетчик вопросов результата."""
+    with app.app_context():
+        return db.session.execute(
+            text(
+                'SELECT '
+                '(SELECT count(*) FROM user_answers '
+                ' WHERE user_id = :user_id AND quiz_id = :quiz_id), '
+                '(SELECT total_questions FROM quiz_results '
+                ' WHERE user_id = :user_id AND quiz_id = :quiz_id)',
+            ),
+            {'user_id': fixture.users[0][0], 'quiz_id': fixture.quiz_id},
+        ).one()
+
+
+def test_same_key_is_recorded_once(
+    fixture: QuizFixture,
+    record_answer_calls: list[bool],
+) -> None:
+    """Повторы с ключом ждут первый запрос и получают его результат."""
+    responses = post_in_parallel(fixture, uuid4().hex)
+    assert [status for status, _ in responses] == [200] * REQUESTS
+    assert len({body for _, body in responses}) == 1
+    assert record_answer_calls == [True]
+    assert saved_answer(fixture) == (1, 1)
+
+
+def test_without_key_counters_move_once(
+    fixture: QuizFixture,
+    record_answer_calls: list[bool],
+) -> None:
+    """Без ключа ответ сохраняет каждый запрос, но засчитывается один."""
+    responses = post_in_parallel(fixture, None)
+    assert [status for status, _ in responses] == [200] * REQUESTS
+    assert sorted(record_answer_calls) == [False] * (REQUESTS - 1) + [True]
+    assert saved_answer(fixture) == (1, 1)
@@ -0,0 +1,88 @@
+"""Рассылка по получателям после контрольной точки."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import event, func, select, text
+
+from benchmarks.fixtures import add_users, quiz_fixture
+
+from src import db
+from src.bot import bot
+from src.broadcast import BroadcastRunner
+from src.models.broadcast import (
+    BROADCAST_FINISHED,
+    BROADCAST_PENDING,
+    Broadcast,
+)
+from src.models.telegram_user import TelegramUser
+
+USERS = 7
+BATCH_SIZE = 3
+
+
+class LockStandIn:
+
+    """Блокировка рассылки без Redis."""
+
+    async def reacquire(self) -> None:
+        """Продлить блокировку."""
+
+
+def test_delivery_uses_only_async_session(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Рассылка не обращается к базе через синхронную сессию."""
+    sent_to = []
+
+    async def send_message(chat_id: int, *args: object, **kw: object) -> None:
+        sent_to.append(chat_id)
+
+    monkeypatch.setattr(bot, 'send_message', send_message)
+    sync_queries = []
+
+    def count(*args: object) -> None:
+        sync_queries.append(args)
+
+    with quiz_fixture(questions=0) as fixture:
+        # Получатели рассылки — только пользователи, созданные после
+        # контрольной точки
+        broadcast = Broadcast(
+            text='Bench',
+            last_recipient_id=db.session.scalar(
+                select(func.coalesce(func.max(TelegramUser.id), 0)),
+            ),
+        )
+        db.session.add(broadcast)
+        db.session.commit()
+        broadcast_id = broadcast.id
+        add_users(fixture, USERS)
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            asyncio.run(
+                BroadcastRunner(batch_size=BATCH_SIZE)._deliver(
+                    broadcast_id,
+                    (BROADCAST_PENDING,),
+                    LockStandIn(),
+                ),
+            )
+            event.remove(engine, 'before_cursor_execute', count)
+            assert sync_queries == []
+            assert sorted(sent_to) == sorted(fixture.telegram_ids)
+            db.session.expire_all()
+            broadcast = db.session.get(Broadcast, broadcast_id)
+            assert broadcast.status == BROADCAST_FINISHED
+            assert (broadcast.sent_count, broadcast.failed_count) == (
+                USERS,
+                0,
+            )
+        finally:
+            if event.contains(engine, 'before_cursor_execute', count):
+                event.remove(engine, 'before_cursor_execute', count)
+            # Статусы доставки удаляются каскадом
+            db.session.execute(
+                text('DELETE FROM broadcasts WHERE id = :id'),
+                {'id': broadcast_id},
+            )
+            db.session.commit()
@@ -0,0 +1,68 @@
+"""Статистика рубрик при переносе вопроса в другую рубрику."""
+
+import asyncio
+from contextlib import ExitStack
+
+from sqlalchemy import select, text
+
+from benchmarks.fixtures import quiz_fixture
+
+from src import db
+from src.admin.question import QuestionAdmin
+from src.crud.user_answer import user_answer_crud
+from src.models.category import Category
+from src.models.question import Question
+from src.models.statistic import CategoryStatistic
+
+
+def category_counts(category_id: int) -> tuple[int, int]:
+    """Счетчики ответов рубрики."""
+    counts = db.session.execute(
+        select(
+            CategoryStatistic.total_answers,
+            CategoryStatistic.correct_answers,
+        ).where(CategoryStatistic.category_id == category_id),
+    ).first()
+    return tuple(counts) if counts else (0, 0)
+
+
+def test_question_counters_follow_category() -> None:
+    """Ответы на вопрос переходят в статистику новой рубрики."""
+    with ExitStack() as stack:
+        # Новая рубрика удаляется после вопроса, который в нее перенесен
+        other = stack.enter_context(quiz_fixture(questions=1))
+        fixture = stack.enter_context(quiz_fixture(questions=2, users=1))
+        user_id, telegram_id = fixture.users[0]
+        (moved_id, right_id), (kept_id, _) = fixture.questions
+
+        async def answer(question_id: int, answer_id: int) -> None:
+            await user_answer_crud.record_answer(
+                user_id=user_id,
+                telegram_id=telegram_id,
+                quiz_id=fixture.quiz_id,
+                question_id=question_id,
+                answer_id=answer_id,
+                is_right=answer_id == right_id,
+            )
+
+        wrong_id = db.session.scalar(
+            text(
+                'SELECT id FROM variants '
+                'WHERE question_id = :question_id AND NOT is_right_choice',
+            ),
+            {'question_id': kept_id},
+        )
+        asyncio.run(answer(moved_id, right_id))
+        asyncio.run(answer(kept_id, wrong_id))
+        assert category_counts(fixture.category_id) == (2, 1)
+
+        question = db.session.get(Question, moved_id)
+        question.category = db.session.get(Category, other.category_id)
+        QuestionAdmin.move_statistics(question, is_created=False)
+        db.session.commit()
+        assert category_counts(fixture.category_id) == (1, 0)
+        assert category_counts(other.category_id) == (1, 1)
+        # Повторное сохранение без смены рубрики ничего не переносит
+        QuestionAdmin.move_statistics(question, is_created=False)
+        db.session.commit()
+        assert category_counts(other.category_id) == (1, 1)
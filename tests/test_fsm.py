@@ -0,0 +1,142 @@
+"""Два экземпляра диспетчера с общими состояниями в Redis.
+
+Каждый диспетчер получает свой клиент Redis, как отдельный процесс
+бэкенда, и собирается так же, как основной (src.bot.create_dispatcher).
+
+"""
+
+import asyncio
+import itertools
+import random
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.filters import Command, StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import Message, Update
+
+from src.bot import create_dispatcher, fsm_key_builder
+from src.redis_client import REDIS_OPTIONS, LoopBoundRedis
+from src.settings import settings
+
+UPDATES = 20
+# Обработчик читает и записывает данные с паузой между ними
+HANDLER_DELAY = 0.01
+
+update_ids = itertools.count(1)
+
+
+class Flow(StatesGroup):
+
+    """Состояния тестового диалога."""
+
+    started = State()
+    counting = State()
+
+
+def make_router(instance: str, handled: list[tuple[str, str]]) -> Router:
+    """Обработчики тестового диалога, одинаковые для экземпляров."""
+    router = Router()
+
+    @router.message(Command('begin'))
+    async def begin(message: Message, state: FSMContext) -> None:
+        await state.set_state(Flow.started)
+        await state.set_data({'count': 0})
+        handled.append((instance, 'begin'))
+
+    @router.message(StateFilter(Flow.started, Flow.counting), F.text == '+')
+    async def increment(message: Message, state: FSMContext) -> None:
+        data = await state.get_data()
+        await asyncio.sleep(HANDLER_DELAY)
+        await state.update_data(count=data['count'] + 1)
+        await state.set_state(Flow.counting)
+        handled.append((instance, '+'))
+
+    return router
+
+
+def make_update(user_id: int, text: str) -> Update:
+    """Сообщение пользователя в личном чате."""
+    update_id = next(update_ids)
+    return Update.model_validate(
+        {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': 0,
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': {'id': user_id, 'is_bot': False, 'first_name': 'T'},
+                'text': text,
+            },
+        },
+    )
+
+
+def make_instances(
+    handled: list[tuple[str, str]],
+) -> list[tuple[str, Dispatcher]]:
+    """Два экземпляра диспетчера со своими клиентами Redis."""
+    instances = []
+    for instance in ('a', 'b'):
+        dispatcher = create_dispatcher(LoopBoundRedis(**REDIS_OPTIONS))
+        dispatcher.include_router(make_router(instance, handled))
+        instances.append((instance, dispatcher))
+    return instances
+
+
+def test_interleaved_updates_for_one_user() -> None:
+    """Обновления пользователя поочередно попадают в разные экземпляры."""
+    handled: list[tuple[str, str]] = []
+    instances = make_instances(handled)
+    bot = Bot('123:test')
+    user_id = random.randint(10**9, 2 * 10**9)
+    key = StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id)
+
+    async def main() -> tuple[str, dict, int]:
+        try:
+            # Диалог начат в одном экземпляре, продолжается в другом
+            await instances[0][1].feed_update(
+                bot,
+                make_update(user_id, '/begin'),
+            )
+            await asyncio.gather(
+                *(
+                    instances[index % 2][1].feed_update(
+                        bot,
+                        make_update(user_id, '+'),
+                    )
+                    for index in range(UPDATES)
+                ),
+            )
+            storage = instances[1][1].storage
+            state_ttl = await storage.redis.ttl(
+                fsm_key_builder.build(key, 'state'),
+            )
+            return (
+                await storage.get_state(key),
+                await storage.get_data(key),
+                state_ttl,
+            )
+        finally:
+            for _, dispatcher in instances:
+                await dispatcher.storage.set_state(key, None)
+                await dispatcher.storage.set_data(key, {})
+                await dispatcher.fsm.events_isolation.close()
+                await dispatcher.storage.close()
+            await bot.session.close()
+
+    state, data, state_ttl = asyncio.run(main())
+    # Блокировка по пользователю не дает потерять ни одного обновления
+    assert data == {'count': UPDATES}
+    assert state == Flow.counting.state
+    assert {instance for instance, action in handled if action == '+'} == {
+        'a',
+        'b',
+    }
+    assert len(handled) == UPDATES + 1
+    # Ключи в пространстве имен приложения и с TTL из настроек
+    assert fsm_key_builder.build(key, 'state').startswith(
+        f'{settings.REDIS_KEY_PREFIX}:fsm:',
+    )
+    assert 0 < state_ttl <= settings.FSM_STATE_TTL
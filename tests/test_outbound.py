@@ -0,0 +1,212 @@
+"""Ограничитель исходящих запросов против локальной заглушки Bot API.
+
+Тесты запускаются из корня проекта с переменными окружения
+из infra/.env:
+
+    python -m pytest tests
+
+"""
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from src.outbound import (
+    PRIORITY_LOW,
+    OutboundLimiter,
+    RateLimitMiddleware,
+    outbound_priority,
+)
+
+TOKEN = '123:test'
+GLOBAL_RATE = 20
+CHAT_RATE = 5
+# Допуск на неточность таймеров
+TOLERANCE = 0.02
+
+
+class BotAPIStandIn:
+
+    """Заглушка Bot API: запоминает вызовы и по запросу отвечает 429."""
+
+    def __init__(self) -> None:
+        """Список вызовов и ответы 429 по chat_id."""
+        self.calls: list[tuple[float, str]] = []
+        self.retry_after: dict[str, int] = {}
+        self.called = asyncio.Event()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Ответить на метод Bot API."""
+        data = await request.post()
+        chat_id = data['chat_id']
+        self.calls.append((time.monotonic(), chat_id))
+        self.called.set()
+        retry_after = self.retry_after.pop(chat_id, None)
+        if retry_after is not None:
+            return web.json_response(
+                {
+                    'ok': False,
+                    'error_code': 429,
+                    'description': 'Too Many Requests',
+                    'parameters': {'retry_after': retry_after},
+                },
+                status=429,
+            )
+        return web.json_response(
+            {
+                'ok': True,
+                'result': {
+                    'message_id': len(self.calls),
+                    'date': 0,
+                    'chat': {'id': int(chat_id), 'type': 'private'},
+                    'text': data['text'],
+                },
+            },
+        )
+
+    def times(self, chat_id: str) -> list[float]:
+        """Время вызовов для чата."""
+        return [at for at, chat in self.calls if chat == chat_id]
+
+
+def run_with_bot(
+    limiter: OutboundLimiter,
+    scenario: Callable[[Bot, BotAPIStandIn], Awaitable[None]],
+    stand_in: BotAPIStandIn,
+) -> None:
+    """Выполнить сценарий с ботом, который ходит в заглушку."""
+
+    async def main() -> None:
+        application = web.Application()
+        application.router.add_post('/{path:.*}', stand_in.handle)
+        runner = web.AppRunner(application)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        session = AiohttpSession(
+            api=TelegramAPIServer.from_base(f'http://127.0.0.1:{port}'),
+        )
+        session.middleware(RateLimitMiddleware(limiter, max_retries=2))
+        bot = Bot(TOKEN, session=session)
+        try:
+            await scenario(bot, stand_in)
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    asyncio.run(main())
+
+
+def make_limiter() -> OutboundLimiter:
+    """Ограничитель с темпом, удобным для тестов."""
+    return OutboundLimiter(
+        global_rate=GLOBAL_RATE,
+        chat_rate=CHAT_RATE,
+        chat_burst=1,
+    )
+
+
+def test_chat_rate_and_metrics() -> None:
+    """Сообщения в один чат идут с темпом ведра чата."""
+    limiter = make_limiter()
+    stand_in = BotAPIStandIn()
+
+    async def scenario(bot: Bot, stand_in: BotAPIStandIn) -> None:
+        await asyncio.gather(*(bot.send_message(1, 'hi') for _ in range(3)))
+
+    run_with_bot(limiter, scenario, stand_in)
+    times = stand_in.times('1')
+    assert len(times) == 3
+    for previous, current in zip(times, times[1:]):
+        assert current - previous >= 1 / CHAT_RATE - TOLERANCE
+    stats = limiter.stats()
+    assert stats['sent'] == 3
+    assert stats['waits'] == 3
+    assert stats['throttled'] == 2
+    assert stats['retries'] == 0
+    assert stats['queue'] == 0
+    assert stats['wait_time_avg'] > 0
+
+
+def test_retry_after_pauses_all_chats() -> None:
+    """После 429 запрос повторяется, а общее ведро встает на паузу."""
+    limiter = make_limiter()
+    stand_in = BotAPIStandIn()
+    stand_in.retry_after['7'] = 1
+
+    async def scenario(bot: Bot, stand_in: BotAPIStandIn) -> None:
+        first = asyncio.create_task(bot.send_message(7, 'first'))
+        await stand_in.called.wait()
+        await asyncio.sleep(0.05)
+        await asyncio.gather(first, bot.send_message(8, 'other chat'))
+
+    run_with_bot(limiter, scenario, stand_in)
+    rejected_at = stand_in.times('7')[0]
+    assert len(stand_in.times('7')) == 2
+    assert stand_in.times('7')[1] - rejected_at >= 1 - TOLERANCE
+    assert stand_in.times('8')[0] - rejected_at >= 1 - TOLERANCE
+    stats = limiter.stats()
+    assert stats['sent'] == 2
+    assert stats['retries'] == 1
+    # Ожидания учитываются по каждой попытке, а не по отправленным
+    assert stats['waits'] == 3
+    assert stats['wait_time_avg'] == round(
+        limiter.metrics.wait_time_total / 3,
+        4,
+    )
+
+
+def test_high_priority_goes_first() -> None:
+    """Ответы пользователям обгоняют очередь рассылки."""
+    limiter = make_limiter()
+    stand_in = BotAPIStandIn()
+    answered_after: list[float] = []
+
+    async def broadcast(bot: Bot, chat_id: int) -> None:
+        outbound_priority.set(PRIORITY_LOW)
+        await bot.send_message(chat_id, 'broadcast')
+
+    async def scenario(bot: Bot, stand_in: BotAPIStandIn) -> None:
+        broadcasts = [
+            asyncio.create_task(broadcast(bot, chat_id))
+            for chat_id in range(100, 100 + GLOBAL_RATE * 3)
+        ]
+        await asyncio.sleep(0.2)
+        asked_at = time.monotonic()
+        await bot.send_message(1, 'answer')
+        answered_after.append(time.monotonic() - asked_at)
+        await asyncio.gather(*broadcasts)
+
+    run_with_bot(limiter, scenario, stand_in)
+    chats = [chat for _, chat in stand_in.calls]
+    # Ответ не ждал рассылку: после него ушла большая ее часть
+    assert answered_after[0] < 2 / GLOBAL_RATE + TOLERANCE
+    assert len(chats) - chats.index('1') > GLOBAL_RATE
+
+
+def test_acquire_from_other_loops() -> None:
+    """Запросы с других циклов ждут разрешения на цикле бота."""
+    limiter = make_limiter()
+    bot_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=bot_loop.run_forever, daemon=True)
+    thread.start()
+    limiter.attach(bot_loop)
+    try:
+        # Каждый asyncio.run — новый цикл, как в async представлениях
+        for _ in range(3):
+            asyncio.run(
+                asyncio.wait_for(limiter.acquire(1, PRIORITY_LOW), 2),
+            )
+        assert limiter._pump_task.get_loop() is bot_loop
+        assert limiter.stats()['waits'] == 3
+    finally:
+        bot_loop.call_soon_threadsafe(bot_loop.stop)
+        thread.join()
+        bot_loop.close()
@@ -0,0 +1,60 @@
+"""Курсоры страниц списка."""
+
+import base64
+import json
+from decimal import Decimal
+
+import pytest
+
+from src import app
+from src.crud.statistic import question_statistic_crud
+from src.models.question import Question
+from src.pagination import decode_cursor, encode_cursor, keyset_paginate
+
+PERCENTAGE_KEYS = [
+    question_statistic_crud.columns()['correct_percentage'].element,
+    Question.id,
+]
+
+
+def raw_cursor(values: object) -> str:
+    """Курсор с произвольным содержимым, как в подделанной ссылке."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_cursor_round_trip() -> None:
+    """Курсор из ключа строки читается со значениями тех же типов."""
+    cursor = encode_cursor((Decimal('66.67'), 5))
+    assert decode_cursor(cursor, PERCENTAGE_KEYS) == [Decimal('66.67'), 5]
+
+
+@pytest.mark.parametrize(
+    'values',
+    [
+        ['x', 5],
+        ['66.67', 'x'],
+        ['NaN', 5],
+        ['66.67', True],
+        ['66.67', 5.5],
+        [None, 5],
+        ['66.67'],
+        {'after': 5},
+    ],
+)
+def test_bad_cursor_is_ignored(values: object) -> None:
+    """Курсор с неверными значениями ключа не используется."""
+    assert decode_cursor(raw_cursor(values), PERCENTAGE_KEYS) is None
+
+
+def first_page_ids(url: str) -> list[int]:
+    """ID вопросов первой страницы списка по адресу запроса."""
+    with app.test_request_context(url):
+        page = keyset_paginate(Question.query, [Question.id], 1, 10)
+        return [question.id for question in page.items]
+
+
+def test_bad_cursor_falls_back_to_page_number() -> None:
+    """Страница с неверным курсором открывается по номеру."""
+    assert first_page_ids(f'/?after={raw_cursor(["x"])}') == (
+        first_page_ids('/')
+    )
@@ -0,0 +1,103 @@
+"""Число запросов к базе на странице профиля.
+
+Страница собирается фиксированным числом запросов, которое не
+зависит от числа результатов пользователя и вопросов в викторинах.
+
+"""
+
+import asyncio
+from contextlib import ExitStack
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, select
+
+from benchmarks.fixtures import quiz_fixture
+
+from src import app, cache, db
+from src.crud.user_answer import user_answer_crud
+from src.models.quiz_result import QuizResult
+from src.models.user import User
+from src.quiz_snapshot import quiz_snapshots
+from src.view_cache import view_cache
+from src.views.pro_file import breakdown_cache_key
+
+# Пользователь по токену, итоги пользователя, число результатов
+# и страница результатов вместе с викторинами
+PROFILE_QUERIES = 4
+# Результат для ключа кэша и ответы пользователя, вопросы берутся
+# из снимка викторины
+BREAKDOWN_QUERIES = 2
+# Из кэша разбор отдается по результату для ключа кэша
+CACHED_BREAKDOWN_QUERIES = 1
+QUESTIONS = 4
+
+
+def count_queries(client: object, url: str) -> int:
+    """Число запросов к базе при обработке GET."""
+    queries = []
+
+    def count(*args: object) -> None:
+        queries.append(args)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.parametrize('results', [1, 8])
+def test_profile_query_count(results: int) -> None:
+    """Страница профиля и разбор викторины без N+1."""
+    with ExitStack() as stack:
+        user_fixture = stack.enter_context(
+            quiz_fixture(questions=QUESTIONS, users=1),
+        )
+        user_id, telegram_id = user_fixture.users[0]
+        fixtures = [user_fixture] + [
+            stack.enter_context(quiz_fixture(questions=QUESTIONS))
+            for _ in range(results - 1)
+        ]
+
+        async def answer_all() -> None:
+            for fixture in fixtures:
+                for question_id, answer_id in fixture.questions:
+                    await user_answer_crud.record_answer(
+                        user_id=user_id,
+                        telegram_id=telegram_id,
+                        quiz_id=fixture.quiz_id,
+                        question_id=question_id,
+                        answer_id=answer_id,
+                        is_right=True,
+                    )
+
+        asyncio.run(answer_all())
+        quiz_id = fixtures[-1].quiz_id
+        with app.app_context():
+            quiz = asyncio.run(quiz_snapshots.get(quiz_id))
+        quiz_result = db.session.scalar(
+            select(QuizResult).where(
+                QuizResult.user_id == user_id,
+                QuizResult.quiz_id == quiz_id,
+            ),
+        )
+        token = create_access_token(identity=db.session.get(User, user_id))
+        # Страница, пользователь по токену, число результатов и разбор
+        # берутся из базы. В кэше могут остаться записи пользователя
+        # с тем же id из пересозданной базы, удаляются только они
+        view_cache.invalidate_user(user_id)
+        cache.delete(f'user_{user_id}')
+        cache.delete(breakdown_cache_key(user_id, quiz_result, quiz.version))
+        client = app.test_client()
+        client.set_cookie('access_token_cookie', token)
+        assert count_queries(client, '/me') == PROFILE_QUERIES
+        breakdown_url = f'/me/results/{quiz_id}'
+        assert count_queries(client, breakdown_url) == BREAKDOWN_QUERIES
+        assert count_queries(client, breakdown_url) == (
+            CACHED_BREAKDOWN_QUERIES
+        )
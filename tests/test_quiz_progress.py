@@ -0,0 +1,77 @@
+"""Курсор прогресса по викторине поверх снимка."""
+
+import asyncio
+
+from sqlalchemy import text
+
+from benchmarks.fixtures import quiz_fixture
+
+from src import db
+from src.crud.user_answer import user_answer_crud
+from src.quiz_progress import quiz_progress
+from src.quiz_snapshot import quiz_snapshots
+from src.redis_client import redis_client
+
+
+def test_questions_follow_positions() -> None:
+    """Вопросы идут по позициям, курсор пересчитывается по базе."""
+    with quiz_fixture(questions=3, users=1) as fixture:
+        user_id, telegram_id = fixture.users[0]
+        # Порядок прохождения обратен порядку создания вопросов
+        for position, (question_id, _) in enumerate(
+            reversed(fixture.questions),
+            start=1,
+        ):
+            db.session.execute(
+                text(
+                    'UPDATE quiz_questions SET position = :position '
+                    'WHERE quiz_id = :quiz_id '
+                    'AND question_id = :question_id',
+                ),
+                {
+                    'position': position,
+                    'quiz_id': fixture.quiz_id,
+                    'question_id': question_id,
+                },
+            )
+        db.session.commit()
+        quiz_snapshots.invalidate(fixture.quiz_id)
+        answers = dict(fixture.questions)
+
+        async def answer_next() -> int:
+            question = await quiz_progress.next_question(
+                user_id,
+                fixture.quiz_id,
+            )
+            await user_answer_crud.record_answer(
+                user_id=user_id,
+                telegram_id=telegram_id,
+                quiz_id=fixture.quiz_id,
+                question_id=question.id,
+                answer_id=answers[question.id],
+                is_right=True,
+            )
+            quiz = await quiz_snapshots.get(fixture.quiz_id)
+            quiz_progress.advance(user_id, quiz, question.id)
+            return question.id
+
+        async def main() -> list[int]:
+            served = [await answer_next()]
+            # Потерянный курсор восстанавливается по ответам в базе
+            redis_client.delete(quiz_progress._key(user_id, fixture.quiz_id))
+            rebuilds = quiz_progress.rebuilds
+            served += [await answer_next(), await answer_next()]
+            assert quiz_progress.rebuilds == rebuilds + 1
+            assert await quiz_progress.next_question(
+                user_id,
+                fixture.quiz_id,
+            ) is None
+            return served
+
+        try:
+            served = asyncio.run(main())
+        finally:
+            quiz_progress.reset(user_id, fixture.quiz_id)
+        assert served == [
+            question_id for question_id, _ in reversed(fixture.questions)
+        ]
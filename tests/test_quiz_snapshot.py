@@ -0,0 +1,43 @@
+"""Версии снимков викторин."""
+
+import asyncio
+
+from sqlalchemy import text
+
+from benchmarks.fixtures import quiz_fixture
+
+from src import db
+from src.quiz_snapshot import quiz_snapshots
+from src.redis_client import redis_client
+
+
+def rename_quiz(quiz_id: int, title: str) -> None:
+    """Изменить название викторины в обход админки."""
+    db.session.execute(
+        text('UPDATE quizzes SET title = :title WHERE id = :id'),
+        {'title': title, 'id': quiz_id},
+    )
+    db.session.commit()
+
+
+def test_lost_version_does_not_serve_stale_snapshot() -> None:
+    """После потери ключа версии снимок собирается заново."""
+    with quiz_fixture(questions=1) as fixture:
+        version_key = quiz_snapshots.version_key(fixture.quiz_id)
+
+        async def title() -> str:
+            return (await quiz_snapshots.get(fixture.quiz_id)).title
+
+        try:
+            rename_quiz(fixture.quiz_id, 'Before')
+            quiz_snapshots.invalidate(fixture.quiz_id)
+            assert asyncio.run(title()) == 'Before'
+            # Изменение без смены версии, затем ключ версии вытеснен
+            rename_quiz(fixture.quiz_id, 'After')
+            redis_client.delete(version_key)
+            assert asyncio.run(title()) == 'After'
+            version = quiz_snapshots.current_version(fixture.quiz_id)
+            quiz_snapshots.invalidate(fixture.quiz_id)
+            assert quiz_snapshots.current_version(fixture.quiz_id) != version
+        finally:
+            redis_client.delete(version_key)
@@ -0,0 +1,68 @@
+"""Регистрация пользователя по /start."""
+
+import asyncio
+from typing import Awaitable
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from benchmarks.fixtures import new_telegram_ids, quiz_fixture
+
+from src import db
+from src.crud.user import async_user_crud
+from src.models.user import User
+
+
+def register(telegram_id: int, username: str) -> Awaitable[bool]:
+    """Регистрация, как в обработчике /start."""
+    return async_user_crud.register(
+        {'name': 'Bench', 'username': username, 'telegram_id': telegram_id},
+        {'telegram_id': telegram_id, 'first_name': 'Bench'},
+    )
+
+
+def usernames(telegram_ids: list[int]) -> dict[int, str]:
+    """Username зарегистрированных пользователей по telegram_id."""
+    db.session.rollback()
+    return dict(
+        db.session.execute(
+            select(User.telegram_id, User.username).where(
+                User.telegram_id.in_(telegram_ids),
+            ),
+        ).all(),
+    )
+
+
+def test_taken_username() -> None:
+    """Занятый username не мешает зарегистрировать новый аккаунт."""
+    with quiz_fixture(questions=0, users=1) as fixture:
+        _, taken_telegram_id = fixture.users[0]
+        telegram_id = new_telegram_ids(1)[0]
+        fixture.telegram_ids.append(telegram_id)
+
+        async def main() -> list[bool]:
+            return [
+                await register(telegram_id, f'bench{taken_telegram_id}'),
+                await register(telegram_id, f'bench{taken_telegram_id}'),
+            ]
+
+        assert asyncio.run(main()) == [True, False]
+        assert usernames([telegram_id]) == {telegram_id: None}
+
+
+def test_same_new_username_in_parallel() -> None:
+    """Одновременные первые /start с одинаковым username."""
+    with quiz_fixture(questions=0) as fixture:
+        telegram_ids = new_telegram_ids(10)
+        fixture.telegram_ids += telegram_ids
+        username = f'bench{uuid4().hex}'
+
+        async def main() -> list[bool]:
+            return await asyncio.gather(
+                *(register(tg_id, username) for tg_id in telegram_ids),
+            )
+
+        assert asyncio.run(main()) == [True] * len(telegram_ids)
+        assert sorted(usernames(telegram_ids).values(), key=bool) == (
+            [None] * (len(telegram_ids) - 1) + [username]
+        )
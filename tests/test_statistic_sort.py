@@ -0,0 +1,75 @@
+"""Сортировка списков админки по счетчикам статистики."""
+
+import pytest
+from sqlalchemy import select, text
+
+from benchmarks.fixtures import quiz_fixture
+
+from src import app, db
+from src.crud.statistic import (
+    category_statistic_crud,
+    question_statistic_crud,
+    quiz_statistic_crud,
+)
+from src.models.category import Category
+from src.models.question import Question
+from src.models.quiz import Quiz
+from src.models.statistic import (
+    CategoryStatistic,
+    QuestionStatistic,
+    QuizStatistic,
+)
+
+SORTS = ('total_answers', 'correct_answers', 'correct_percentage')
+
+
+def test_new_objects_have_statistic_rows() -> None:
+    """Объект без ответов попадает в список с нулевыми счетчиками."""
+    with quiz_fixture(questions=2) as fixture:
+        owners = (
+            (
+                QuestionStatistic.question_id,
+                [question_id for question_id, _ in fixture.questions],
+            ),
+            (QuizStatistic.quiz_id, [fixture.quiz_id]),
+            (CategoryStatistic.category_id, [fixture.category_id]),
+        )
+        rows = [
+            db.session.execute(
+                select(
+                    key.class_.total_answers,
+                    key.class_.correct_answers,
+                ).where(key.in_(ids)),
+            ).all()
+            for key, ids in owners
+        ]
+        assert rows == [[(0, 0), (0, 0)], [(0, 0)], [(0, 0)]]
+
+
+@pytest.mark.parametrize('sort', SORTS)
+@pytest.mark.parametrize(
+    ('crud', 'owner'),
+    [
+        (question_statistic_crud, Question),
+        (quiz_statistic_crud, Quiz),
+        (category_statistic_crud, Category),
+    ],
+)
+def test_sort_reads_index(sort: str, crud: object, owner: type) -> None:
+    """Страница по счетчику читается по индексу без сортировки."""
+    keys = crud.sort_keys(sort, owner.id)
+    with app.app_context():
+        query = (
+            crud.with_counts(owner.query, owner.id)
+            .order_by(*(key.desc() for key in keys))
+            .limit(51)
+        )
+        statement = query.statement.compile(
+            dialect=db.engine.dialect,
+            compile_kwargs={'literal_binds': True},
+        )
+        # Без подходящего индекса запрет сортировки не сработал бы
+        db.session.execute(text('SET LOCAL enable_sort = off'))
+        plan = db.session.execute(text(f'EXPLAIN {statement}')).scalars()
+        assert not [line for line in plan if 'Sort' in line]
+        db.session.rollback()
@@ -0,0 +1,58 @@
+"""Ответы вебхука при постановке обновлений в полосы."""
+
+import asyncio
+from http import HTTPStatus
+
+from aiogram.types import Update
+
+from benchmarks.fixtures import new_telegram_ids
+from benchmarks.update_lanes import make_update
+
+from src.native_views import enqueue
+from src.update_dedup import update_dedup
+from src.update_lanes import LaneScheduler, SubmitResult
+
+
+def test_user_over_limit_is_dropped_with_200() -> None:
+    """Лишнее обновление пользователя не задерживает остальных."""
+    user_id, other_id = new_telegram_ids(2)
+    update_ids = new_telegram_ids(4)
+
+    async def main() -> list[int]:
+        release = asyncio.Event()
+
+        async def handler(update: Update) -> None:
+            await release.wait()
+
+        scheduler = LaneScheduler(handler, lanes=1, user_limit=1)
+        await scheduler.start()
+        updates = [
+            make_update(user_id, update_ids[0]),
+            make_update(user_id, update_ids[1]),
+            make_update(user_id, update_ids[2]),
+            make_update(other_id, update_ids[3]),
+        ]
+        statuses = []
+        for update in updates:
+            assert not await update_dedup.is_duplicate(update.update_id)
+            statuses.append(
+                (await enqueue(update, scheduler.submit)).status,
+            )
+            # Первое обновление уже в обработчике, второе ждет в очереди
+            await asyncio.sleep(0)
+        # Отброшенное обновление остается отмеченным как полученное
+        assert await update_dedup.is_duplicate(update_ids[2])
+        assert scheduler.stats()['dropped'] == 1
+        release.set()
+        await scheduler.drain(5)
+        assert scheduler.submit(updates[0]) is SubmitResult.REJECTED
+        rejected = make_update(other_id, new_telegram_ids(1)[0])
+        assert not await update_dedup.is_duplicate(rejected.update_id)
+        statuses.append((await enqueue(rejected, scheduler.submit)).status)
+        # Telegram повторит отклоненное обновление, это не дубль
+        assert not await update_dedup.is_duplicate(rejected.update_id)
+        return statuses
+
+    assert asyncio.run(main()) == [HTTPStatus.OK] * 4 + [
+        HTTPStatus.SERVICE_UNAVAILABLE,
+    ]